@@ -1,16 +1,47 @@
 import os
 from typing import Optional
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Motor y sesiones asíncronas; si ASYNC_DATABASE_URL está vacío se deriva de DATABASE_URL
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str = ""
+
+    # Pool de conexiones; THREADPOOL_TOKENS por defecto = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    THREADPOOL_TOKENS: Optional[int] = None
+
+    # Réplicas de solo lectura para los GET; una réplica que falla se omite REPLICA_RETRY_SECONDS
+    DATABASE_REPLICA_URLS: list = []
+    REPLICA_RETRY_SECONDS: int = 30
     ALGORITHM: str
     GCP_PROJECT_ID: str = ""
     GCP_BUCKET_NAME: str = ""
     
+    # Backend de almacenamiento de imágenes: gcp, local o memory
     CLOUD_PROVIDER: str = "gcp"
+    # Backend local: directorio de los archivos y URL bajo la que se sirven
+    LOCAL_STORAGE_PATH: str = "media"
+    LOCAL_STORAGE_URL: str = "/media"
+    # Subidas simultáneas al almacenamiento por worker
+    UPLOAD_CONCURRENCY: int = 8
+    # Procesos para generar variantes de imagen y calidad WebP (0-100)
+    IMAGE_WORKERS: int = 2
+    IMAGE_WEBP_QUALITY: int = 80
+    # Trozo de las subidas reanudables (múltiplo de 256 KB)
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
     
     SECRET_KEY: str = ""
+    # Clave pública PEM para ALGORITHM RS*/PS*/ES*: los tokens se verifican sin el secreto
+    JWT_PUBLIC_KEY: str = ""
+    # Tokens ya verificados en memoria; cada entrada vence en el exp del token o a los TTL segundos
+    AUTH_CACHE_MAX_ENTRIES: int = 1024
+    AUTH_CACHE_TTL: int = 300
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int 
     GOOGLE_APPLICATION_CREDENTIALS: str
@@ -18,13 +49,82 @@ class Settings(BaseSettings):
     APP_NAME: str
     APP_VERSION: str
     DEBUG: bool
+
+    # Caché en proceso de respuestas GET ya serializadas; se invalida en cada escritura
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_TTL: int = 30
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+
+    # Compresión negociada (br/gzip) de respuestas de texto desde COMPRESSION_MIN_SIZE bytes
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Serializa las respuestas GET una vez con pydantic-core, sin revalidar contra response_model
+    FAST_JSON_RESPONSES: bool = False
+
+    # Segundos de vigencia del catálogo de marcas en memoria
+    BRAND_CACHE_TTL: int = 60
+
+    # Avisos de invalidación entre workers (LISTEN/NOTIFY, solo PostgreSQL)
+    CACHE_INVALIDATION_ENABLED: bool = True
+    CACHE_INVALIDATION_CHANNEL: str = "vehicles_service_cache"
+    CACHE_INVALIDATION_POLL_SECONDS: float = 5.0
+    CACHE_INVALIDATION_RETRY_SECONDS: float = 5.0
+
+    # Por encima de este número de filas estimadas se devuelve el total estimado
+    ESTIMATED_COUNT_THRESHOLD: int = 10000
     
+    # Filas por lote (una transacción e INSERT multi-fila por lote) en la importación masiva
+    IMPORT_BATCH_SIZE: int = 500
+    # Facetas: cubetas del histograma de precios y caché por conjunto de filtros (indexada por versión)
+    FACETS_PRICE_BUCKETS: int = 10
+    FACETS_CACHE_TTL: int = 300
+    FACETS_CACHE_MAX_ENTRIES: int = 512
+
+    # Filas por lote leídas del cursor de servidor en la exportación
+    EXPORT_BATCH_SIZE: int = 500
+
     ALLOWED_ORIGINS: list = [
         "http://localhost:3000",
         "http://localhost:8000",
         "https://roda.com"
     ]
 
+    @model_validator(mode="after")
+    def check_threadpool_tokens(self) -> "Settings":
+        # Más hilos que conexiones solo deja peticiones esperando en el checkout del pool
+        capacity = self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW
+        if self.THREADPOOL_TOKENS is None:
+            self.THREADPOOL_TOKENS = capacity
+        elif self.THREADPOOL_TOKENS > capacity:
+            raise ValueError(
+                f"THREADPOOL_TOKENS ({self.THREADPOOL_TOKENS}) supera la capacidad del pool "
+                f"DB_POOL_SIZE + DB_MAX_OVERFLOW ({capacity})"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_upload_chunk_size(self) -> "Settings":
+        if self.UPLOAD_CHUNK_SIZE <= 0 or self.UPLOAD_CHUNK_SIZE % (256 * 1024):
+            raise ValueError(f"UPLOAD_CHUNK_SIZE ({self.UPLOAD_CHUNK_SIZE}) debe ser múltiplo de 256 KB")
+        return self
+
+    @model_validator(mode="after")
+    def check_compression_levels(self) -> "Settings":
+        if not 1 <= self.COMPRESSION_GZIP_LEVEL <= 9:
+            raise ValueError(f"COMPRESSION_GZIP_LEVEL ({self.COMPRESSION_GZIP_LEVEL}) debe estar entre 1 y 9")
+        if not 0 <= self.COMPRESSION_BROTLI_QUALITY <= 11:
+            raise ValueError(f"COMPRESSION_BROTLI_QUALITY ({self.COMPRESSION_BROTLI_QUALITY}) debe estar entre 0 y 11")
+        return self
+
+    @model_validator(mode="after")
+    def check_jwt_public_key(self) -> "Settings":
+        if self.ALGORITHM.upper().startswith(("RS", "PS", "ES")) and not self.JWT_PUBLIC_KEY:
+            raise ValueError(f"ALGORITHM {self.ALGORITHM} requiere JWT_PUBLIC_KEY")
+        return self
+
     class Config:
         env_file = ".env"
         case_sensitive = True
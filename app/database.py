@@ -1,17 +1,127 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, TypeVar, Union
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.config.settings import settings
+from app.utils.db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, ReplicaRouter
+
+
+def pool_options(url: str, poolclass) -> dict:
+    # SQLite en memoria usa su propio pool de una sola conexión
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
 
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
+    **pool_options(settings.DATABASE_URL, InstrumentedQueuePool),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engines = [
+    create_engine(url, pool_pre_ping=True, **pool_options(url, InstrumentedQueuePool))
+    for url in settings.DATABASE_REPLICA_URLS
+]
+replica_router = ReplicaRouter(len(settings.DATABASE_REPLICA_URLS), settings.REPLICA_RETRY_SECONDS)
+
+
+class ReadSession(Session):
+    """Sesión de los GET: réplica sana en round-robin o, si ninguna responde, el primario.
+
+    La conexión se pide con la primera consulta, ya en el hilo (o greenlet) que la
+    ejecuta: reservarla en la dependencia ocupaba la réplica mientras el request esperaba
+    turno en el threadpool. Un pool agotado cuenta como réplica caída.
+    """
+
+    def __init__(self, *args, replicas: list, router: ReplicaRouter = replica_router, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.router = router
+        self._read_bind = None
+
+    def get_bind(self, *args, **kwargs):
+        if self._read_bind is None:
+            self._read_bind = self._checkout()
+        return self._read_bind
+
+    def _checkout(self):
+        for index in self.router.candidates():
+            try:
+                return self.replicas[index].connect()
+            except (DBAPIError, PoolTimeoutError):
+                self.router.mark_down(index)
+        return self.bind
+
+    def close(self) -> None:
+        super().close()
+        read_bind, self._read_bind = self._read_bind, None
+        if read_bind is not None and read_bind is not self.bind:
+            read_bind.close()
+
+
+ReadSessionLocal = sessionmaker(
+    class_=ReadSession, autocommit=False, autoflush=False, bind=engine, replicas=replica_engines
+)
+
 Base = declarative_base()
 
+DBSession = Union[Session, AsyncSession]
+T = TypeVar("T")
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engines = []
+AsyncReadSessionLocal = None
+if settings.DATABASE_ASYNC:
+    _async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(
+        _async_url,
+        pool_pre_ping=True,
+        **pool_options(_async_url, InstrumentedAsyncQueuePool),
+    )
+    # expire_on_commit=False: los objetos devueltos se serializan fuera de la sesión
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    for _replica_url in map(async_database_url, settings.DATABASE_REPLICA_URLS):
+        _replica = create_async_engine(
+            _replica_url,
+            pool_pre_ping=True,
+            **pool_options(_replica_url, InstrumentedAsyncQueuePool),
+        )
+        async_replica_engines.append(_replica)
+    # Misma elección perezosa de réplica; la sesión síncrona interna conecta desde su greenlet
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_engine, sync_session_class=ReadSession, autoflush=False, expire_on_commit=False,
+        replicas=[replica.sync_engine for replica in async_replica_engines]
+    )
+
 
 def get_db():
     
@@ -19,4 +129,53 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+# Dependencias de sesión según DATABASE_ASYNC. Las rutas de escritura (verify_admin)
+# usan get_session: todo el request, incluidas sus lecturas, va al primario.
+get_session = get_async_db if settings.DATABASE_ASYNC else get_db
+get_read_session = get_async_read_db if settings.DATABASE_ASYNC else get_read_db
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[DBSession]:
+    """Sesión de escritura fuera de un request (tareas en segundo plano)"""
+    if settings.DATABASE_ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+async def run_db(db: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Ejecuta código ORM síncrono (repositorios, servicios) sin bloquear el event loop.
+
+    Con AsyncSession corre sobre la conexión asíncrona vía run_sync; con Session
+    se delega al threadpool. `fn` recibe la sesión síncrona como primer argumento.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -1,9 +1,19 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 from app.config.settings import settings
 from app.routers import api_router
-from app.database import engine, Base
+from app.database import async_engine, async_replica_engines, engine, replica_engines, replica_router, Base
+from starlette.concurrency import run_in_threadpool
+from anyio import to_thread
+from app.utils.auth import token_cache
+from app.utils.compression import CompressionMiddleware
+from app.utils.db_pool import pool_status
+from app.utils.invalidation import invalidation_bus
+from app.utils.storage import LocalStorageBackend, storage_manager
+from app.services.brand_service import brand_cache
+from app.services.image_variant_service import image_variant_service
 
 
 app = FastAPI(
@@ -21,8 +31,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
 app.include_router(api_router)
 
+# Con el backend local el propio servicio sirve las imágenes
+if isinstance(storage_manager.backend, LocalStorageBackend) and settings.LOCAL_STORAGE_URL.startswith("/"):
+    app.mount(settings.LOCAL_STORAGE_URL, StaticFiles(directory=settings.LOCAL_STORAGE_PATH), name="media")
+
+
+@app.on_event("startup")
+async def configure_threadpool():
+    # Handlers síncronos y run_db comparten este limitador con el pool de conexiones
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_TOKENS
+
+
+@app.on_event("startup")
+async def start_invalidation_listener():
+    invalidation_bus.start(engine)
+
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    invalidation_bus.stop()
+    for replica in async_replica_engines:
+        await replica.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    for replica in replica_engines:
+        replica.dispose()
+    engine.dispose()
+    storage_manager.shutdown()
+    image_variant_service.shutdown()
+
 
 @app.get("/")
 async def root():
@@ -37,8 +84,14 @@ async def root():
 async def health_check():
     try:
         from sqlalchemy import text
-        with engine.connect() as connection:
-            connection.execute(text("SELECT 1"))
+        if async_engine is not None:
+            async with async_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        else:
+            def ping():
+                with engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+            await run_in_threadpool(ping)
         
         return {
             "status": "healthy",
@@ -57,6 +110,32 @@ async def health_check():
         )
 
 
+@app.get("/health/pool")
+async def pool_health():
+    limiter = to_thread.current_default_thread_limiter()
+    return {
+        "database": pool_status(engine.pool),
+        "async_database": pool_status(async_engine.pool) if async_engine is not None else None,
+        "replicas": [
+            dict(state, database=pool_status(replica.pool))
+            for state, replica in zip(replica_router.status(), async_replica_engines or replica_engines)
+        ],
+        "threadpool": {
+            "total_tokens": limiter.total_tokens,
+            "borrowed_tokens": limiter.borrowed_tokens,
+        },
+    }
+
+
+@app.get("/health/cache")
+async def cache_health():
+    return {
+        "brands": brand_cache.stats(),
+        "auth_tokens": token_cache.stats(),
+        "invalidation": invalidation_bus.stats(),
+    }
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     print(f"Error no manejado: {exc}")
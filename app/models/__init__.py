@@ -2,5 +2,6 @@ from .brand_model import Brand
 from .vehicle_model import Vehicle
 from .vehicle_image_model import VehicleImage
 from .vehicle_type_enum import VehicleType
+from .catalog_stat_model import CatalogStat
     
-__all__ = ["Brand", "Vehicle", "VehicleType, VehicleImage"]
\ No newline at end of file
+__all__ = ["Brand", "Vehicle", "VehicleType, VehicleImage", "CatalogStat"]
\ No newline at end of file
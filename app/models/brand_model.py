@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -7,6 +7,15 @@ from app.database import Base
 class Brand(Base):
     
     __tablename__ = "brands"
+    __table_args__ = (
+        # Búsqueda sin distinguir mayúsculas de CRUDBrand.get_by_name
+        Index("ix_brands_name_lower", text("lower(name)")),
+        # Búsqueda por subcadena (ILIKE '%término%') con pg_trgm
+        Index(
+            "ix_brands_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, nullable=False, index=True)
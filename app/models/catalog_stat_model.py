@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, UniqueConstraint, func
+from app.database import Base
+
+
+class CatalogStat(Base):
+    """Totales del catálogo por ámbito: todo el catálogo, un tipo o una marca"""
+    __tablename__ = "catalog_stats"
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_catalog_stats_scope_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # "vehicles" (key vacía), "tipo" (key = VehicleType) o "marca" (key = id de la marca)
+    scope = Column(String(20), nullable=False)
+    key = Column(String(50), nullable=False, default="", server_default="")
+    vehicles = Column(Integer, nullable=False, default=0, server_default="0")
+    # La media se deriva de la suma; mínimo y máximo son nulos sin vehículos
+    precio_sum = Column(Float, nullable=False, default=0, server_default="0")
+    precio_min = Column(Float, nullable=True)
+    precio_max = Column(Float, nullable=True)
+    # Sube con cada escritura del ámbito; la de "vehicles" es la versión de todo el catálogo
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<CatalogStat(scope='{self.scope}', key='{self.key}', vehicles={self.vehicles})>"
@@ -6,8 +6,15 @@ class VehicleImage(Base):
     __tablename__ = "vehicle_images"
 
     id = Column(Integer, primary_key=True, index=True)
-    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False, index=True)
     url = Column(String, nullable=False)
+    # Dimensiones detectadas en la cabecera al subir la imagen
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    # Variantes WebP generadas en segundo plano; nulas hasta que terminan
+    thumb_url = Column(String, nullable=True)
+    medium_url = Column(String, nullable=True)
+    webp_url = Column(String, nullable=True)
 
     vehicle = relationship("Vehicle", back_populates="images")
 
@@ -1,13 +1,30 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, func, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index, func, Enum
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.models.vehicle_type_enum import VehicleType
 
 class Vehicle(Base):
     __tablename__ = "vehicles"
+    __table_args__ = (
+        # Índices para paginación por clave (keyset) sobre (clave de orden, id)
+        Index("ix_vehicles_nombre_id", "nombre", "id"),
+        Index("ix_vehicles_precio_id", "precio", "id"),
+        # Filtros de get_multi_with_filters / by-marca / by-tipo con orden por nombre
+        Index("ix_vehicles_marca_id_nombre_id", "marca_id", "nombre", "id"),
+        Index("ix_vehicles_tipo_nombre_id", "tipo", "nombre", "id"),
+        Index("ix_vehicles_marca_id_precio", "marca_id", "precio"),
+        # Búsqueda por subcadena (ILIKE '%término%') con pg_trgm
+        Index(
+            "ix_vehicles_nombre_trgm", "nombre",
+            postgresql_using="gin", postgresql_ops={"nombre": "gin_trgm_ops"},
+        ),
+    )
+    # created_at/updated_at vuelven en el RETURNING del INSERT/UPDATE, sin refresh posterior
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String(100), nullable=False, index=True)
+    # Sin índice propio: ix_vehicles_nombre_id (nombre, id) cubre las búsquedas por nombre
+    nombre = Column(String(100), nullable=False)
     referencia = Column(String(50), unique=True, nullable=False, index=True)
     precio = Column(Float, nullable=False)
     tipo = Column(Enum(VehicleType), nullable=False)
@@ -2,6 +2,8 @@ from .base import CRUDBase
 from .brand import brand_crud, CRUDBrand
 from .vehicle import vehicle_crud, CRUDVehicle
 from .vehicle_image import vehicle_image_crud, CRUDVehicleImage
+# Registra los eventos que mantienen catalog_stats en cada escritura
+from .catalog_stats import catalog_stats_crud, CRUDCatalogStats
 
 __all__ = [
     "CRUDBase",
@@ -10,5 +12,7 @@ __all__ = [
     "vehicle_crud", 
     "vehicle_image_crud",
     "CrUDVehicleImage",
-    "CRUDVehicle"
+    "CRUDVehicle",
+    "catalog_stats_crud",
+    "CRUDCatalogStats"
 ]
\ No newline at end of file
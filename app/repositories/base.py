@@ -2,40 +2,104 @@
 Repositorio base con operaciones CRUD genéricas
 """
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import (
+    Session, defaultload, joinedload, lazyload, raiseload, selectinload, subqueryload
+)
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import DeclarativeMeta
+from app.utils.invalidation import invalidation_bus
 
 ModelType = TypeVar("ModelType", bound=DeclarativeMeta)
 CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
 
+# Estrategias de carga de relaciones soportadas: {"ruta.relacion": "estrategia"}
+LOAD_STRATEGIES = {
+    "joined": joinedload,
+    "selectin": selectinload,
+    "subquery": subqueryload,
+    "lazy": lazyload,
+    "raise": raiseload,
+}
+LoadSpec = Dict[str, str]
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+
+    default_load: Optional[LoadSpec] = None
     
     def __init__(self, model: Type[ModelType]):
   
         self.model = model
+
+    @staticmethod
+    def is_postgresql(db: Session) -> bool:
+        return db.get_bind().dialect.name == "postgresql"
+
+    def publish_change(self, db: Session, id: Optional[int] = None) -> None:
+        """Avisa a los demás workers del cambio; se entrega solo si la transacción confirma"""
+        invalidation_bus.publish(db, self.model.__tablename__, id)
+
+    def loader_options(self, load: Optional[LoadSpec] = None) -> list:
+        """Traduce una especificación de carga a opciones de SQLAlchemy.
+
+        Cada clave es una ruta de relaciones separada por puntos; la estrategia
+        se aplica solo al último segmento, los intermedios conservan su carga.
+        """
+        spec = self.default_load if load is None else load
+        options = []
+        for path, strategy in (spec or {}).items():
+            if strategy not in LOAD_STRATEGIES:
+                raise ValueError(f"Estrategia de carga '{strategy}' no es válida")
+
+            entity = self.model
+            option = None
+            *parents, leaf = path.split(".")
+            for name in parents:
+                attr = getattr(entity, name)
+                option = defaultload(attr) if option is None else option.defaultload(attr)
+                entity = attr.property.mapper.class_
+
+            attr = getattr(entity, leaf)
+            if option is None:
+                option = LOAD_STRATEGIES[strategy](attr)
+            else:
+                option = getattr(option, f"{strategy}load")(attr)
+            options.append(option)
+        return options
     
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
+    def get(self, db: Session, id: Any, *, load: Optional[LoadSpec] = None) -> Optional[ModelType]:
         
         try:
-            return db.query(self.model).filter(self.model.id == id).first()
+            return (
+                db.query(self.model)
+                .options(*self.loader_options(load))
+                .filter(self.model.id == id)
+                .first()
+            )
         except SQLAlchemyError:
             return None
     
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: Session, *, skip: int = 0, limit: int = 100, load: Optional[LoadSpec] = None
     ) -> List[ModelType]:
         try:
-            return db.query(self.model).offset(skip).limit(limit).all()
+            return (
+                db.query(self.model)
+                .options(*self.loader_options(load))
+                .offset(skip)
+                .limit(limit)
+                .all()
+            )
         except SQLAlchemyError:
             return []
-    
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         try:
             db_obj = self.model(**obj_in.model_dump())
             db.add(db_obj)
+            db.flush()
+            self.publish_change(db, db_obj.id)
             db.commit()
             db.refresh(db_obj)
             return db_obj
@@ -61,6 +125,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                     setattr(db_obj, field, update_data[field])
             
             db.add(db_obj)
+            self.publish_change(db, db_obj.id)
             db.commit()
             db.refresh(db_obj)
             return db_obj
@@ -73,6 +138,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             obj = db.query(self.model).get(id)
             if obj:
                 db.delete(obj)
+                self.publish_change(db, id)
                 db.commit()
             return obj
         except SQLAlchemyError:
@@ -1,9 +1,11 @@
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models import Brand
 from app.schemas.brand import BrandCreate, BrandUpdate
-from app.repositories.base import CRUDBase
+from app.repositories.base import CRUDBase, LoadSpec
+
+BRAND_WITH_VEHICLES_LOAD: LoadSpec = {"vehicles": "selectin", "vehicles.images": "selectin"}
 
 
 class CRUDBrand(CRUDBase[Brand, BrandCreate, BrandUpdate]):
@@ -25,18 +27,38 @@ class CRUDBrand(CRUDBase[Brand, BrandCreate, BrandUpdate]):
         
         return self.update(db, db_obj=db_obj, obj_in=obj_in)
     
+    def get_existing_ids(self, db: Session, *, ids: Iterable[int]) -> set:
+        ids = list(ids)
+        if not ids:
+            return set()
+        return set(db.scalars(db.query(Brand.id).filter(Brand.id.in_(ids)).statement))
+    
+    def get_with_vehicles(self, db: Session, *, id: int,
+                          load: Optional[LoadSpec] = None) -> Optional[Brand]:
+        return self.get(db, id=id, load=BRAND_WITH_VEHICLES_LOAD if load is None else load)
+    
+    def get_collection_version(self, db: Session, *, search_term: Optional[str] = None) -> tuple:
+        """(filas, máximo updated_at) de las marcas, filtradas por nombre si hay búsqueda"""
+        query = db.query(func.count(Brand.id), func.max(Brand.updated_at))
+        if search_term:
+            query = query.filter(Brand.name.ilike(f"%{search_term}%"))
+        return tuple(query.one())
+    
+    def get_by_ids(self, db: Session, *, ids: Iterable[int]) -> List[Brand]:
+        return db.query(Brand).filter(Brand.id.in_(list(ids))).all()
+    
+    def get_all(self, db: Session) -> List[Brand]:
+        return db.query(Brand).order_by(Brand.name).all()
+    
     def get_multi_ordered(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Brand]:
         return db.query(Brand).order_by(Brand.name).offset(skip).limit(limit).all()
     
     def search_by_name(self, db: Session, *, search_term: str, skip: int = 0, limit: int = 100) -> List[Brand]:
-        return (
-            db.query(Brand)
-            .filter(Brand.name.ilike(f"%{search_term}%"))
-            .order_by(Brand.name)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        # ILIKE '%término%' usa el índice GIN de trigramas ix_brands_name_trgm
+        query = db.query(Brand).filter(Brand.name.ilike(f"%{search_term}%"))
+        if self.is_postgresql(db):
+            query = query.order_by(func.similarity(Brand.name, search_term).desc())
+        return query.order_by(Brand.name).offset(skip).limit(limit).all()
 
 
 brand_crud = CRUDBrand(Brand)
\ No newline at end of file
@@ -0,0 +1,318 @@
+"""
+Estadísticas del catálogo mantenidas de forma incremental.
+
+Cada escritura de vehículos o marcas actualiza las filas de catalog_stats en la misma
+transacción (eventos del mapper y la importación masiva), así que leer los totales es
+leer unas pocas filas por clave en lugar de recorrer la tabla de vehículos.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, delete, func, insert, inspect, literal, or_, select, text, true, update, case
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, object_session
+from app.models import Brand, CatalogStat, Vehicle, VehicleImage, VehicleType
+from app.repositories.base import CRUDBase
+
+SCOPE_VEHICLES = "vehicles"
+SCOPE_TIPO = "tipo"
+SCOPE_MARCA = "marca"
+# Clave de Session.info con los ámbitos sin fila del flush en curso
+PENDING_SCOPES = "catalog_stats_pending"
+
+# (tipo, marca_id, precio) de un vehículo
+VehicleValues = Tuple[str, int, float]
+StatsKey = Tuple[str, str]
+
+
+def _tipo_key(tipo) -> str:
+    return tipo.value if isinstance(tipo, VehicleType) else str(tipo)
+
+
+def _scopes(values: VehicleValues) -> List[StatsKey]:
+    tipo, marca_id, _ = values
+    return [(SCOPE_VEHICLES, ""), (SCOPE_TIPO, _tipo_key(tipo)), (SCOPE_MARCA, str(marca_id))]
+
+
+def _scope_filter(scope: str, key: str):
+    if scope == SCOPE_TIPO:
+        return Vehicle.tipo == VehicleType(key)
+    if scope == SCOPE_MARCA:
+        return Vehicle.marca_id == int(key)
+    return true()
+
+
+class StatsDelta:
+    """Cambios acumulados de un ámbito: altas y bajas con sus precios extremos"""
+
+    def __init__(self):
+        self.vehicles = 0
+        self.precio_sum = 0.0
+        self.added_min: Optional[float] = None
+        self.added_max: Optional[float] = None
+        self.removed_min: Optional[float] = None
+        self.removed_max: Optional[float] = None
+
+    def add(self, precio: float) -> None:
+        self.vehicles += 1
+        self.precio_sum += precio
+        self.added_min = precio if self.added_min is None else min(self.added_min, precio)
+        self.added_max = precio if self.added_max is None else max(self.added_max, precio)
+
+    def remove(self, precio: float) -> None:
+        self.vehicles -= 1
+        self.precio_sum -= precio
+        self.removed_min = precio if self.removed_min is None else min(self.removed_min, precio)
+        self.removed_max = precio if self.removed_max is None else max(self.removed_max, precio)
+
+    def merge(self, other: "StatsDelta") -> None:
+        self.vehicles += other.vehicles
+        self.precio_sum += other.precio_sum
+        for name, pick in (("added_min", min), ("added_max", max), ("removed_min", min), ("removed_max", max)):
+            values = [value for value in (getattr(self, name), getattr(other, name)) if value is not None]
+            setattr(self, name, pick(values) if values else None)
+
+
+class CRUDCatalogStats(CRUDBase[CatalogStat, None, None]):
+
+    def get_scope(self, db: Session, *, scope: str, key: str = "") -> Optional[CatalogStat]:
+        """Una fila por la clave única (scope, key)"""
+        return db.query(CatalogStat).filter(CatalogStat.scope == scope, CatalogStat.key == key).first()
+
+    def get_all(self, db: Session) -> List[CatalogStat]:
+        return db.query(CatalogStat).order_by(CatalogStat.scope, CatalogStat.key).all()
+
+    def _extreme_expr(self, column, *, is_min: bool, added: Optional[float], removed: Optional[float],
+                      scope: str, key: str):
+        # Un alta solo puede ampliar el extremo; una baja que lo alcanza obliga a recalcularlo
+        # con MIN/MAX sobre los vehículos del ámbito (ix_vehicles_precio_id, ix_vehicles_marca_id_precio)
+        extreme = func.min if is_min else func.max
+        expr = column
+        if added is not None:
+            beyond = column > added if is_min else column < added
+            expr = case((or_(column.is_(None), beyond), literal(added)), else_=column)
+        if removed is not None:
+            reached = column >= removed if is_min else column <= removed
+            recomputed = select(extreme(Vehicle.precio)).where(_scope_filter(scope, key)).scalar_subquery()
+            expr = case((reached, recomputed), else_=expr)
+        return expr
+
+    def apply(self, connection: Connection, *, added: Iterable[VehicleValues] = (),
+              removed: Iterable[VehicleValues] = (), pending: Optional[dict] = None) -> None:
+        """Aplica altas y bajas de vehículos: un UPDATE por ámbito afectado, sin commit.
+
+        Se ejecuta después del INSERT/UPDATE/DELETE de los vehículos y en su misma
+        conexión, de modo que los mínimos y máximos recalculados ya ven el cambio.
+        `pending` acumula los ámbitos sin fila durante un flush del ORM (ver create_pending).
+        """
+        deltas: Dict[StatsKey, StatsDelta] = {}
+        for values in added:
+            for scope_key in _scopes(values):
+                deltas.setdefault(scope_key, StatsDelta()).add(values[2])
+        for values in removed:
+            for scope_key in _scopes(values):
+                deltas.setdefault(scope_key, StatsDelta()).remove(values[2])
+
+        # Siempre en el mismo orden: dos transacciones con ámbitos en común no se bloquean en cruz
+        for (scope, key), delta in sorted(deltas.items()):
+            self.apply_delta(connection, scope=scope, key=key, delta=delta, pending=pending)
+
+    def apply_delta(self, connection: Connection, *, scope: str, key: str, delta: StatsDelta,
+                    pending: Optional[dict] = None) -> None:
+        if self._update_scope(connection, scope=scope, key=key, delta=delta):
+            return
+        if pending is not None:
+            # En un flush el ORM escribe el lote entero antes de los eventos: los agregados
+            # ya incluyen filas cuyos eventos aún no han llegado. La fila se crea al final
+            pending.setdefault((scope, key), StatsDelta()).merge(delta)
+            return
+        self._create_scope(connection, scope=scope, key=key, delta=delta)
+
+    def create_pending(self, connection: Connection, pending: dict) -> None:
+        """Crea las filas que faltaban en un flush ya terminado"""
+        for (scope, key), delta in sorted(pending.items()):
+            self._create_scope(connection, scope=scope, key=key, delta=delta)
+        pending.clear()
+
+    def _create_scope(self, connection: Connection, *, scope: str, key: str, delta: StatsDelta) -> None:
+        # Sin fila (tabla sin sembrar, tipo nuevo): se crea desde los vehículos, que ya
+        # incluyen el cambio. Si otra transacción la creó a la vez, su fila aún no lo ve
+        if not self._insert_scope(connection, scope=scope, key=key):
+            self._update_scope(connection, scope=scope, key=key, delta=delta)
+
+    def _update_scope(self, connection: Connection, *, scope: str, key: str, delta: StatsDelta) -> bool:
+        result = connection.execute(
+            update(CatalogStat)
+            .where(CatalogStat.scope == scope, CatalogStat.key == key)
+            .values(
+                revision=CatalogStat.revision + 1,
+                vehicles=CatalogStat.vehicles + delta.vehicles,
+                precio_sum=CatalogStat.precio_sum + delta.precio_sum,
+                precio_min=self._extreme_expr(
+                    CatalogStat.precio_min, is_min=True, added=delta.added_min,
+                    removed=delta.removed_min, scope=scope, key=key),
+                precio_max=self._extreme_expr(
+                    CatalogStat.precio_max, is_min=False, added=delta.added_max,
+                    removed=delta.removed_max, scope=scope, key=key),
+            )
+        )
+        return result.rowcount > 0
+
+    def _insert_scope(self, connection: Connection, *, scope: str, key: str) -> bool:
+        """Inserta la fila del ámbito calculada con agregados; False si ya existía"""
+        vehicles, precio_sum, precio_min, precio_max = connection.execute(
+            select(func.count(Vehicle.id), func.coalesce(func.sum(Vehicle.precio), 0),
+                   func.min(Vehicle.precio), func.max(Vehicle.precio))
+            .where(_scope_filter(scope, key))
+        ).one()
+        values = dict(scope=scope, key=key, vehicles=vehicles, precio_sum=precio_sum,
+                      precio_min=precio_min, precio_max=precio_max)
+        dialect = connection.dialect.name
+        if dialect == "postgresql":
+            statement = postgresql_insert(CatalogStat).values(**values).on_conflict_do_nothing()
+        elif dialect == "sqlite":
+            statement = sqlite_insert(CatalogStat).values(**values).on_conflict_do_nothing()
+        else:
+            statement = insert(CatalogStat).values(**values)
+        return connection.execute(statement).rowcount > 0
+
+    def get_revision(self, db: Session) -> Optional[tuple]:
+        """(revisión, updated_at) del catálogo: una fila por la clave única"""
+        return db.query(CatalogStat.revision, CatalogStat.updated_at).filter(
+            CatalogStat.scope == SCOPE_VEHICLES, CatalogStat.key == ""
+        ).first()
+
+    def bump_revision(self, connection: Connection, *, pending: Optional[dict] = None) -> None:
+        """Cambios que no mueven los totales (nombres, imágenes, marcas): solo nueva revisión"""
+        self.apply_delta(connection, scope=SCOPE_VEHICLES, key="", delta=StatsDelta(), pending=pending)
+
+    def add_brand(self, connection: Connection, *, brand_id: int) -> None:
+        connection.execute(insert(CatalogStat).values(scope=SCOPE_MARCA, key=str(brand_id)))
+
+    def remove_brand(self, connection: Connection, *, brand_id: int) -> None:
+        connection.execute(
+            delete(CatalogStat).where(CatalogStat.scope == SCOPE_MARCA, CatalogStat.key == str(brand_id))
+        )
+
+    def compute_rows(self, db: Session) -> List[dict]:
+        """Filas de catalog_stats calculadas con agregados sobre vehicles y brands"""
+        aggregates = (
+            func.count(Vehicle.id), func.coalesce(func.sum(Vehicle.precio), 0),
+            func.min(Vehicle.precio), func.max(Vehicle.precio),
+        )
+        by_tipo = {
+            _tipo_key(tipo): stats
+            for tipo, *stats in db.execute(select(Vehicle.tipo, *aggregates).group_by(Vehicle.tipo))
+        }
+        by_marca = db.execute(
+            select(Brand.id, *aggregates).outerjoin(Vehicle, Vehicle.marca_id == Brand.id).group_by(Brand.id)
+        ).all()
+
+        def row(scope: str, key: str, stats) -> dict:
+            vehicles, precio_sum, precio_min, precio_max = stats
+            return {"scope": scope, "key": key, "vehicles": vehicles, "precio_sum": precio_sum,
+                    "precio_min": precio_min, "precio_max": precio_max}
+
+        present = list(by_tipo.values())
+        total = (
+            sum(stats[0] for stats in present),
+            sum(stats[1] for stats in present),
+            min((stats[2] for stats in present), default=None),
+            max((stats[3] for stats in present), default=None),
+        )
+        rows = [row(SCOPE_VEHICLES, "", total)]
+        rows += [row(SCOPE_TIPO, tipo.value, by_tipo.get(tipo.value, (0, 0, None, None))) for tipo in VehicleType]
+        rows += [row(SCOPE_MARCA, str(marca_id), stats) for marca_id, *stats in by_marca]
+        return rows
+
+    def rebuild(self, db: Session) -> None:
+        """Recalcula todas las filas desde vehicles y brands (sin commit).
+
+        Mantenimiento: siembra la tabla en bases creadas sin migraciones y corrige
+        cualquier deriva. En PostgreSQL bloquea catalog_stats hasta el commit para que
+        las escrituras concurrentes se apliquen sobre las filas nuevas.
+        """
+        if self.is_postgresql(db):
+            db.execute(text("LOCK TABLE catalog_stats IN EXCLUSIVE MODE"))
+        current = self.get_revision(db)
+        rows = [{**row, "revision": 0} for row in self.compute_rows(db)]
+        # La revisión sigue subiendo: los ETag emitidos antes del recálculo dejan de valer
+        rows[0]["revision"] = (current.revision + 1) if current else 1
+        db.execute(delete(CatalogStat))
+        db.execute(insert(CatalogStat), rows)
+
+
+catalog_stats_crud = CRUDCatalogStats(CatalogStat)
+
+
+def _vehicle_values(target: Vehicle) -> VehicleValues:
+    return target.tipo, target.marca_id, target.precio
+
+
+def _pending(target) -> dict:
+    # Ámbitos sin fila del flush en curso, en la sesión que lo ejecuta
+    return object_session(target).info.setdefault(PENDING_SCOPES, {})
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _create_pending_scopes(session, flush_context):
+    pending = session.info.pop(PENDING_SCOPES, None)
+    if pending:
+        catalog_stats_crud.create_pending(session.connection(), pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_scopes(session, previous_transaction):
+    session.info.pop(PENDING_SCOPES, None)
+
+
+@event.listens_for(Vehicle, "after_insert")
+def _vehicle_inserted(mapper, connection, target):
+    catalog_stats_crud.apply(connection, added=[_vehicle_values(target)], pending=_pending(target))
+
+
+@event.listens_for(Vehicle, "after_update")
+def _vehicle_updated(mapper, connection, target):
+    state = inspect(target)
+    old = []
+    changed = False
+    for name in ("tipo", "marca_id", "precio"):
+        history = state.attrs[name].history
+        changed = changed or history.has_changes()
+        old.append((history.deleted or history.unchanged or [getattr(target, name)])[0])
+    if changed:
+        catalog_stats_crud.apply(
+            connection, added=[_vehicle_values(target)], removed=[tuple(old)], pending=_pending(target)
+        )
+    else:
+        catalog_stats_crud.bump_revision(connection, pending=_pending(target))
+
+
+@event.listens_for(Vehicle, "after_delete")
+def _vehicle_deleted(mapper, connection, target):
+    catalog_stats_crud.apply(connection, removed=[_vehicle_values(target)], pending=_pending(target))
+
+
+@event.listens_for(VehicleImage, "after_insert")
+@event.listens_for(VehicleImage, "after_update")
+@event.listens_for(VehicleImage, "after_delete")
+def _image_changed(mapper, connection, target):
+    catalog_stats_crud.bump_revision(connection, pending=_pending(target))
+
+
+@event.listens_for(Brand, "after_insert")
+def _brand_inserted(mapper, connection, target):
+    catalog_stats_crud.add_brand(connection, brand_id=target.id)
+    catalog_stats_crud.bump_revision(connection, pending=_pending(target))
+
+
+@event.listens_for(Brand, "after_update")
+def _brand_updated(mapper, connection, target):
+    catalog_stats_crud.bump_revision(connection, pending=_pending(target))
+
+
+@event.listens_for(Brand, "after_delete")
+def _brand_deleted(mapper, connection, target):
+    # La cascada borra antes los vehículos de la marca, que ya descontaron sus totales
+    catalog_stats_crud.remove_brand(connection, brand_id=target.id)
+    catalog_stats_crud.bump_revision(connection, pending=_pending(target))
@@ -1,16 +1,75 @@
-from typing import List, Optional
+import json
+from typing import Dict, Iterable, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from app.models import Vehicle, VehicleType
+from sqlalchemy import func, and_, or_, tuple_, insert, select, union_all, case, cast, literal, null, true, Integer
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Query
+from app.models import Brand, Vehicle, VehicleImage, VehicleType
 from app.schemas.vehicle import VehicleCreate, VehicleUpdate, VehicleFilters
-from app.repositories.base import CRUDBase
+from app.schemas.vehicle_image import VehicleImageUpload
+from app.repositories.base import CRUDBase, LoadSpec
+from app.repositories.catalog_stats import catalog_stats_crud
+
+# Carga de relaciones por tipo de endpoint (ver CRUDBase.loader_options). La marca no se
+# carga: las respuestas la toman del catálogo en memoria (brand_service.brand_cache)
+VEHICLE_LIST_LOAD: LoadSpec = {"images": "selectin"}
+VEHICLE_DETAIL_LOAD: LoadSpec = {"images": "joined"}
 
 
 class CRUDVehicle(CRUDBase[Vehicle, VehicleCreate, VehicleUpdate]):
+
+    default_load = VEHICLE_LIST_LOAD
+
+    def _paginate(self, query: Query, *, sort_column, skip: int, limit: int,
+                  after: Optional[tuple] = None, rank=None) -> List[Vehicle]:
+        # Orden total (clave, id): con `after` se busca por índice en lugar de usar OFFSET
+        if after is not None:
+            query = query.filter(tuple_(sort_column, Vehicle.id) > tuple_(*after))
+            query = query.order_by(sort_column, Vehicle.id)
+        else:
+            if rank is not None:
+                query = query.order_by(rank.desc())
+            query = query.order_by(sort_column, Vehicle.id).offset(skip)
+        return query.limit(limit).all()
+
+    def _search_rank(self, db: Session, filters: Optional[VehicleFilters]):
+        # Relevancia por trigramas (pg_trgm); en otros motores se ordena solo por nombre
+        if filters and filters.search and self.is_postgresql(db):
+            return func.similarity(Vehicle.nombre, filters.search)
+        return None
     
     def get_by_referencia(self, db: Session, *, referencia: str) -> Optional[Vehicle]:
         return db.query(Vehicle).filter(Vehicle.referencia == referencia).first()
     
+    def get_existing_referencias(self, db: Session, *, referencias: Iterable[str]) -> set:
+        referencias = list(referencias)
+        if not referencias:
+            return set()
+        return set(db.scalars(db.query(Vehicle.referencia).filter(Vehicle.referencia.in_(referencias)).statement))
+    
+    def create_many(self, db: Session, *, objs_in: List[VehicleCreate], commit: bool = True) -> Dict[str, int]:
+        """Inserta varios vehículos en un INSERT multi-fila; devuelve referencia -> id"""
+        if not objs_in:
+            return {}
+        rows = [obj_in.model_dump(exclude={"images"}) for obj_in in objs_in]
+        try:
+            result = db.execute(
+                insert(Vehicle).returning(Vehicle.id, Vehicle.referencia, sort_by_parameter_order=True),
+                rows
+            )
+            created = {referencia: id for id, referencia in result}
+            # El INSERT masivo no pasa por los eventos del mapper: los totales se suman aquí
+            catalog_stats_crud.apply(
+                db.connection(), added=[(row["tipo"], row["marca_id"], row["precio"]) for row in rows]
+            )
+            self.publish_change(db)
+            if commit:
+                db.commit()
+            return created
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+    
     def create_with_referencia_check(self, db: Session, *, obj_in: VehicleCreate) -> Vehicle:
         existing = self.get_by_referencia(db, referencia=obj_in.referencia)
         if existing:
@@ -23,63 +82,192 @@ class CRUDVehicle(CRUDBase[Vehicle, VehicleCreate, VehicleUpdate]):
         
         return self.create(db, obj_in=obj_in)
     
-    def get_multi_with_filters(
-        self, 
-        db: Session, 
-        *, 
-        filters: Optional[VehicleFilters] = None,
-        skip: int = 0, 
-        limit: int = 100
-    ) -> tuple[List[Vehicle], int]:
-        query = db.query(Vehicle)
-        total_query = db.query(func.count(Vehicle.id))
-        
+    def _apply_filters(self, query: Query, filters: Optional[VehicleFilters]) -> Query:
         if filters:
             if filters.marca_id:
                 query = query.filter(Vehicle.marca_id == filters.marca_id)
-                total_query = total_query.filter(Vehicle.marca_id == filters.marca_id)
             
             if filters.tipo:
                 query = query.filter(Vehicle.tipo == filters.tipo)
-                total_query = total_query.filter(Vehicle.tipo == filters.tipo)
             
             if filters.precio_min is not None:
                 query = query.filter(Vehicle.precio >= filters.precio_min)
-                total_query = total_query.filter(Vehicle.precio >= filters.precio_min)
             
             if filters.precio_max is not None:
                 query = query.filter(Vehicle.precio <= filters.precio_max)
-                total_query = total_query.filter(Vehicle.precio <= filters.precio_max)
+            
+            if filters.search:
+                # ILIKE '%término%' usa el índice GIN de trigramas ix_vehicles_nombre_trgm
+                query = query.filter(Vehicle.nombre.ilike(f"%{filters.search}%"))
+        
+        return query
+    
+    def add_with_images(self, db: Session, *, obj_in: VehicleCreate,
+                        images: List[VehicleImageUpload]) -> Vehicle:
+        """Agrega el vehículo y sus imágenes a la sesión (flush, sin commit)"""
+        existing = self.get_by_referencia(db, referencia=obj_in.referencia)
+        if existing:
+            raise ValueError(f"Ya existe un vehículo con la referencia '{obj_in.referencia}'")
+        
+        try:
+            VehicleType(obj_in.tipo)
+        except ValueError:
+            raise ValueError(f"Tipo de vehículo '{obj_in.tipo}' no es válido")
+        
+        db_obj = Vehicle(**obj_in.model_dump(exclude={"images"}))
+        # En PostgreSQL el flush agrupa las imágenes en un único INSERT multi-fila (insertmanyvalues)
+        db_obj.images = [VehicleImage(**image.model_dump()) for image in images]
+        db.add(db_obj)
+        db.flush()
+        self.publish_change(db, db_obj.id)
+        return db_obj
+    
+    def get_multi_with_filters(
+        self, 
+        db: Session, 
+        *, 
+        filters: Optional[VehicleFilters] = None,
+        skip: int = 0, 
+        limit: int = 100,
+        after: Optional[tuple] = None,
+        with_total: bool = True,
+        load: Optional[LoadSpec] = None
+    ) -> tuple[List[Vehicle], Optional[int]]:
+        query = self._apply_filters(db.query(Vehicle), filters).options(*self.loader_options(load))
+        rank = self._search_rank(db, filters)
+        
+        if not with_total:
+            vehicles = self._paginate(
+                query, sort_column=Vehicle.nombre, skip=skip, limit=limit, after=after, rank=rank
+            )
+            return vehicles, None
         
-        total = total_query.scalar()
-        vehicles = query.order_by(Vehicle.nombre).offset(skip).limit(limit).all()
+        if after is None:
+            # El total viaja en cada fila (COUNT(*) OVER ()) y llega con la página en un solo viaje
+            rows = self._paginate(
+                query.add_columns(func.count(Vehicle.id).over().label("total")),
+                sort_column=Vehicle.nombre, skip=skip, limit=limit, rank=rank
+            )
+            if rows:
+                return [vehicle for vehicle, _ in rows], rows[0].total
+            vehicles = []
+        else:
+            # Con cursor el WHERE excluye las filas anteriores; el total requiere su propio conteo
+            vehicles = self._paginate(query, sort_column=Vehicle.nombre, skip=skip, limit=limit, after=after)
         
-        return vehicles, total
+        return vehicles, self.count_with_filters(db, filters=filters)
     
-    def get_by_marca(self, db: Session, *, marca_id: int, skip: int = 0, limit: int = 100) -> List[Vehicle]:
+    def export_statement(self, *, filters: Optional[VehicleFilters] = None, batch_size: int = 500):
+        """SELECT filtrado por id con sus imágenes; yield_per lo lee en lotes desde un cursor de servidor.
+
+        Las imágenes de cada lote llegan con una consulta IN (selectin): joined no admite yield_per.
+        """
+        query = self._apply_filters(Query(Vehicle), filters).options(*self.loader_options(VEHICLE_LIST_LOAD))
+        return query.order_by(Vehicle.id).statement.execution_options(yield_per=batch_size)
+    
+    def get_facets(self, db: Session, *, filters: Optional[VehicleFilters] = None,
+                   price_buckets: int = 10) -> List[tuple]:
+        """Conteos por tipo, por marca e histograma de precios del conjunto filtrado, en una consulta.
+
+        Filas (faceta, tipo, marca_id, cubeta, precio mínimo, precio máximo, conteo). El CTE
+        filtrado se referencia varias veces, así que PostgreSQL lo materializa y lo recorre una vez.
+        """
+        filtered = self._apply_filters(
+            Query([Vehicle.tipo, Vehicle.marca_id, Vehicle.precio]), filters
+        ).cte("filtered")
+        bounds = select(
+            func.min(filtered.c.precio).label("lo"), func.max(filtered.c.precio).label("hi")
+        ).cte("bounds")
+        
+        # Cubetas de igual ancho entre el mínimo y el máximo; el máximo cae en la última
+        scaled = (filtered.c.precio - bounds.c.lo) * price_buckets / (bounds.c.hi - bounds.c.lo)
+        index = cast(func.floor(scaled) if self.is_postgresql(db) else scaled, Integer)
+        bucket = case(
+            (bounds.c.hi == bounds.c.lo, 0),
+            (index >= price_buckets, price_buckets - 1),
+            else_=index
+        )
+        
+        count = func.count().label("count")
+        by_tipo = select(
+            literal("tipo").label("facet"), filtered.c.tipo, null().label("marca_id"),
+            null().label("bucket"), null().label("lo"), null().label("hi"), count
+        ).group_by(filtered.c.tipo)
+        by_marca = select(
+            literal("marca"), null(), filtered.c.marca_id, null(), null(), null(), count
+        ).group_by(filtered.c.marca_id)
+        # La cubeta se calcula en una subconsulta y se agrupa por su columna, no por la expresión
+        priced = (
+            select(bucket.label("bucket"), bounds.c.lo, bounds.c.hi)
+            .select_from(filtered.join(bounds, true()))
+            .subquery("priced")
+        )
+        by_precio = select(
+            literal("precio"), null(), null(), priced.c.bucket, priced.c.lo, priced.c.hi, count
+        ).group_by(priced.c.bucket, priced.c.lo, priced.c.hi)
+        return db.execute(union_all(by_tipo, by_marca, by_precio)).all()
+    
+    def get_version(self, db: Session, *, id: int) -> Optional[tuple]:
+        """(updated_at del vehículo, updated_at de su marca) o None si no existe"""
         return (
+            db.query(Vehicle.updated_at, Brand.updated_at)
+            .join(Vehicle.brand)
+            .filter(Vehicle.id == id)
+            .first()
+        )
+    
+    def get_collection_version(self, db: Session, *, filters: Optional[VehicleFilters] = None) -> tuple:
+        """(filas, máximo updated_at de vehículos, de marcas) del conjunto filtrado.
+
+        El conteo hace que los borrados también cambien la versión.
+        """
+        query = (
+            db.query(func.count(Vehicle.id), func.max(Vehicle.updated_at), func.max(Brand.updated_at))
+            .select_from(Vehicle)
+            .join(Vehicle.brand)
+        )
+        return tuple(self._apply_filters(query, filters).one())
+    
+    def count_with_filters(self, db: Session, *, filters: Optional[VehicleFilters] = None) -> int:
+        return self._apply_filters(db.query(func.count(Vehicle.id)), filters).scalar()
+    
+    def estimate_count_with_filters(self, db: Session, *, filters: Optional[VehicleFilters] = None) -> Optional[int]:
+        """Filas estimadas por el planificador de PostgreSQL, sin recorrer la tabla"""
+        if not self.is_postgresql(db):
+            return None
+        
+        dialect = db.get_bind().dialect
+        compiled = self._apply_filters(db.query(Vehicle.id), filters).statement.compile(dialect=dialect)
+        params = compiled.params
+        if dialect.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+        plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    
+    def get_by_marca(self, db: Session, *, marca_id: int, skip: int = 0, limit: int = 100,
+                     after: Optional[tuple] = None, load: Optional[LoadSpec] = None) -> List[Vehicle]:
+        query = (
             db.query(Vehicle)
+            .options(*self.loader_options(load))
             .filter(Vehicle.marca_id == marca_id)
-            .order_by(Vehicle.nombre)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self._paginate(query, sort_column=Vehicle.nombre, skip=skip, limit=limit, after=after)
     
-    def get_by_tipo(self, db: Session, *, tipo: str, skip: int = 0, limit: int = 100) -> List[Vehicle]:
+    def get_by_tipo(self, db: Session, *, tipo: str, skip: int = 0, limit: int = 100,
+                    after: Optional[tuple] = None, load: Optional[LoadSpec] = None) -> List[Vehicle]:
         try:
             VehicleType(tipo)
         except ValueError:
             raise ValueError(f"Tipo de vehículo '{tipo}' no es válido")
         
-        return (
+        query = (
             db.query(Vehicle)
+            .options(*self.loader_options(load))
             .filter(Vehicle.tipo == tipo)
-            .order_by(Vehicle.nombre)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self._paginate(query, sort_column=Vehicle.nombre, skip=skip, limit=limit, after=after)
     
     def get_by_precio_range(
         self, 
@@ -88,25 +276,23 @@ class CRUDVehicle(CRUDBase[Vehicle, VehicleCreate, VehicleUpdate]):
         precio_min: float, 
         precio_max: float, 
         skip: int = 0, 
-        limit: int = 100
+        limit: int = 100,
+        after: Optional[tuple] = None,
+        load: Optional[LoadSpec] = None
     ) -> List[Vehicle]:
-        return (
+        query = (
             db.query(Vehicle)
+            .options(*self.loader_options(load))
             .filter(and_(Vehicle.precio >= precio_min, Vehicle.precio <= precio_max))
-            .order_by(Vehicle.precio)
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self._paginate(query, sort_column=Vehicle.precio, skip=skip, limit=limit, after=after)
     
-    def search_by_nombre(self, db: Session, *, search_term: str, skip: int = 0, limit: int = 100) -> List[Vehicle]:
-        return (
-            db.query(Vehicle)
-            .filter(Vehicle.nombre.ilike(f"%{search_term}%"))
-            .order_by(Vehicle.nombre)
-            .offset(skip)
-            .limit(limit)
-            .all()
+    def search_by_nombre(self, db: Session, *, search_term: str, skip: int = 0, limit: int = 100,
+                         load: Optional[LoadSpec] = None) -> List[Vehicle]:
+        filters = VehicleFilters(search=search_term)
+        query = self._apply_filters(db.query(Vehicle), filters).options(*self.loader_options(load))
+        return self._paginate(
+            query, sort_column=Vehicle.nombre, skip=skip, limit=limit, rank=self._search_rank(db, filters)
         )
 
 
@@ -1,10 +1,13 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import bindparam, func, and_, or_, insert, select, update
+from app.models.vehicle_model import Vehicle
+from sqlalchemy.exc import SQLAlchemyError
 from app.models.vehicle_image_model import VehicleImage as VehicleImageModel
 from app.schemas.vehicle import VehicleCreate
 from app.schemas.vehicle_image import VehicleImageCreate, VehicleImageUpdate
 from app.repositories.base import CRUDBase
+from app.repositories.catalog_stats import catalog_stats_crud
 
 
 class CRUDVehicleImage(CRUDBase[VehicleImageModel, VehicleImageCreate, VehicleImageUpdate]):
@@ -17,6 +20,46 @@ class CRUDVehicleImage(CRUDBase[VehicleImageModel, VehicleImageCreate, VehicleIm
         return self.create(db, obj_in=obj_in)
 
 
+    def create_many(self, db: Session, *, images: List[Tuple[int, str]], commit: bool = True) -> None:
+        """Inserta pares (vehicle_id, url) en un solo INSERT multi-fila"""
+        if not images:
+            return
+        try:
+            db.execute(
+                insert(VehicleImageModel),
+                [{"vehicle_id": vehicle_id, "url": url} for vehicle_id, url in images]
+            )
+            catalog_stats_crud.bump_revision(db.connection())
+            self.publish_change(db)
+            if commit:
+                db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+
+    def set_variants(self, db: Session, *, variants: Dict[int, Dict[str, str]]) -> None:
+        """Guarda las URLs de variantes por id de imagen ({id: {"thumb_url": ...}})"""
+        if not variants:
+            return
+        try:
+            # UPDATE de Core por id: si el vehículo se borró mientras se generaban las
+            # variantes, sus filas ya no existen y se omiten (el UPDATE por lotes del ORM
+            # lanzaría StaleDataError y desharía también las demás)
+            images = VehicleImageModel.__table__
+            db.execute(
+                update(images).where(images.c.id == bindparam("b_id")),
+                [{"b_id": image_id, **urls} for image_id, urls in variants.items()]
+            )
+            # Las variantes cambian la representación del vehículo: se renueva su updated_at (ETag)
+            vehicle_ids = select(VehicleImageModel.vehicle_id).where(VehicleImageModel.id.in_(list(variants)))
+            db.execute(update(Vehicle).where(Vehicle.id.in_(vehicle_ids)).values(updated_at=func.now()))
+            catalog_stats_crud.bump_revision(db.connection())
+            self.publish_change(db)
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+
     def get_by_vehicle_id(self, db: Session, *, vehicle_id: int) -> List[VehicleImageModel]:
         return db.query(VehicleImageModel).filter(VehicleImageModel.vehicle_id == vehicle_id).all()
 
@@ -1,47 +1,29 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, UploadFile, status
 from fastapi.params import File
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from app.config import settings
-from app.database import get_db
+from app.database import DBSession, get_read_session, get_session, run_db
 from app.schemas.brand import Brand, BrandCreate, BrandUpdate, BrandResponse, BrandWithVehicles
 from app.services.brand_service import brand_service
-from jose import jwt
+from pydantic import TypeAdapter
 
 from app.services.files import FileService
+from app.utils.auth import verify_admin
+from app.utils.http_cache import conditional_response, response_cache
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/brands", tags=["brands"])
-security = HTTPBearer()
+BRAND_LIST_ADAPTER = TypeAdapter(List[BrandResponse])
+BRAND_ADAPTER = TypeAdapter(BrandResponse)
+BRAND_WITH_VEHICLES_ADAPTER = TypeAdapter(BrandWithVehicles)
 
-JWT_SECRET = settings.SECRET_KEY
-JWT_ALGORITHM = settings.ALGORITHM
-
-
-def verify_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        role = payload.get("role").upper()
-        print("User role from token:", role)
-
-        if role != "ADMIN":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Acceso denegado, rol insuficiente"
-            )
-    except jwt.JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido o expirado"
-        )
-    return True
 
 @router.post("/", response_model=BrandResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(verify_admin)])
 async def create_brand(
     *,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),  
+    db: DBSession = Depends(get_session),  
     name: str = Form(...),
     country: str = Form(...)
 ) -> BrandResponse:
@@ -57,77 +39,96 @@ async def create_brand(
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
         if "brand_photo_url" in urls:
             brand_in.logo_path = urls["brand_photo_url"]
-        brand = brand_service.create_brand(db, brand_data=brand_in)
+        brand = await run_db(db, brand_service.create_brand, brand_data=brand_in)
+        response_cache.invalidate()
         return brand
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.put("/{brand_id}", response_model=BrandResponse, dependencies=[Depends(verify_admin)])
-def update_brand(
+async def update_brand(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_session),
     brand_id: int,
     brand_in: BrandUpdate
 ) -> BrandResponse:
     try:
-        brand = brand_service.update_brand(db, brand_id=brand_id, brand_data=brand_in)
+        brand = await run_db(db, brand_service.update_brand, brand_id=brand_id, brand_data=brand_in)
         if not brand:
             raise HTTPException(status_code=404, detail="Marca no encontrada")
+        # Los vehículos embeben su marca: se invalidan también sus respuestas
+        response_cache.invalidate()
         return brand
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.delete("/{brand_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(verify_admin)])
-def delete_brand(
+async def delete_brand(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_session),
     brand_id: int
 ) -> None:
-    success = brand_service.delete_brand(db, brand_id=brand_id)
+    success = await run_db(db, brand_service.delete_brand, brand_id=brand_id)
     if not success:
         raise HTTPException(status_code=404, detail="Marca no encontrada")
+    response_cache.invalidate()
 
 
 @router.get("/{brand_id}", response_model=BrandResponse)
-def get_brand(
+async def get_brand(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_read_session),
     brand_id: int
 ) -> BrandResponse:
-    brand = brand_service.get_brand(db, brand_id=brand_id)
+    brand = await run_db(db, brand_service.get_brand, brand_id=brand_id)
     if not brand:
         raise HTTPException(status_code=404, detail="Marca no encontrada")
-    return brand
+    return json_response(BRAND_ADAPTER, brand)
 
 
 @router.get("/", response_model=List[BrandResponse])
-def get_brands(
-    db: Session = Depends(get_db),
+async def get_brands(
+    request: Request,
+    db: DBSession = Depends(get_read_session),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: str = Query(None)
 ) -> List[BrandResponse]:
-    if search:
-        return brand_service.search_brands(db, search_term=search, skip=skip, limit=limit)
-    else:
-        return brand_service.get_brands(db, skip=skip, limit=limit)
+    async def version():
+        return await run_db(db, brand_service.get_brands_version, search_term=search)
+    
+    def _render(session: Session) -> bytes:
+        if search:
+            brands = brand_service.search_brands(session, search_term=search, skip=skip, limit=limit)
+        else:
+            brands = brand_service.get_brands(session, skip=skip, limit=limit)
+        return BRAND_LIST_ADAPTER.dump_json([BrandResponse.model_validate(brand) for brand in brands])
+    
+    async def render() -> bytes:
+        return await run_db(db, _render)
+    
+    return await conditional_response(request, version=version, render=render, collection=True)
 
 
 @router.get("/{brand_id}/with-vehicles", response_model=BrandWithVehicles)
-def get_brand_with_vehicles(
+async def get_brand_with_vehicles(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_read_session),
     brand_id: int
 ) -> BrandWithVehicles:
-    brand = brand_service.get_brand_with_vehicles(db, brand_id=brand_id)
+    def _get(session: Session) -> Optional[BrandWithVehicles]:
+        brand = brand_service.get_brand_with_vehicles(session, brand_id=brand_id)
+        return BrandWithVehicles.model_validate(brand) if brand else None
+    
+    brand = await run_db(db, _get)
     if not brand:
         raise HTTPException(status_code=404, detail="Marca no encontrada")
-    return brand
+    return json_response(BRAND_WITH_VEHICLES_ADAPTER, brand)
 
 
 @router.get("/stats/count", response_model=dict)
-def count_brands(db: Session = Depends(get_db)) -> dict:
-    count = brand_service.count_brands(db)
+async def count_brands(db: DBSession = Depends(get_read_session)) -> dict:
+    count = await run_db(db, brand_service.count_brands)
     return {"total_brands": count}
@@ -1,42 +1,58 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.config import settings
-from app.database import get_db
-from jose import jwt
+from pydantic import TypeAdapter
+from app.database import DBSession, get_read_session, get_session, run_db
 from app.schemas.vehicle import (
     Vehicle, VehicleCreate, VehicleUpdate, VehicleResponse, 
-    VehicleFilters, VehicleListResponse
+    VehicleFilters, VehicleListResponse, VehicleImportResult, VehicleFacets, CatalogStats
 )
+from app.repositories.vehicle import VEHICLE_DETAIL_LOAD, VEHICLE_LIST_LOAD
 from app.services.files import FileService
+from app.services.image_variant_service import image_variant_service
 from app.services.vehicle_service import vehicle_service
-from app.services.vehicle_images_service import VehicleImageService
+from app.services.vehicle_export_service import EXPORT_FORMATS, EXPORT_MEDIA_TYPES, vehicle_export_service
+from app.services.vehicle_import_service import vehicle_import_service
+from app.utils.auth import verify_admin
+from app.utils.http_cache import ResponseCache, conditional_response, response_cache, versioned_response
+from app.utils.pagination import next_cursor
+from app.utils.responses import json_response
 
 router = APIRouter(prefix="/vehicles", tags=["vehicles"])
-security = HTTPBearer()
-JWT_SECRET = settings.SECRET_KEY
-JWT_ALGORITHM = settings.ALGORITHM
+VEHICLE_LIST_ADAPTER = TypeAdapter(List[VehicleResponse])
+facets_cache = ResponseCache(
+    enabled=True, ttl=settings.FACETS_CACHE_TTL, max_entries=settings.FACETS_CACHE_MAX_ENTRIES
+)
 
 
-def verify_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        role = payload.get("role").upper()
-        print("User role from token:", role)
-
-        if role != "ADMIN":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Acceso denegado, rol insuficiente"
-            )
-    except jwt.JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido o expirado"
-        )
-    return True
+def _cursor_headers(vehicles: list, *, limit: int, sort_key: str) -> dict:
+    # Los listados by-* conservan su forma (lista); el cursor viaja en una cabecera
+    cursor = next_cursor(vehicles, limit=limit, sort_key=sort_key)
+    return {"X-Next-Cursor": cursor} if cursor else {}
+
+
+def get_vehicle_filters(
+    marca_id: Optional[int] = Query(None, gt=0, description="Filtrar por marca"),
+    tipo: Optional[str] = Query(None, description="Filtrar por tipo"),
+    precio_min: Optional[float] = Query(None, gt=0, description="Precio mínimo"),
+    precio_max: Optional[float] = Query(None, gt=0, description="Precio máximo"),
+    search: Optional[str] = Query(None, description="Buscar por nombre")
+) -> Optional[VehicleFilters]:
+    """Filtros comunes del listado, las facetas y la exportación"""
+    # Una búsqueda vacía (?search=) equivale a no buscar, también junto a otros filtros
+    search = (search or "").strip() or None
+    if not any([marca_id, tipo, precio_min, precio_max, search]):
+        return None
+    return VehicleFilters(
+        marca_id=marca_id,
+        tipo=tipo,
+        precio_min=precio_min,
+        precio_max=precio_max,
+        search=search
+    )
+
 
 @router.post("/", response_model=VehicleResponse, status_code=status.HTTP_201_CREATED,  dependencies=[Depends(verify_admin)])
 async def create_vehicle(
@@ -49,7 +65,8 @@ async def create_vehicle(
     precio: float = Form(...),
     tipo: str = Form(...),
     marca_id: int = Form(...),
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: DBSession = Depends(get_session),
 ) -> VehicleResponse:
     try:
         vehicle_in = VehicleCreate(
@@ -61,157 +78,267 @@ async def create_vehicle(
             images=[]
         )
         files = [file_one, file_two, file_three]
-        success, message, urls = await FileService.upload_vehicle_images(files)
+        success, message, images = await FileService.upload_vehicle_images(files)
         if not success:
             print("File upload failed here:", message)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
-        vehicle = vehicle_service.create_vehicle(db, vehicle_data=vehicle_in)
-        vehicle_in.images = urls
 
-        VehicleImageService.create_vehicle_images(db, vehicle_data=vehicle_in, id=vehicle.id)
+        vehicle = await run_db(db, vehicle_service.create_vehicle_with_images, vehicle_data=vehicle_in, images=images)
+        response_cache.invalidate()
+
+        # Miniaturas y WebP se generan después de responder; hasta entonces son nulas
+        paths = await image_variant_service.stage(files)
+        if paths:
+            background_tasks.add_task(
+                image_variant_service.generate, [image.id for image in vehicle.images], paths
+            )
         return vehicle
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
 
-@router.get("/{vehicle_id}", response_model=VehicleResponse)
-def get_vehicle(
+@router.post("/import", response_model=VehicleImportResult, dependencies=[Depends(verify_admin)])
+async def import_vehicles(
     *,
-    db: Session = Depends(get_db),
-    vehicle_id: int
-) -> VehicleResponse:
-    """Obtener un vehículo por ID"""
-    vehicle = vehicle_service.get_vehicle(db, vehicle_id=vehicle_id)
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Vehículo no encontrado")
-    return vehicle
+    request: Request,
+    db: DBSession = Depends(get_session),
+    format: Optional[str] = Query(None, description="csv o jsonl; por defecto según el Content-Type")
+) -> VehicleImportResult:
+    """Importación masiva de vehículos leyendo el cuerpo en streaming"""
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "jsonl")
+    try:
+        return await vehicle_import_service.import_stream(db, chunks=request.stream(), fmt=fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Los lotes ya confirmados quedan aunque la importación falle a mitad
+        response_cache.invalidate()
 
 
 @router.get("/", response_model=VehicleListResponse)
-def get_vehicles(
-    db: Session = Depends(get_db),
+async def get_vehicles(
+    request: Request,
+    db: DBSession = Depends(get_read_session),
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(100, ge=1, le=100, description="Número máximo de registros"),
-    marca_id: Optional[int] = Query(None, gt=0, description="Filtrar por marca"),
-    tipo: Optional[str] = Query(None, description="Filtrar por tipo"),
-    precio_min: Optional[float] = Query(None, gt=0, description="Precio mínimo"),
-    precio_max: Optional[float] = Query(None, gt=0, description="Precio máximo"),
-    search: Optional[str] = Query(None, description="Buscar por nombre")
+    filters: Optional[VehicleFilters] = Depends(get_vehicle_filters),
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior (paginación por clave)"),
+    include_total: bool = Query(True, description="Calcular el total de resultados"),
+    estimate_total: bool = Query(False, description="Usar el total estimado en conjuntos grandes")
 ) -> VehicleListResponse:
     """Obtener lista de vehículos con filtros y paginación"""
     
-    # Construir filtros
-    filters = None
-    if any([marca_id, tipo, precio_min, precio_max]):
-        filters = VehicleFilters(
-            marca_id=marca_id,
-            tipo=tipo,
-            precio_min=precio_min,
-            precio_max=precio_max
-        )
+    async def version():
+        return await run_db(db, vehicle_service.get_vehicles_version, filters=filters)
     
-    # Si hay término de búsqueda, usar búsqueda por nombre
-    if search:
-        vehicles = vehicle_service.search_vehicles(db, search_term=search, skip=skip, limit=limit)
-        
-        # Calcular total manualmente para búsqueda
-        total = len(vehicles)
-        page = (skip // limit) + 1 if limit > 0 else 1
-        pages = (total + limit - 1) // limit if limit > 0 else 1
-        
-        return VehicleListResponse(
-            vehicles=vehicles,
-            total=total,
-            page=page,
-            per_page=limit,
-            pages=pages
-        )
-    else:
-        return vehicle_service.get_vehicles_with_filters(
-            db, 
-            filters=filters, 
-            skip=skip, 
-            limit=limit
-        )
+    # La búsqueda por nombre se combina con los demás filtros y devuelve el total real
+    async def render() -> bytes:
+        try:
+            listing = await run_db(
+                db,
+                vehicle_service.get_vehicles_with_filters,
+                filters=filters, 
+                skip=skip, 
+                limit=limit,
+                cursor=cursor,
+                include_total=include_total,
+                estimate_total=estimate_total,
+                load=VEHICLE_LIST_LOAD
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return listing.model_dump_json().encode()
+    
+    return await conditional_response(request, version=version, render=render, collection=True)
 
 
 @router.get("/by-marca/{marca_id}", response_model=List[VehicleResponse])
-def get_vehicles_by_marca(
+async def get_vehicles_by_marca(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_read_session),
+    response: Response,
     marca_id: int,
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100)
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None)
 ) -> List[VehicleResponse]:
     """Obtener vehículos por marca específica"""
-    vehicles = vehicle_service.get_vehicles_by_marca(
-        db, 
-        marca_id=marca_id, 
-        skip=skip, 
-        limit=limit
+    try:
+        vehicles = await run_db(
+            db,
+            vehicle_service.get_vehicles_by_marca,
+            marca_id=marca_id, 
+            skip=skip, 
+            limit=limit,
+            cursor=cursor,
+            load=VEHICLE_LIST_LOAD
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(
+        VEHICLE_LIST_ADAPTER, vehicles, response=response,
+        headers=_cursor_headers(vehicles, limit=limit, sort_key="nombre")
     )
-    return vehicles
 
 
 @router.get("/by-tipo/{tipo}", response_model=List[VehicleResponse])
-def get_vehicles_by_tipo(
+async def get_vehicles_by_tipo(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_read_session),
+    response: Response,
     tipo: str,
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100)
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None)
 ) -> List[VehicleResponse]:
     """Obtener vehículos por tipo específico"""
     try:
-        vehicles = vehicle_service.get_vehicles_by_tipo(
-            db, 
+        vehicles = await run_db(
+            db,
+            vehicle_service.get_vehicles_by_tipo,
             tipo=tipo, 
             skip=skip, 
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            load=VEHICLE_LIST_LOAD
+        )
+        return json_response(
+            VEHICLE_LIST_ADAPTER, vehicles, response=response,
+            headers=_cursor_headers(vehicles, limit=limit, sort_key="nombre")
         )
-        return vehicles
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/by-precio-range", response_model=List[VehicleResponse])
-def get_vehicles_by_precio_range(
+async def get_vehicles_by_precio_range(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_read_session),
+    response: Response,
     precio_min: float = Query(..., gt=0),
     precio_max: float = Query(..., gt=0),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=100)
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None)
 ) -> List[VehicleResponse]:
     """Obtener vehículos por rango de precio"""
     if precio_min > precio_max:
         raise HTTPException(status_code=400, detail="El precio mínimo no puede ser mayor al máximo")
     
-    vehicles = vehicle_service.get_vehicles_by_precio_range(
-        db, 
-        precio_min=precio_min, 
-        precio_max=precio_max, 
-        skip=skip, 
-        limit=limit
+    try:
+        vehicles = await run_db(
+            db,
+            vehicle_service.get_vehicles_by_precio_range,
+            precio_min=precio_min, 
+            precio_max=precio_max, 
+            skip=skip, 
+            limit=limit,
+            cursor=cursor,
+            load=VEHICLE_LIST_LOAD
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(
+        VEHICLE_LIST_ADAPTER, vehicles, response=response,
+        headers=_cursor_headers(vehicles, limit=limit, sort_key="precio")
+    )
+
+
+@router.get("/facets", response_model=VehicleFacets)
+async def get_vehicle_facets(
+    request: Request,
+    db: DBSession = Depends(get_read_session),
+    filters: Optional[VehicleFilters] = Depends(get_vehicle_filters)
+) -> VehicleFacets:
+    """Conteos por tipo y marca e histograma de precios de los resultados filtrados"""
+    async def version():
+        return await run_db(db, vehicle_service.get_vehicles_version, filters=filters)
+    
+    async def render() -> bytes:
+        facets = await run_db(db, vehicle_service.get_facets, filters=filters)
+        return facets.model_dump_json().encode()
+    
+    # Mismos filtros, misma clave, sin importar el orden de los parámetros en la URL
+    return await versioned_response(
+        request, key=f"facets:{filters.model_dump_json() if filters else ''}", cache=facets_cache, version=version, render=render
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_vehicles(
+    db: DBSession = Depends(get_read_session),
+    format: str = Query("jsonl", description="jsonl (NDJSON) o csv"),
+    filters: Optional[VehicleFilters] = Depends(get_vehicle_filters)
+) -> StreamingResponse:
+    """Exportar el catálogo completo (filtrado) en streaming, ordenado por id"""
+    fmt = format.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado. Opciones: {', '.join(EXPORT_FORMATS)}")
+    
+    return StreamingResponse(
+        vehicle_export_service.export(db, fmt=fmt, filters=filters),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="vehicles.{fmt}"'}
     )
-    return vehicles
+
+
+@router.get("/stats", response_model=CatalogStats)
+async def get_vehicle_stats(db: DBSession = Depends(get_read_session)) -> CatalogStats:
+    """Totales y precios (mínimo, máximo, media) del catálogo, por tipo y por marca"""
+    return await run_db(db, vehicle_service.get_stats)
+
+
+@router.get("/{vehicle_id}", response_model=VehicleResponse)
+async def get_vehicle(
+    *,
+    request: Request,
+    db: DBSession = Depends(get_read_session),
+    vehicle_id: int
+) -> VehicleResponse:
+    """Obtener un vehículo por ID"""
+    async def version():
+        current = await run_db(db, vehicle_service.get_vehicle_version, vehicle_id=vehicle_id)
+        if current is None:
+            raise HTTPException(status_code=404, detail="Vehículo no encontrado")
+        return current
+    
+    def _render(session: Session) -> Optional[bytes]:
+        vehicle = vehicle_service.get_vehicle(session, vehicle_id=vehicle_id, load=VEHICLE_DETAIL_LOAD)
+        return vehicle_service.to_response(session, vehicle).model_dump_json().encode() if vehicle else None
+    
+    async def render() -> bytes:
+        body = await run_db(db, _render)
+        if body is None:
+            raise HTTPException(status_code=404, detail="Vehículo no encontrado")
+        return body
+    
+    return await conditional_response(request, version=version, render=render)
 
 
 @router.put("/{vehicle_id}", response_model=VehicleResponse,  dependencies=[Depends(verify_admin)])
-def update_vehicle(
+async def update_vehicle(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_session),
     vehicle_id: int,
     vehicle_in: VehicleUpdate
 ) -> VehicleResponse:
     """Actualizar un vehículo"""
+    def _update(session: Session) -> Optional[VehicleResponse]:
+        vehicle = vehicle_service.update_vehicle(session, vehicle_id=vehicle_id, vehicle_data=vehicle_in)
+        return vehicle_service.to_response(session, vehicle) if vehicle else None
+
     try:
-        vehicle = vehicle_service.update_vehicle(db, vehicle_id=vehicle_id, vehicle_data=vehicle_in)
+        vehicle = await run_db(db, _update)
         if not vehicle:
             raise HTTPException(status_code=404, detail="Vehículo no encontrado")
+        response_cache.invalidate()
         return vehicle
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -219,15 +346,16 @@ def update_vehicle(
 
 
 @router.delete("/{vehicle_id}", status_code=status.HTTP_204_NO_CONTENT,  dependencies=[Depends(verify_admin)])
-def delete_vehicle(
+async def delete_vehicle(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_session),
     vehicle_id: int
 ) -> None:
     """Eliminar un vehículo"""
-    success = vehicle_service.delete_vehicle(db, vehicle_id=vehicle_id)
+    success = await run_db(db, vehicle_service.delete_vehicle, vehicle_id=vehicle_id)
     if not success:
         raise HTTPException(status_code=404, detail="Vehículo no encontrado")
+    response_cache.invalidate()
 
 
 @router.get("/types/available", response_model=List[str])
@@ -237,7 +365,13 @@ def get_available_vehicle_types() -> List[str]:
 
 
 @router.get("/stats/count", response_model=dict)
-def count_vehicles(db: Session = Depends(get_db)) -> dict:
+async def count_vehicles(db: DBSession = Depends(get_read_session)) -> dict:
     """Contar total de vehículos"""
-    count = vehicle_service.count_vehicles(db)
-    return {"total_vehicles": count}
\ No newline at end of file
+    count = await run_db(db, vehicle_service.count_vehicles)
+    return {"total_vehicles": count}
+
+
+@router.post("/stats/rebuild", response_model=CatalogStats, dependencies=[Depends(verify_admin)])
+async def rebuild_vehicle_stats(db: DBSession = Depends(get_session)) -> CatalogStats:
+    """Recalcular las estadísticas del catálogo desde las tablas (mantenimiento)"""
+    return await run_db(db, vehicle_service.rebuild_stats)
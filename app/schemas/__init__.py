@@ -1,13 +1,17 @@
 from .brand import Brand, BrandCreate, BrandUpdate, BrandResponse, BrandWithVehicles
 from .vehicle import (
     Vehicle, VehicleCreate, VehicleUpdate, VehicleResponse, 
-    VehicleFilters, VehicleListResponse
+    VehicleFilters, VehicleListResponse, VehicleImportError, VehicleImportResult,
+    FacetCount, BrandFacet, PriceBucket, VehicleFacets,
+    PriceStats, TypeStats, BrandStats, CatalogStats
 )
-from .vehicle_image import VehicleImageResponse
+from .vehicle_image import VehicleImageResponse, VehicleImageUpload
 
 __all__ = [
     "Brand", "BrandCreate", "BrandUpdate", "BrandResponse", "BrandWithVehicles",
     "Vehicle", "VehicleCreate", "VehicleUpdate", "VehicleResponse", 
-    "VehicleFilters", "VehicleListResponse",
-    "VehicleImageResponse"
+    "VehicleFilters", "VehicleListResponse", "VehicleImportError", "VehicleImportResult",
+    "FacetCount", "BrandFacet", "PriceBucket", "VehicleFacets",
+    "PriceStats", "TypeStats", "BrandStats", "CatalogStats",
+    "VehicleImageResponse", "VehicleImageUpload"
 ]
\ No newline at end of file
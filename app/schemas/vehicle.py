@@ -55,11 +55,78 @@ class VehicleFilters(BaseModel):
     tipo: Optional[str] = Field(None, description="Filtrar por tipo")
     precio_min: Optional[float] = Field(None, gt=0, description="Precio mínimo")
     precio_max: Optional[float] = Field(None, gt=0, description="Precio máximo")
+    search: Optional[str] = Field(None, min_length=1, description="Buscar por nombre")
 
 
 class VehicleListResponse(BaseModel):
     vehicles: list[VehicleResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     per_page: int
-    pages: int
\ No newline at end of file
+    pages: Optional[int] = None
+    total_estimated: bool = Field(False, description="El total proviene de la estimación del planificador")
+    next_cursor: Optional[str] = Field(None, description="Cursor opaco para solicitar la siguiente página")
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class BrandFacet(BaseModel):
+    marca_id: int
+    name: Optional[str] = None
+    count: int
+
+
+class PriceBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+
+class VehicleFacets(BaseModel):
+    total: int
+    tipos: List[FacetCount] = Field(default_factory=list, description="Todos los tipos, incluso con 0")
+    marcas: List[BrandFacet] = Field(default_factory=list, description="Marcas con resultados, de más a menos")
+    precios: List[PriceBucket] = Field(default_factory=list, description="Histograma de precios de ancho fijo")
+
+
+class PriceStats(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    avg: Optional[float] = None
+
+
+class TypeStats(BaseModel):
+    tipo: str
+    total: int
+    precio: PriceStats
+
+
+class BrandStats(BaseModel):
+    marca_id: int
+    name: Optional[str] = None
+    total: int
+    precio: PriceStats
+
+
+class CatalogStats(BaseModel):
+    total_vehicles: int
+    total_brands: int
+    precio: PriceStats
+    tipos: List[TypeStats] = Field(default_factory=list, description="Todos los tipos, incluso con 0")
+    marcas: List[BrandStats] = Field(default_factory=list, description="Todas las marcas, de más a menos vehículos")
+
+
+class VehicleImportError(BaseModel):
+    row: int = Field(..., description="Número de línea en el archivo (la cabecera CSV es la línea 1)")
+    referencia: Optional[str] = None
+    errors: List[str]
+
+
+class VehicleImportResult(BaseModel):
+    total_rows: int
+    created: int
+    failed: int
+    errors: List[VehicleImportError] = Field(default_factory=list)
@@ -21,10 +21,22 @@ class VehicleImage(VehicleImageBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class VehicleImageUpload(BaseModel):
+    """Imagen ya subida al almacenamiento, con las dimensiones leídas de su cabecera"""
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
 class VehicleImageResponse(BaseModel):
     id: int
     vehicle_id: int
     url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    thumb_url: Optional[str] = Field(None, description="Miniatura WebP (320 px)")
+    medium_url: Optional[str] = Field(None, description="WebP mediana (1024 px)")
+    webp_url: Optional[str] = Field(None, description="Original recomprimida en WebP")
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -1,24 +1,145 @@
-from typing import List, Optional
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.models import Brand
 from app.schemas.brand import BrandCreate, BrandUpdate, BrandResponse
 from app.repositories.brand import brand_crud
+from app.utils.http_cache import ResourceVersion
+from app.utils.invalidation import invalidation_bus
+
+
+class BrandCache:
+    """Catálogo de marcas en memoria: id -> marca y nombre en minúsculas -> marca.
+
+    La tabla es pequeña y casi estática: se carga completa en una consulta y se recarga
+    al vencer el TTL o tras invalidate(). Guarda BrandResponse, no objetos de sesión.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._by_id: Dict[int, BrandResponse] = {}
+        self._by_name: Dict[str, BrandResponse] = {}
+        self._ordered: List[BrandResponse] = []
+        self._version: tuple = (0, None)
+        self._loaded_at: Optional[float] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _load(self, db: Session) -> bool:
+        """Recarga si hace falta; devuelve True si el catálogo ya estaba vigente"""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return True
+        generation = self._generation
+        ordered = [BrandResponse.model_validate(brand) for brand in brand_crud.get_all(db)]
+        with self._lock:
+            # Una invalidación durante la consulta descarta este resultado para la próxima vez
+            self._ordered = ordered
+            self._by_id = {brand.id: brand for brand in ordered}
+            self._by_name = {brand.name.lower(): brand for brand in ordered}
+            self._version = (len(ordered), max((brand.updated_at for brand in ordered), default=None))
+            self._loaded_at = time.monotonic() if generation == self._generation else None
+            self.reloads += 1
+        return False
+
+    def get(self, db: Session, id: int) -> Optional[BrandResponse]:
+        return self.get_many(db, [id]).get(id)
+
+    def get_many(self, db: Session, ids: Iterable[int]) -> Dict[int, BrandResponse]:
+        fresh = self._load(db)
+        ids = set(ids)
+        found = {id: self._by_id[id] for id in ids if id in self._by_id}
+        missing = ids - found.keys()
+        if missing:
+            # Pueden haberse creado en otro worker después de la última carga
+            for brand in brand_crud.get_by_ids(db, ids=missing):
+                found[brand.id] = self._add(BrandResponse.model_validate(brand))
+        with self._lock:
+            hits = len(ids) - len(missing) if fresh else 0
+            self.hits += hits
+            self.misses += len(ids) - hits
+        return found
+
+    def _add(self, brand: BrandResponse) -> BrandResponse:
+        with self._lock:
+            self._by_id[brand.id] = brand
+            self._by_name[brand.name.lower()] = brand
+        return brand
+
+    def get_by_name(self, db: Session, name: str) -> Optional[BrandResponse]:
+        """Solo consulta el catálogo: un None puede estar desactualizado"""
+        fresh = self._load(db)
+        brand = self._by_name.get(name.lower())
+        self._count(fresh and brand is not None)
+        return brand
+
+    def all(self, db: Session) -> List[BrandResponse]:
+        self._count(self._load(db))
+        return self._ordered
+
+    def version(self, db: Session) -> tuple:
+        """(marcas, máximo updated_at) de la copia con la que se generan las respuestas.
+
+        Va en el ETag de todo lo que incluye marcas del catálogo: mientras la copia de este
+        worker no se recargue, un 304 no puede ocultar datos más nuevos que los servidos.
+        """
+        self._load(db)
+        return self._version
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "ttl": self.ttl,
+        }
+
+
+brand_cache = BrandCache(ttl=settings.BRAND_CACHE_TTL)
+# Con el aviso de otro worker el catálogo se recarga sin esperar al TTL
+invalidation_bus.subscribe("brands", lambda table, id: brand_cache.invalidate())
 
 
 class BrandService:
     
+    @staticmethod
+    def _check_name_cached(db: Session, *, name: str, brand_id: Optional[int] = None) -> None:
+        # Un nombre presente en el catálogo se rechaza sin consulta; si no está, decide la BD
+        cached = brand_cache.get_by_name(db, name)
+        if cached and cached.id != brand_id:
+            raise ValueError(f"Ya existe una marca con el nombre '{name}'")
+    
     @staticmethod
     def create_brand(db: Session, *, brand_data: BrandCreate) -> Brand:
-
-        return brand_crud.create_with_name_check(db, obj_in=brand_data)
+        BrandService._check_name_cached(db, name=brand_data.name)
+        brand = brand_crud.create_with_name_check(db, obj_in=brand_data)
+        brand_cache.invalidate()
+        return brand
     
     @staticmethod
-    def get_brand(db: Session, *, brand_id: int) -> Optional[Brand]:
-        return brand_crud.get(db, id=brand_id)
+    def get_brand(db: Session, *, brand_id: int) -> Optional[BrandResponse]:
+        return brand_cache.get(db, brand_id)
     
     @staticmethod
-    def get_brands(db: Session, *, skip: int = 0, limit: int = 100) -> List[Brand]:
-        return brand_crud.get_multi_ordered(db, skip=skip, limit=limit)
+    def get_brands(db: Session, *, skip: int = 0, limit: int = 100) -> List[BrandResponse]:
+        return brand_cache.all(db)[skip:skip + limit]
     
     @staticmethod
     def update_brand(db: Session, *, brand_id: int, brand_data: BrandUpdate) -> Optional[Brand]:
@@ -26,7 +147,11 @@ class BrandService:
         if not db_brand:
             return None
         
-        return brand_crud.update_with_name_check(db, db_obj=db_brand, obj_in=brand_data)
+        if brand_data.name and brand_data.name != db_brand.name:
+            BrandService._check_name_cached(db, name=brand_data.name, brand_id=brand_id)
+        brand = brand_crud.update_with_name_check(db, db_obj=db_brand, obj_in=brand_data)
+        brand_cache.invalidate()
+        return brand
     
     @staticmethod
     def delete_brand(db: Session, *, brand_id: int) -> bool:
@@ -35,23 +160,28 @@ class BrandService:
             return False
         
         brand_crud.remove(db, id=brand_id)
+        brand_cache.invalidate()
         return True
     
     @staticmethod
     def search_brands(db: Session, *, search_term: str, skip: int = 0, limit: int = 100) -> List[Brand]:
         return brand_crud.search_by_name(db, search_term=search_term, skip=skip, limit=limit)
     
+    @staticmethod
+    def get_brands_version(db: Session, *, search_term: Optional[str] = None) -> ResourceVersion:
+        if search_term:
+            total, updated = brand_crud.get_collection_version(db, search_term=search_term)
+        else:
+            total, updated = brand_cache.version(db)
+        return ResourceVersion(parts=(total, updated), last_modified=updated)
+    
     @staticmethod
     def count_brands(db: Session) -> int:
-        return brand_crud.count(db)
+        return len(brand_cache.all(db))
     
     @staticmethod
     def get_brand_with_vehicles(db: Session, *, brand_id: int) -> Optional[Brand]:
-        return (
-            db.query(Brand)
-            .filter(Brand.id == brand_id)
-            .first()
-        )
+        return brand_crud.get_with_vehicles(db, id=brand_id)
 
 
-brand_service = BrandService()
\ No newline at end of file
+brand_service = BrandService()
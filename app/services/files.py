@@ -1,31 +1,36 @@
-from typing import Tuple, Optional
+import asyncio
+from typing import List, Tuple, Optional
 from fastapi import UploadFile, HTTPException
+from app.schemas.vehicle_image import VehicleImageUpload
 from app.utils.storage import storage_manager, FileValidator
 
 class FileService:
     
+    @staticmethod
+    async def _store(file: UploadFile, content_type: str) -> Tuple[bool, str, Optional[str]]:
+        # El archivo temporal de Starlette se envía por trozos, sin cargarlo entero en memoria
+        success, url_or_error = await storage_manager.upload_stream_async(
+            file.file, 
+            file.filename, 
+            content_type
+        )
+        
+        if not success:
+            return False, url_or_error, None
+        
+        return True, "Archivo subido exitosamente", url_or_error
+    
     @staticmethod
     async def upload_photo(
         file: UploadFile,
     ) -> Tuple[bool, str, Optional[str]]:
         
         try:
-            file_content = await file.read()
-            is_valid, error_message = FileValidator.validate_image(file_content, file.content_type)
-            
+            is_valid, error_message, info = await FileValidator.validate_upload(file)
             if not is_valid:
                 return False, error_message, None
             
-            success, url_or_error = storage_manager.upload_file(
-                file_content, 
-                file.filename, 
-                file.content_type
-            )
-            
-            if not success:
-                return False, url_or_error, None
-            
-            return True, "Archivo subido exitosamente", url_or_error
+            return await FileService._store(file, info.content_type)
             
         except Exception as e:
             return False, f"Error subiendo archivo: {str(e)}", None
@@ -59,20 +64,29 @@ class FileService:
     @staticmethod
     async def upload_vehicle_images(
         files: Optional[list] = None,
-    ) -> Tuple[bool, str, list]:
+    ) -> Tuple[bool, str, List[VehicleImageUpload]]:
 
         try:
-            urls = []
-            for idx, photo in enumerate(files):
-                success, message, url = await FileService.upload_photo(
-                    photo,
-                )
-                if success:
-                    urls.append(url)
-                else:
+            # Se validan todos (solo la cabecera) antes de subir nada, para no dejar archivos huérfanos
+            infos = []
+            for photo in files:
+                is_valid, message, info = await FileValidator.validate_upload(photo)
+                if not is_valid:
                     return False, f"Error subiendo archivo: {message}", {}
+                infos.append(info)
 
-            return True, "Archivos subidos exitosamente", urls
+            # Subidas concurrentes; el orden de las imágenes respeta el de los archivos
+            results = await asyncio.gather(*(
+                FileService._store(photo, info.content_type)
+                for photo, info in zip(files, infos)
+            ))
+            images = []
+            for (success, message, url), info in zip(results, infos):
+                if not success:
+                    return False, f"Error subiendo archivo: {message}", {}
+                images.append(VehicleImageUpload(url=url, width=info.width, height=info.height))
+
+            return True, "Archivos subidos exitosamente", images
 
         except Exception as e:
             return False, f"Error subiendo documentos: {str(e)}", {} 
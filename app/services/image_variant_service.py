@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import settings
+from app.database import run_db, session_scope
+from app.repositories.vehicle_image import vehicle_image_crud
+from app.utils.http_cache import response_cache
+from app.utils.image_variants import VARIANT_CONTENT_TYPE, render_variants
+from app.utils.storage import storage_manager
+
+logger = logging.getLogger(__name__)
+
+
+class ImageVariantService:
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Decodificar y redimensionar es CPU pura: procesos aparte para no frenar el worker.
+        # "spawn" evita heredar por fork los hilos y el event loop del servidor
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    @staticmethod
+    def _copy_to_temp(file: UploadFile) -> str:
+        file.file.seek(0)
+        with tempfile.NamedTemporaryFile(prefix="variant-", delete=False) as tmp:
+            shutil.copyfileobj(file.file, tmp)
+        file.file.seek(0)
+        return tmp.name
+
+    @staticmethod
+    async def stage(files: List[UploadFile]) -> List[str]:
+        """Copia los archivos subidos a temporales que sobreviven al request.
+
+        Se llama con el vehículo ya confirmado: si la copia falla no hay variantes
+        (lista vacía, las imágenes siguen en su URL original), pero la alta no falla.
+        """
+        paths = []
+        try:
+            for file in files:
+                paths.append(await run_in_threadpool(ImageVariantService._copy_to_temp, file))
+        except OSError as e:
+            logger.warning("No se pudieron preparar las imágenes para sus variantes: %s", e)
+            for path in paths:
+                os.unlink(path)
+            return []
+        return paths
+
+    async def _render_and_store(self, path: str) -> Dict[str, str]:
+        loop = asyncio.get_running_loop()
+        variants = await loop.run_in_executor(
+            self._executor(), render_variants, path, settings.IMAGE_WEBP_QUALITY
+        )
+        urls = {}
+        for name, data in variants.items():
+            success, url_or_error = await storage_manager.upload_file_async(
+                data, f"{name}.webp", VARIANT_CONTENT_TYPE
+            )
+            if not success:
+                raise RuntimeError(url_or_error)
+            urls[f"{name}_url"] = url_or_error
+        return urls
+
+    async def generate(self, image_ids: List[int], paths: List[str]) -> None:
+        """Genera, sube y registra las variantes; pensado para correr tras la respuesta"""
+        try:
+            results = await asyncio.gather(
+                *(self._render_and_store(path) for path in paths), return_exceptions=True
+            )
+        finally:
+            for path in paths:
+                os.unlink(path)
+
+        variants = {}
+        for image_id, result in zip(image_ids, results):
+            if isinstance(result, Exception):
+                # La imagen sigue disponible en su URL original
+                logger.warning("No se generaron variantes de la imagen %s: %s", image_id, result)
+            else:
+                variants[image_id] = result
+
+        if variants:
+            async with session_scope() as db:
+                await run_db(db, vehicle_image_crud.set_variants, variants=variants)
+            response_cache.invalidate()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+
+image_variant_service = ImageVariantService()
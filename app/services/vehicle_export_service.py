@@ -0,0 +1,87 @@
+import csv
+import io
+from typing import AsyncIterator, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.database import DBSession, run_db
+from app.repositories.vehicle import vehicle_crud
+from app.schemas.vehicle import VehicleFilters, VehicleResponse
+from app.services.vehicle_service import vehicle_service
+
+EXPORT_FORMATS = ("jsonl", "csv")
+EXPORT_MEDIA_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+# Incluye las columnas de la importación: un CSV exportado se puede volver a importar
+CSV_COLUMNS = ("id", "nombre", "referencia", "precio", "tipo", "marca_id", "marca",
+               "images", "created_at", "updated_at")
+
+
+def jsonl_chunk(vehicles: List[VehicleResponse]) -> bytes:
+    return b"".join(vehicle.model_dump_json().encode() + b"\n" for vehicle in vehicles)
+
+
+def csv_chunk(vehicles: List[VehicleResponse], *, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for vehicle in vehicles:
+        writer.writerow([
+            vehicle.id,
+            vehicle.nombre,
+            vehicle.referencia,
+            vehicle.precio,
+            vehicle.tipo,
+            vehicle.marca_id,
+            vehicle.brand.name,
+            # Igual que en la importación: URLs en una sola columna separadas por '|'
+            "|".join(image.url for image in vehicle.images),
+            vehicle.created_at.isoformat(),
+            vehicle.updated_at.isoformat(),
+        ])
+    return buffer.getvalue().encode()
+
+
+class VehicleExportService:
+
+    @staticmethod
+    async def iter_batches(db: DBSession, *, filters: Optional[VehicleFilters] = None,
+                           batch_size: Optional[int] = None) -> AsyncIterator[List[VehicleResponse]]:
+        """Recorre el catálogo filtrado en lotes de `batch_size` sin cargarlo entero.
+
+        Con PostgreSQL yield_per usa un cursor de servidor: en memoria solo está el lote actual
+        (el mapa de identidad de la sesión guarda referencias débiles a los objetos ya leídos).
+        """
+        statement = vehicle_crud.export_statement(
+            filters=filters, batch_size=batch_size or settings.EXPORT_BATCH_SIZE
+        )
+        if isinstance(db, AsyncSession):
+            result = await db.stream(statement)
+            async for vehicles in result.scalars().partitions():
+                yield await run_db(db, vehicle_service.to_responses, vehicles)
+            return
+
+        result = await run_in_threadpool(db.execute, statement)
+        partitions = result.scalars().partitions()
+        while True:
+            vehicles = await run_in_threadpool(next, partitions, None)
+            if vehicles is None:
+                break
+            yield await run_db(db, vehicle_service.to_responses, vehicles)
+
+    @staticmethod
+    async def export(db: DBSession, *, fmt: str, filters: Optional[VehicleFilters] = None,
+                     batch_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Cuerpo de la exportación: un trozo por lote"""
+        first = True
+        async for vehicles in VehicleExportService.iter_batches(db, filters=filters, batch_size=batch_size):
+            if fmt == "csv":
+                yield csv_chunk(vehicles, header=first)
+            else:
+                yield jsonl_chunk(vehicles)
+            first = False
+        if fmt == "csv" and first:
+            yield csv_chunk([], header=True)
+
+
+vehicle_export_service = VehicleExportService()
@@ -8,8 +8,8 @@ class VehicleImageService:
     @staticmethod
     def create_vehicle_images(db: Session, *, vehicle_data: VehicleCreate,
                               id: int) -> bool:
-        for image in getattr(vehicle_data, "images", []):
-            vehicle_image_crud.createImage(db, image=image,  id=id)
+        images = [(id, image) for image in getattr(vehicle_data, "images", None) or []]
+        vehicle_image_crud.create_many(db, images=images)
 
         return True
     
@@ -0,0 +1,188 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import DBSession, run_db
+from app.models import VehicleType
+from app.repositories.brand import brand_crud
+from app.repositories.vehicle import vehicle_crud
+from app.repositories.vehicle_image import vehicle_image_crud
+from app.schemas.vehicle import VehicleCreate, VehicleImportError, VehicleImportResult
+
+IMPORT_FORMATS = ("csv", "jsonl")
+CSV_COLUMNS = ("nombre", "referencia", "precio", "tipo", "marca_id")
+
+# (línea, datos de la fila o None si no se pudo parsear, error de parseo)
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_rows(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[ParsedRow]:
+    """Parsea el cuerpo línea a línea; los campos CSV no pueden contener saltos de línea"""
+    header = None
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+
+        if fmt == "jsonl":
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"JSON inválido: {e}"
+                continue
+            if not isinstance(data, dict):
+                yield line_number, None, "Cada línea debe ser un objeto JSON"
+                continue
+            yield line_number, data, None
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [value.strip() for value in values]
+            missing = [column for column in CSV_COLUMNS if column not in header]
+            if missing:
+                raise ValueError(f"Faltan columnas en la cabecera CSV: {', '.join(missing)}")
+            continue
+        if len(values) != len(header):
+            yield line_number, None, f"Se esperaban {len(header)} columnas y hay {len(values)}"
+            continue
+        data = dict(zip(header, values))
+        # En CSV las imágenes van en una sola columna separadas por '|'
+        if "images" in data:
+            data["images"] = [url for url in data["images"].split("|") if url]
+        yield line_number, data, None
+
+
+class VehicleImportService:
+
+    @staticmethod
+    def import_batch(db: Session, *, rows: List[ParsedRow], seen: set) -> Tuple[int, List[VehicleImportError]]:
+        errors: List[VehicleImportError] = []
+        valid: List[Tuple[int, VehicleCreate, List[str]]] = []
+
+        for line_number, data, parse_error in rows:
+            if parse_error:
+                errors.append(VehicleImportError(row=line_number, errors=[parse_error]))
+                continue
+
+            images = data.pop("images", None) or []
+            referencia = data.get("referencia")
+            try:
+                vehicle_in = VehicleCreate(**data)
+                VehicleType(vehicle_in.tipo)
+            except ValidationError as e:
+                messages = [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()]
+                errors.append(VehicleImportError(row=line_number, referencia=referencia, errors=messages))
+                continue
+            except ValueError:
+                errors.append(VehicleImportError(
+                    row=line_number, referencia=referencia,
+                    errors=[f"Tipo de vehículo '{data.get('tipo')}' no es válido"]
+                ))
+                continue
+
+            if not isinstance(images, list) or not all(isinstance(url, str) for url in images):
+                errors.append(VehicleImportError(
+                    row=line_number, referencia=referencia, errors=["images debe ser una lista de URLs"]
+                ))
+                continue
+
+            if vehicle_in.referencia in seen:
+                errors.append(VehicleImportError(
+                    row=line_number, referencia=referencia,
+                    errors=[f"Referencia '{vehicle_in.referencia}' repetida en el archivo"]
+                ))
+                continue
+            seen.add(vehicle_in.referencia)
+            valid.append((line_number, vehicle_in, images))
+
+        # Unicidad de referencia y existencia de marca: una consulta por lote
+        existing = vehicle_crud.get_existing_referencias(db, referencias=[v.referencia for _, v, _ in valid])
+        brands = brand_crud.get_existing_ids(db, ids={v.marca_id for _, v, _ in valid})
+        to_create = []
+        for line_number, vehicle_in, images in valid:
+            if vehicle_in.referencia in existing:
+                errors.append(VehicleImportError(
+                    row=line_number, referencia=vehicle_in.referencia,
+                    errors=[f"Ya existe un vehículo con la referencia '{vehicle_in.referencia}'"]
+                ))
+            elif vehicle_in.marca_id not in brands:
+                errors.append(VehicleImportError(
+                    row=line_number, referencia=vehicle_in.referencia,
+                    errors=[f"La marca {vehicle_in.marca_id} no existe"]
+                ))
+            else:
+                to_create.append((vehicle_in, images))
+
+        if not to_create:
+            return 0, errors
+
+        try:
+            ids = vehicle_crud.create_many(db, objs_in=[vehicle_in for vehicle_in, _ in to_create], commit=False)
+            vehicle_image_crud.create_many(
+                db,
+                images=[(ids[vehicle_in.referencia], url) for vehicle_in, images in to_create for url in images],
+                commit=False
+            )
+            db.commit()
+        except SQLAlchemyError as e:
+            # El lote completo se descarta; los lotes anteriores ya quedaron confirmados
+            db.rollback()
+            errors.extend(
+                VehicleImportError(
+                    row=line_number, referencia=vehicle_in.referencia,
+                    errors=[f"Error de base de datos en el lote: {e.__class__.__name__}"]
+                )
+                for line_number, vehicle_in, _ in valid
+                if vehicle_in.referencia not in existing and vehicle_in.marca_id in brands
+            )
+            return 0, errors
+        return len(to_create), errors
+
+    @staticmethod
+    async def import_stream(db: DBSession, *, chunks: AsyncIterator[bytes], fmt: str) -> VehicleImportResult:
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Formato '{fmt}' no soportado. Formatos: {', '.join(IMPORT_FORMATS)}")
+
+        result = VehicleImportResult(total_rows=0, created=0, failed=0)
+        seen: set = set()
+        batch: List[ParsedRow] = []
+
+        async def flush():
+            created, errors = await run_db(db, VehicleImportService.import_batch, rows=batch, seen=seen)
+            result.created += created
+            result.errors.extend(errors)
+            batch.clear()
+
+        async for row in iter_rows(chunks, fmt):
+            result.total_rows += 1
+            batch.append(row)
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await flush()
+        if batch:
+            await flush()
+
+        result.errors.sort(key=lambda error: error.row)
+        result.failed = len(result.errors)
+        return result
+
+
+vehicle_import_service = VehicleImportService()
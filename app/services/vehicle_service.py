@@ -1,19 +1,87 @@
+from datetime import datetime
 from typing import List, Optional
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from app.models import Vehicle
-from app.schemas.vehicle import VehicleCreate, VehicleUpdate, VehicleFilters, VehicleListResponse
+from app.config import settings
+from app.models import CatalogStat, Vehicle, VehicleType
+from app.schemas.brand import BrandResponse
+from app.schemas.vehicle import (
+    BrandFacet, BrandStats, CatalogStats, FacetCount, PriceBucket, PriceStats, TypeStats,
+    VehicleCreate, VehicleFacets, VehicleFilters, VehicleListResponse, VehicleResponse, VehicleUpdate
+)
+from app.schemas.vehicle_image import VehicleImageUpload
+from app.repositories.base import LoadSpec
+from app.repositories.catalog_stats import SCOPE_MARCA, SCOPE_TIPO, SCOPE_VEHICLES, catalog_stats_crud
 from app.repositories.vehicle import vehicle_crud
+from app.services.brand_service import brand_cache
+from app.utils.http_cache import ResourceVersion
+from app.utils.pagination import decode_cursor, next_cursor
+
+
+def _latest(values) -> Optional[datetime]:
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+# Campos de VehicleResponse que salen directamente del modelo (la marca viene del catálogo)
+_VEHICLE_FIELDS = [name for name in VehicleResponse.model_fields if name != "brand"]
+
+
+def _price_stats(row: CatalogStat) -> PriceStats:
+    return PriceStats(
+        min=row.precio_min,
+        max=row.precio_max,
+        avg=row.precio_sum / row.vehicles if row.vehicles else None
+    )
+
+
+def _vehicle_response(vehicle: Vehicle, brand: BrandResponse) -> VehicleResponse:
+    return VehicleResponse.model_validate(
+        {**{name: getattr(vehicle, name) for name in _VEHICLE_FIELDS}, "brand": brand}
+    )
 
 
 class VehicleService:
     
+    @staticmethod
+    def to_responses(db: Session, vehicles: List[Vehicle]) -> List[VehicleResponse]:
+        """Respuestas con la marca del catálogo en memoria, sin JOIN ni carga perezosa"""
+        brands = brand_cache.get_many(db, (vehicle.marca_id for vehicle in vehicles))
+        return [
+            _vehicle_response(vehicle, brands.get(vehicle.marca_id) or BrandResponse.model_validate(vehicle.brand))
+            for vehicle in vehicles
+        ]
+    
+    @staticmethod
+    def to_response(db: Session, vehicle: Vehicle) -> VehicleResponse:
+        return VehicleService.to_responses(db, [vehicle])[0]
+    
     @staticmethod
     def create_vehicle(db: Session, *, vehicle_data: VehicleCreate) -> Vehicle:
         return vehicle_crud.create_with_referencia_check(db, obj_in=vehicle_data)
     
     @staticmethod
-    def get_vehicle(db: Session, *, vehicle_id: int) -> Optional[Vehicle]:
-        return vehicle_crud.get(db, id=vehicle_id)
+    def create_vehicle_with_images(db: Session, *, vehicle_data: VehicleCreate,
+                                   images: List[VehicleImageUpload]) -> VehicleResponse:
+        brand = brand_cache.get(db, vehicle_data.marca_id)
+        if brand is None:
+            raise ValueError(f"La marca {vehicle_data.marca_id} no existe")
+        
+        # Vehículo e imágenes en una sola transacción; la respuesta se arma antes del
+        # commit, con los valores ya devueltos por el INSERT, para evitar refrescos
+        try:
+            vehicle = vehicle_crud.add_with_images(db, obj_in=vehicle_data, images=images)
+            response = _vehicle_response(vehicle, brand)
+            db.commit()
+        except (SQLAlchemyError, ValueError):
+            db.rollback()
+            raise
+        return response
+    
+    @staticmethod
+    def get_vehicle(db: Session, *, vehicle_id: int,
+                    load: Optional[LoadSpec] = None) -> Optional[Vehicle]:
+        return vehicle_crud.get(db, id=vehicle_id, load=load)
     
     @staticmethod
     def get_vehicles(db: Session, *, skip: int = 0, limit: int = 100) -> List[Vehicle]:
@@ -26,24 +94,111 @@ class VehicleService:
         *,
         filters: Optional[VehicleFilters] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        estimate_total: bool = False,
+        load: Optional[LoadSpec] = None
     ) -> VehicleListResponse:
+        after = decode_cursor(cursor, "nombre") if cursor else None
+        
+        estimated = None
+        if include_total and estimate_total:
+            estimated = vehicle_crud.estimate_count_with_filters(db, filters=filters)
+            if estimated is not None and estimated < settings.ESTIMATED_COUNT_THRESHOLD:
+                estimated = None
+        
         vehicles, total = vehicle_crud.get_multi_with_filters(
             db,
             filters=filters,
             skip=skip,
-            limit=limit
+            limit=limit,
+            after=after,
+            with_total=include_total and estimated is None,
+            load=load
         )
+        if estimated is not None:
+            total = estimated
         
         page = (skip // limit) + 1 if limit > 0 else 1
-        pages = (total + limit - 1) // limit if limit > 0 else 1
+        pages = (total + limit - 1) // limit if limit > 0 and total is not None else None
         
         return VehicleListResponse(
-            vehicles=vehicles,
+            vehicles=VehicleService.to_responses(db, vehicles),
             total=total,
             page=page,
             per_page=limit,
-            pages=pages
+            pages=pages,
+            total_estimated=estimated is not None,
+            # Las búsquedas sin cursor se ordenan por relevancia, que no es una clave de cursor
+            next_cursor=next_cursor(vehicles, limit=limit, sort_key="nombre")
+            if cursor or not (filters and filters.search) else None
+        )
+    
+    @staticmethod
+    def get_facets(db: Session, *, filters: Optional[VehicleFilters] = None) -> VehicleFacets:
+        buckets = settings.FACETS_PRICE_BUCKETS
+        tipos = {tipo.value: 0 for tipo in VehicleType}
+        marcas = {}
+        precios = {}
+        lo = hi = None
+        for facet, tipo, marca_id, bucket, low, high, count in vehicle_crud.get_facets(
+            db, filters=filters, price_buckets=buckets
+        ):
+            if facet == "tipo":
+                tipos[tipo.value if isinstance(tipo, VehicleType) else tipo] = count
+            elif facet == "marca":
+                marcas[marca_id] = count
+            else:
+                precios[bucket] = count
+                lo, hi = low, high
+        
+        histogram = []
+        if lo is not None:
+            # Sin rango (un solo precio) todo cae en una cubeta
+            width = (hi - lo) / buckets if hi > lo else 0
+            histogram = [
+                PriceBucket(min=lo + index * width, max=hi if index == buckets - 1 else lo + (index + 1) * width,
+                            count=precios.get(index, 0))
+                for index in range(buckets if width else 1)
+            ]
+        
+        brands = brand_cache.get_many(db, marcas)
+        return VehicleFacets(
+            total=sum(tipos.values()),
+            tipos=[FacetCount(value=value, count=count) for value, count in tipos.items()],
+            marcas=[
+                BrandFacet(marca_id=marca_id, name=brands[marca_id].name if marca_id in brands else None, count=count)
+                for marca_id, count in sorted(marcas.items(), key=lambda item: (-item[1], item[0]))
+            ],
+            precios=histogram
+        )
+    
+    @staticmethod
+    def get_vehicle_version(db: Session, *, vehicle_id: int) -> Optional[ResourceVersion]:
+        row = vehicle_crud.get_version(db, id=vehicle_id)
+        if row is None:
+            return None
+        vehicle_updated, brand_updated = row
+        # La marca se sirve desde brand_cache: su copia también identifica la respuesta
+        return ResourceVersion(
+            parts=(vehicle_updated, brand_updated, brand_cache.version(db)), last_modified=_latest(row)
+        )
+    
+    @staticmethod
+    def get_vehicles_version(db: Session, *, filters: Optional[VehicleFilters] = None) -> ResourceVersion:
+        # Toda escritura del catálogo sube la revisión: una fila leída por clave, sin recorrer
+        # el conjunto filtrado (que ya forma parte de la clave del ETag)
+        current = catalog_stats_crud.get_revision(db)
+        if current is not None:
+            return ResourceVersion(
+                parts=(current.revision, brand_cache.version(db)), last_modified=current.updated_at
+            )
+        # Tabla sin sembrar: versión exacta del conjunto filtrado
+        total, vehicles_updated, brands_updated = vehicle_crud.get_collection_version(db, filters=filters)
+        return ResourceVersion(
+            parts=(total, vehicles_updated, brands_updated, brand_cache.version(db)),
+            last_modified=_latest((vehicles_updated, brands_updated))
         )
     
     @staticmethod
@@ -72,13 +227,21 @@ class VehicleService:
 
     @staticmethod
     def get_vehicles_by_marca(db: Session, *, marca_id: int,
-                              skip: int = 0, limit: int = 100) -> List[Vehicle]:
-        return vehicle_crud.get_by_marca(
-            db, marca_id=marca_id, skip=skip, limit=limit)
+                              skip: int = 0, limit: int = 100,
+                              cursor: Optional[str] = None,
+                              load: Optional[LoadSpec] = None) -> List[VehicleResponse]:
+        after = decode_cursor(cursor, "nombre") if cursor else None
+        vehicles = vehicle_crud.get_by_marca(
+            db, marca_id=marca_id, skip=skip, limit=limit, after=after, load=load)
+        return VehicleService.to_responses(db, vehicles)
     
     @staticmethod
-    def get_vehicles_by_tipo(db: Session, *, tipo: str, skip: int = 0, limit: int = 100) -> List[Vehicle]:
-        return vehicle_crud.get_by_tipo(db, tipo=tipo, skip=skip, limit=limit)
+    def get_vehicles_by_tipo(db: Session, *, tipo: str, skip: int = 0, limit: int = 100,
+                             cursor: Optional[str] = None,
+                             load: Optional[LoadSpec] = None) -> List[VehicleResponse]:
+        after = decode_cursor(cursor, "nombre") if cursor else None
+        vehicles = vehicle_crud.get_by_tipo(db, tipo=tipo, skip=skip, limit=limit, after=after, load=load)
+        return VehicleService.to_responses(db, vehicles)
     
     @staticmethod
     def get_vehicles_by_precio_range(
@@ -87,25 +250,77 @@ class VehicleService:
         precio_min: float, 
         precio_max: float, 
         skip: int = 0, 
-        limit: int = 100
-    ) -> List[Vehicle]:
-        return vehicle_crud.get_by_precio_range(
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        load: Optional[LoadSpec] = None
+    ) -> List[VehicleResponse]:
+        after = decode_cursor(cursor, "precio") if cursor else None
+        vehicles = vehicle_crud.get_by_precio_range(
             db,
             precio_min=precio_min,
             precio_max=precio_max,
             skip=skip,
-            limit=limit
+            limit=limit,
+            after=after,
+            load=load
         )
+        return VehicleService.to_responses(db, vehicles)
 
     @staticmethod
     def search_vehicles(db: Session, *, search_term: str, skip: int = 0,
-                         limit: int = 100) -> List[Vehicle]:
-        return vehicle_crud.search_by_nombre(db, search_term=search_term,
-                                              skip=skip, limit=limit)
+                         limit: int = 100, load: Optional[LoadSpec] = None) -> List[VehicleResponse]:
+        vehicles = vehicle_crud.search_by_nombre(db, search_term=search_term,
+                                                 skip=skip, limit=limit, load=load)
+        return VehicleService.to_responses(db, vehicles)
 
     @staticmethod
     def count_vehicles(db: Session) -> int:
-        return vehicle_crud.count(db)
+        # Una fila de catalog_stats; COUNT(*) solo si la tabla aún no se ha sembrado
+        row = catalog_stats_crud.get_scope(db, scope=SCOPE_VEHICLES)
+        return row.vehicles if row else vehicle_crud.count(db)
+    
+    @staticmethod
+    def get_stats(db: Session) -> CatalogStats:
+        rows = catalog_stats_crud.get_all(db)
+        if not any(row.scope == SCOPE_VEHICLES for row in rows):
+            # Tabla sin sembrar (creada sin migraciones): agregados al vuelo hasta el rebuild
+            rows = [CatalogStat(**row) for row in catalog_stats_crud.compute_rows(db)]
+        
+        total = next(row for row in rows if row.scope == SCOPE_VEHICLES)
+        marcas = sorted(
+            (row for row in rows if row.scope == SCOPE_MARCA), key=lambda row: (-row.vehicles, int(row.key))
+        )
+        brands = brand_cache.get_many(db, [int(row.key) for row in marcas])
+        return CatalogStats(
+            total_vehicles=total.vehicles,
+            # Del catálogo de marcas (como /brands/stats/count): una marca insertada fuera
+            # del ORM no tiene fila en catalog_stats hasta el rebuild
+            total_brands=len(brand_cache.all(db)),
+            precio=_price_stats(total),
+            tipos=[
+                TypeStats(tipo=row.key, total=row.vehicles, precio=_price_stats(row))
+                for row in rows if row.scope == SCOPE_TIPO
+            ],
+            marcas=[
+                BrandStats(
+                    marca_id=int(row.key),
+                    name=brands[int(row.key)].name if int(row.key) in brands else None,
+                    total=row.vehicles,
+                    precio=_price_stats(row)
+                )
+                for row in marcas
+            ]
+        )
+    
+    @staticmethod
+    def rebuild_stats(db: Session) -> CatalogStats:
+        try:
+            catalog_stats_crud.rebuild(db)
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        return VehicleService.get_stats(db)
     
     @staticmethod
     def get_available_types() -> List[str]:
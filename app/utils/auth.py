@@ -0,0 +1,112 @@
+"""
+Verificación de tokens de administrador compartida por los routers
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import jwt
+from app.config.settings import settings
+
+security = HTTPBearer()
+
+# Algoritmos de clave pública: se verifica con JWT_PUBLIC_KEY, sin conocer el secreto de firma
+ASYMMETRIC_PREFIXES = ("RS", "PS", "ES")
+
+
+def verification_key() -> str:
+    if settings.ALGORITHM.upper().startswith(ASYMMETRIC_PREFIXES):
+        return settings.JWT_PUBLIC_KEY
+    return settings.SECRET_KEY
+
+
+class TokenCache:
+    """Tokens ya verificados: digest sha256 del token -> (vence, rol).
+
+    Cada entrada vence en el `exp` del token (o a los `ttl` segundos si es antes);
+    al superar `max_entries` se descarta la usada hace más tiempo.
+    """
+
+    def __init__(self, *, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] <= time.time():
+                del self._entries[key]
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: bytes, role: str, exp: Optional[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        expires = time.time() + self.ttl
+        if exp is not None:
+            expires = min(expires, exp)
+        with self._lock:
+            self._entries[key] = (expires, role)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+token_cache = TokenCache(max_entries=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL)
+
+
+def token_role(token: str) -> str:
+    """Rol del token en mayúsculas; un token ya verificado no se vuelve a decodificar"""
+    key = token_cache.key(token)
+    role = token_cache.get(key)
+    if role is not None:
+        return role
+
+    try:
+        payload = jwt.decode(token, verification_key(), algorithms=[settings.ALGORITHM])
+    except jwt.JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido o expirado"
+        )
+    role = str(payload.get("role") or "").upper()
+    exp = payload.get("exp")
+    token_cache.set(key, role, float(exp) if isinstance(exp, (int, float)) else None)
+    return role
+
+
+async def verify_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    if token_role(credentials.credentials) != "ADMIN":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acceso denegado, rol insuficiente"
+        )
+    return True
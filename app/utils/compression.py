@@ -0,0 +1,171 @@
+"""
+Compresión negociada (brotli/gzip) de las respuestas
+"""
+import zlib
+from typing import Dict, List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+# Tipos que vale la pena comprimir; imágenes y binarios ya vienen comprimidos
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+
+class GzipEncoder:
+
+    name = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=31: formato gzip (cabecera y CRC), no deflate crudo
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # Z_SYNC_FLUSH entrega ya lo comprimido de este trozo, sin esperar al siguiente
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """{"gzip": 1.0, "br": 0.8} a partir de la cabecera Accept-Encoding"""
+    accepted = {}
+    for item in value.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(value: str, available: List[str]) -> Optional[str]:
+    """Codificación aceptada con mayor q; a igual q manda el orden de `available`"""
+    accepted = parse_accept_encoding(value)
+    best, best_quality = None, 0.0
+    for name in available:
+        quality = accepted.get(name, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Comprime respuestas de tipos de texto a partir de `minimum_size` bytes.
+
+    Las respuestas de un solo cuerpo se comprimen enteras y llevan Content-Length.
+    En las de streaming cada trozo se comprime y se envía en cuanto la aplicación
+    lo produce. Las que ya traen Content-Encoding pasan sin tocar.
+    """
+
+    def __init__(self, app: ASGIApp, *, minimum_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.available = (["br"] if brotli is not None else []) + ["gzip"]
+
+    def encoder(self, name: Optional[str]):
+        if name == "br":
+            return BrotliEncoder(self.brotli_quality)
+        if name == "gzip":
+            return GzipEncoder(self.gzip_level)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.available)
+        start: Optional[Message] = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                # Las cabeceras se retienen hasta ver el primer trozo del cuerpo
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start is not None:
+                initial, start = start, None
+                headers = MutableHeaders(raw=initial["headers"])
+                eligible = (
+                    "content-encoding" not in headers
+                    and initial["status"] not in (204, 304)
+                    and is_compressible(headers.get("content-type", ""))
+                    and (more_body or len(body) >= self.minimum_size)
+                )
+                if eligible:
+                    # La respuesta depende de Accept-Encoding aunque este cliente no comprima
+                    headers.add_vary_header("Accept-Encoding")
+                    encoder = self.encoder(encoding)
+                if encoder is None:
+                    passthrough = True
+                    await send(initial)
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = encoder.name
+                if more_body:
+                    del headers["Content-Length"]
+                    message = {**message, "body": encoder.chunk(body)}
+                else:
+                    body = encoder.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+                await send(initial)
+                await send(message)
+                return
+
+            if passthrough:
+                await send(message)
+                return
+            chunk = encoder.chunk(body) if more_body else encoder.finish(body)
+            await send({**message, "body": chunk})
+
+        await self.app(scope, receive, send_compressed)
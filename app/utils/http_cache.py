@@ -0,0 +1,185 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from app.config.settings import settings
+from app.utils.invalidation import ALL_TABLES, invalidation_bus
+
+# El cliente puede guardar la respuesta pero debe revalidarla (304) en cada uso
+CACHE_CONTROL = "no-cache"
+
+
+class ResourceVersion(NamedTuple):
+    """Lo que identifica una versión del recurso: partes del ETag y fecha de modificación"""
+    parts: tuple
+    last_modified: Optional[datetime] = None
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: Optional[str]
+
+
+def make_etag(*parts) -> str:
+    # ETag débil: el mismo contenido puede viajar comprimido o no
+    return f'W/"{hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()}"'
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _opaque_tag(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[str],
+                    use_last_modified: bool = True) -> bool:
+    """Evalúa If-None-Match (comparación débil) o, en su ausencia, If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {_opaque_tag(tag.strip()) for tag in if_none_match.split(",")}
+        return "*" in tags or _opaque_tag(etag) in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if use_last_modified and if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ResponseCache:
+    """Caché en proceso de cuerpos ya serializados, por ruta y parámetros de consulta.
+
+    Las escrituras llaman a invalidate(); la generación evita guardar una respuesta
+    calculada antes de una invalidación que ocurrió mientras se generaba.
+    """
+
+    def __init__(self, *, enabled: bool, ttl: float, max_entries: int):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request: Request) -> str:
+        return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, entry = item
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CachedResponse, generation: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+response_cache = ResponseCache(
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+)
+# Las respuestas combinan vehículos, imágenes y marcas: cualquier cambio en otro worker las vacía
+invalidation_bus.subscribe(ALL_TABLES, lambda table, id: response_cache.invalidate())
+
+
+def _response(entry: CachedResponse, status_code: int = 200) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if entry.last_modified:
+        headers["Last-Modified"] = entry.last_modified
+    if status_code == 304:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+async def conditional_response(
+    request: Request,
+    *,
+    version: Callable[[], Awaitable[ResourceVersion]],
+    render: Callable[[], Awaitable[bytes]],
+    collection: bool = False
+) -> Response:
+    """Respuesta GET con ETag/Last-Modified: 304 sin consultar la página ni serializar.
+
+    `version` hace la consulta barata de validadores; `render` la consulta completa y la
+    serialización, solo si el cliente no tiene ya esa versión. En colecciones el máximo
+    de updated_at no refleja los borrados, así que If-Modified-Since no se usa para el 304.
+    """
+    key = response_cache.key(request)
+    entry = response_cache.get(key)
+    if entry is None:
+        generation = response_cache.generation
+        current = await version()
+        entry = CachedResponse(
+            body=b"",
+            etag=make_etag(key, *current.parts),
+            last_modified=http_date(current.last_modified),
+        )
+        if is_not_modified(request, entry.etag, entry.last_modified, use_last_modified=not collection):
+            return _response(entry, 304)
+        entry = entry._replace(body=await render())
+        response_cache.set(key, entry, generation)
+    elif is_not_modified(request, entry.etag, entry.last_modified, use_last_modified=not collection):
+        return _response(entry, 304)
+    return _response(entry)
+
+
+async def versioned_response(
+    request: Request,
+    *,
+    key: str,
+    cache: ResponseCache,
+    version: Callable[[], Awaitable[ResourceVersion]],
+    render: Callable[[], Awaitable[bytes]]
+) -> Response:
+    """Como conditional_response, pero la caché se indexa por ETag y no por URL.
+
+    La versión se consulta siempre: una entrada solo se reutiliza mientras los datos no
+    cambien, sin depender de invalidaciones ni de en qué worker ocurrió la escritura.
+    """
+    current = await version()
+    etag = make_etag(key, *current.parts)
+    entry = CachedResponse(body=b"", etag=etag, last_modified=http_date(current.last_modified))
+    if is_not_modified(request, etag, entry.last_modified, use_last_modified=False):
+        return _response(entry, 304)
+    cached = cache.get(etag)
+    if cached is None:
+        cached = entry._replace(body=await render())
+        cache.set(etag, cached, cache.generation)
+    return _response(cached)
@@ -0,0 +1,99 @@
+import io
+import struct
+from typing import BinaryIO, NamedTuple, Optional
+
+# Bytes iniciales suficientes para tipo y dimensiones en PNG/WebP y casi siempre en JPEG
+HEADER_SIZE = 64 * 1024
+
+# Marcadores SOF de JPEG (baseline, progresivo, aritmético...) que llevan las dimensiones
+_JPEG_SOF = frozenset((0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF))
+# Marcadores sin campo de longitud
+_JPEG_STANDALONE = frozenset((0x01, 0xD8, *range(0xD0, 0xD8)))
+# Segmentos que se recorren buscando el SOF antes de dar la imagen por ilegible
+JPEG_MAX_SEGMENTS = 64
+
+
+class ImageInfo(NamedTuple):
+    content_type: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+def _jpeg_size(stream: BinaryIO) -> Optional[tuple]:
+    # Salta de segmento en segmento por su longitud: solo se leen las cabeceras de segmento
+    stream.seek(2)
+    for _ in range(JPEG_MAX_SEGMENTS):
+        if stream.read(1) != b"\xff":
+            return None
+        marker = stream.read(1)
+        while marker == b"\xff":
+            # Bytes de relleno entre marcadores
+            marker = stream.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in _JPEG_STANDALONE:
+            continue
+        if marker == 0xDA:
+            # Empiezan los datos comprimidos sin haber visto SOF
+            return None
+        field = stream.read(2)
+        if len(field) < 2:
+            return None
+        (length,) = struct.unpack(">H", field)
+        if marker in _JPEG_SOF:
+            fields = stream.read(5)
+            if len(fields) < 5:
+                return None
+            height, width = struct.unpack_from(">HH", fields, 1)
+            return width, height
+        stream.seek(length - 2, io.SEEK_CUR)
+    return None
+
+
+def _webp_size(header: bytes) -> Optional[tuple]:
+    chunk = header[12:16]
+    if chunk == b"VP8 " and len(header) >= 30 and header[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack_from("<HH", header, 26)
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(header) >= 25 and header[20] == 0x2F:
+        (bits,) = struct.unpack_from("<I", header, 21)
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(header) >= 30:
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def sniff_image(header: bytes) -> Optional[ImageInfo]:
+    """Tipo y dimensiones de una imagen JPEG/PNG/WebP a partir de sus primeros bytes.
+
+    Devuelve None si la firma no es de un formato soportado; las dimensiones quedan
+    en None si no están dentro de `header`.
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        size = _jpeg_size(io.BytesIO(header))
+        return ImageInfo("image/jpeg", *(size or ()))
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(header) >= 24 and header[12:16] == b"IHDR":
+            return ImageInfo("image/png", *struct.unpack_from(">II", header, 16))
+        return ImageInfo("image/png")
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        size = _webp_size(header)
+        return ImageInfo("image/webp", *(size or ()))
+    return None
+
+
+def sniff_image_file(file: BinaryIO) -> Optional[ImageInfo]:
+    """Como sniff_image, pero sigue los segmentos JPEG más allá de HEADER_SIZE.
+
+    Las fotos de cámara llevan EXIF, ICC o XMP de más de 64 KB antes del SOF; se
+    saltan con seek sin leer su contenido. Deja el archivo al inicio.
+    """
+    file.seek(0)
+    info = sniff_image(file.read(HEADER_SIZE))
+    if info is not None and info.content_type == "image/jpeg" and info.width is None:
+        info = ImageInfo("image/jpeg", *(_jpeg_size(file) or ()))
+    file.seek(0)
+    return info
@@ -0,0 +1,34 @@
+import io
+from typing import Dict
+from PIL import Image, ImageOps
+
+# Variantes WebP por lado máximo en píxeles; None conserva el tamaño original
+VARIANTS: Dict[str, int] = {
+    "thumb": 320,
+    "medium": 1024,
+    "webp": None,
+}
+
+VARIANT_CONTENT_TYPE = "image/webp"
+
+
+def render_variants(path: str, quality: int) -> Dict[str, bytes]:
+    """Genera las variantes WebP de la imagen en `path`.
+
+    Corre en un proceso del pool de imágenes: recibe una ruta en lugar de los bytes
+    para no copiar el original entre procesos.
+    """
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    variants = {}
+    for name, max_side in VARIANTS.items():
+        variant = image
+        if max_side is not None and max(image.size) > max_side:
+            variant = image.copy()
+            variant.thumbnail((max_side, max_side), Image.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, format="WEBP", quality=quality, method=4)
+        variants[name] = buffer.getvalue()
+    return variants
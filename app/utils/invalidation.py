@@ -0,0 +1,151 @@
+"""
+Invalidación de cachés en proceso entre workers mediante LISTEN/NOTIFY de PostgreSQL
+"""
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# handler(tabla, id); id es None cuando el cambio afecta a varias filas o se desconoce
+Handler = Callable[[str, Optional[int]], None]
+
+# Suscripción a todas las tablas
+ALL_TABLES = "*"
+
+
+class InvalidationBus:
+    """Publica cambios (tabla, id) en un canal de PostgreSQL y los reparte a los cachés locales.
+
+    publish() emite pg_notify dentro de la transacción de la escritura: PostgreSQL solo
+    entrega el aviso si la transacción confirma, y lo hace después del commit. Cada worker
+    escucha en un hilo con una conexión propia, fuera del pool. Los avisos del propio
+    worker se ignoran: sus escrituras ya invalidan en línea.
+    """
+
+    def __init__(self, *, channel: str, enabled: bool, poll_interval: float, retry_seconds: float):
+        self.channel = channel
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+        self.retry_seconds = retry_seconds
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+        self.listening = False
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def subscribe(self, table: str, handler: Handler) -> None:
+        self._handlers[table].append(handler)
+
+    def publish(self, db: Session, table: str, id: Optional[int] = None) -> None:
+        """Anuncia el cambio; debe llamarse antes del commit de la escritura"""
+        if not self.enabled or db.get_bind().dialect.name != "postgresql":
+            return
+        payload = json.dumps({"table": table, "id": id, "origin": self.origin})
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+        self.published += 1
+
+    def dispatch(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            table = message["table"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Aviso de invalidación no válido: %r", payload)
+            return
+        if message.get("origin") == self.origin:
+            return
+        self.received += 1
+        self._notify(table, message.get("id"))
+
+    def _notify(self, table: str, id: Optional[int]) -> None:
+        for handler in self._handlers.get(table, []) + self._handlers.get(ALL_TABLES, []):
+            try:
+                handler(table, id)
+            except Exception:
+                logger.exception("Error invalidando caché de %s", table)
+
+    def _notify_all(self) -> None:
+        for table in [table for table in self._handlers if table != ALL_TABLES] or [ALL_TABLES]:
+            self._notify(table, None)
+
+    def start(self, engine: Engine) -> None:
+        if not self.enabled or engine.dialect.name != "postgresql" or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._listen, args=(engine,), name="cache-invalidation", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.poll_interval + 1)
+        self._thread = None
+
+    def _connect(self, engine: Engine):
+        # Conexión DBAPI directa (psycopg2): LISTEN la retiene mientras viva el worker
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.connect(*cargs, **cparams)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return connection
+
+    def _listen(self, engine: Engine) -> None:
+        while not self._stop.is_set():
+            try:
+                connection = self._connect(engine)
+            except Exception as e:
+                self.errors += 1
+                logger.warning("No se pudo escuchar el canal %s: %s", self.channel, e)
+                self._stop.wait(self.retry_seconds)
+                continue
+
+            try:
+                self.listening = True
+                # Mientras no se escuchaba pudo perderse algún aviso: se invalida todo
+                self._notify_all()
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], self.poll_interval)[0]:
+                        connection.poll()
+                        while connection.notifies:
+                            self.dispatch(connection.notifies.pop(0).payload)
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Conexión de invalidación perdida: %s", e)
+                self._stop.wait(self.retry_seconds)
+            finally:
+                self.listening = False
+                connection.close()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "listening": self.listening,
+            "channel": self.channel,
+            "published": self.published,
+            "received": self.received,
+            "errors": self.errors,
+        }
+
+
+invalidation_bus = InvalidationBus(
+    channel=settings.CACHE_INVALIDATION_CHANNEL,
+    enabled=settings.CACHE_INVALIDATION_ENABLED,
+    poll_interval=settings.CACHE_INVALIDATION_POLL_SECONDS,
+    retry_seconds=settings.CACHE_INVALIDATION_RETRY_SECONDS,
+)
@@ -0,0 +1,47 @@
+import base64
+import json
+from typing import Any, List, Optional
+
+
+# Tipos JSON admitidos para el valor de cada clave de orden
+SORT_KEY_TYPES = {
+    "nombre": (str,),
+    "precio": (int, float),
+}
+
+
+def _is_instance(value: Any, types: tuple) -> bool:
+    # bool es subclase de int en Python, pero no es un valor válido de ninguna clave
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def encode_cursor(sort_key: str, values: List[Any]) -> str:
+    payload = json.dumps({"k": sort_key, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor de paginación inválido")
+
+    if payload.get("k") != sort_key or not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Cursor de paginación inválido para este listado")
+
+    # El cursor viaja por el cliente: los valores se comparan con las columnas de la consulta
+    value, id = values
+    expected = SORT_KEY_TYPES.get(sort_key, (str,))
+    if not _is_instance(value, expected) or not _is_instance(id, (int,)):
+        raise ValueError("Cursor de paginación inválido para este listado")
+
+    return value, id
+
+
+def next_cursor(items: list, *, limit: int, sort_key: str) -> Optional[str]:
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(sort_key, [getattr(last, sort_key), last.id])
@@ -0,0 +1,33 @@
+"""
+Respuestas JSON serializadas una sola vez con pydantic-core
+"""
+from typing import Any, Dict, Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+from app.config.settings import settings
+
+
+def json_response(
+    adapter: TypeAdapter,
+    value: Any,
+    *,
+    response: Optional[Response] = None,
+    headers: Optional[Dict[str, str]] = None,
+    status_code: int = 200
+) -> Any:
+    """Serializa `value` (modelos ya validados) directamente a bytes JSON.
+
+    FastAPI no revalida un Response contra response_model ni pasa por jsonable_encoder
+    y json.dumps. Con FAST_JSON_RESPONSES desactivado devuelve el valor sin tocar y las
+    cabeceras van a `response`, como en el camino habitual.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        if headers and response is not None:
+            response.headers.update(headers)
+        return value
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
@@ -1,49 +1,187 @@
-import uuid
-from typing import Tuple
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Optional, Tuple
 from pathlib import Path
-from google.cloud import storage as gcs
+from starlette.concurrency import run_in_threadpool
 from app.config.settings import settings
+from app.utils.image_header import HEADER_SIZE, ImageInfo, sniff_image, sniff_image_file
 
+HASH_CHUNK_SIZE = 1024 * 1024
 
-class CloudStorageManager:
 
-    def __init__(self):
-        self.provider = settings.CLOUD_PROVIDER.lower()
-        self.gcs_client = None
-        self._initialize_client()
+class StorageBackend(ABC):
+    """Almacén de objetos direccionado por clave; las implementaciones son bloqueantes"""
 
-    def _initialize_client(self):
-        try:
-            self.gcs_client = gcs.Client()
-        except Exception as e:
-            print(f"Error inicializando cliente de almacenamiento: {e}")
+    name = ""
 
-    def upload_file(self, file_content: bytes, filename: str,
-                    content_type: str) -> Tuple[bool, str]:
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def save(self, stream: BinaryIO, key: str, content_type: str) -> None:
+        ...
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+
+class GCSStorageBackend(StorageBackend):
+
+    name = "gcp"
+
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _bucket(self):
+        # El cliente se crea en la primera subida, no al importar el módulo
+        with self._lock:
+            if self._client is None:
+                from google.cloud import storage as gcs
+                self._client = gcs.Client()
+        return self._client.bucket(self.bucket_name)
+
+    def exists(self, key: str) -> bool:
+        return self._bucket().blob(key).exists()
+
+    def save(self, stream: BinaryIO, key: str, content_type: str) -> None:
+        from google.api_core.exceptions import PreconditionFailed
+
+        # Con chunk_size y sin tamaño la subida es reanudable y se lee por trozos:
+        # en memoria nunca hay más de UPLOAD_CHUNK_SIZE bytes del archivo
+        blob = self._bucket().blob(key, chunk_size=settings.UPLOAD_CHUNK_SIZE)
         try:
-            file_extension = Path(filename).suffix
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            return self._upload_to_gcs(file_content, unique_filename, content_type)
+            # if_generation_match=0: si otra subida creó la clave mientras tanto, no se reescribe
+            blob.upload_from_file(stream, content_type=content_type, if_generation_match=0)
+        except PreconditionFailed:
+            pass
 
-        except Exception as e:
-            return False, f"Error subiendo archivo: {str(e)}"
+    def url(self, key: str) -> str:
+        return f"https://storage.cloud.google.com/{self.bucket_name}/{key}"
+
+
+class LocalStorageBackend(StorageBackend):
+
+    name = "local"
 
-    def _upload_to_gcs(self, file_content: bytes, filename: str, content_type: str) -> Tuple[bool, str]:
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key).is_file()
+
+    def save(self, stream: BinaryIO, key: str, content_type: str) -> None:
+        # Se escribe en un temporal y se renombra: nunca queda visible un archivo a medias
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
         try:
-            if not self.gcs_client:
-                return False, "Cliente GCS no configurado"
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := stream.read(HASH_CHUNK_SIZE):
+                    tmp.write(chunk)
+            os.replace(tmp_path, self.root / key)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
 
-            bucket = self.gcs_client.bucket(settings.GCP_BUCKET_NAME)
-            blob = bucket.blob(filename)
+class MemoryStorageBackend(StorageBackend):
+
+    name = "memory"
+
+    def __init__(self):
+        self.objects: Dict[str, Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
 
-            blob.upload_from_string(file_content, content_type=content_type)
+    def exists(self, key: str) -> bool:
+        return key in self.objects
 
-            public_url = f"https://storage.cloud.google.com/{settings.GCP_BUCKET_NAME}/{filename}"
+    def save(self, stream: BinaryIO, key: str, content_type: str) -> None:
+        data = stream.read()
+        with self._lock:
+            self.objects.setdefault(key, (data, content_type))
 
-            return True, public_url
+    def url(self, key: str) -> str:
+        return f"memory://{key}"
+
+
+def create_backend(provider: str) -> StorageBackend:
+    provider = provider.lower()
+    if provider in ("gcp", "gcs"):
+        return GCSStorageBackend(settings.GCP_BUCKET_NAME)
+    if provider == "local":
+        return LocalStorageBackend(settings.LOCAL_STORAGE_PATH, settings.LOCAL_STORAGE_URL)
+    if provider == "memory":
+        return MemoryStorageBackend()
+    raise ValueError(f"CLOUD_PROVIDER '{provider}' no soportado. Opciones: gcp, local, memory")
+
+
+class CloudStorageManager:
+
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.provider = settings.CLOUD_PROVIDER.lower()
+        self.backend = backend or create_backend(self.provider)
+        # Los backends son bloqueantes: las subidas corren en un pool propio y acotado
+        # para no ocupar el event loop ni los hilos reservados a la base de datos
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.UPLOAD_CONCURRENCY, thread_name_prefix="storage-upload"
+        )
+
+    @staticmethod
+    def object_key(stream: BinaryIO, filename: str, content_type: str) -> str:
+        """Clave por contenido: sha256 del archivo más la extensión de su tipo"""
+        digest = hashlib.sha256()
+        stream.seek(0)
+        while chunk := stream.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        stream.seek(0)
+        extension = FileValidator.ALLOWED_IMAGE_TYPES.get(content_type) or Path(filename).suffix.lower()
+        return f"{digest.hexdigest()}{extension}"
+
+    def upload_file(self, file_content: bytes, filename: str,
+                    content_type: str) -> Tuple[bool, str]:
+        return self.upload_stream(io.BytesIO(file_content), filename, content_type)
+
+    def upload_stream(self, stream: BinaryIO, filename: str,
+                      content_type: str) -> Tuple[bool, str]:
+        try:
+            key = self.object_key(stream, filename, content_type)
+            # Mismo contenido, misma clave: si ya está almacenado no se vuelve a transferir
+            if not self.backend.exists(key):
+                self.backend.save(stream, key, content_type)
+            return True, self.backend.url(key)
 
         except Exception as e:
-            return False, f"Error subiendo a GCS: {str(e)}"
+            return False, f"Error subiendo archivo: {str(e)}"
+
+    async def upload_file_async(self, file_content: bytes, filename: str,
+                                content_type: str) -> Tuple[bool, str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.upload_file, file_content, filename, content_type
+        )
+
+    async def upload_stream_async(self, stream: BinaryIO, filename: str,
+                                  content_type: str) -> Tuple[bool, str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.upload_stream, stream, filename, content_type
+        )
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
 
 
 class FileValidator:
@@ -56,19 +194,58 @@ class FileValidator:
     }
 
     MAX_FILE_SIZE = 5 * 1024 * 1024
+    MIN_FILE_SIZE = 100
+    # Lado máximo en píxeles: evita decodificar imágenes gigantes en el pipeline de variantes
+    MAX_DIMENSION = 10000
 
     @classmethod
-    def validate_image(cls, file_content: bytes, content_type: str) -> Tuple[bool, str]:
-        if content_type not in cls.ALLOWED_IMAGE_TYPES:
-            return False, f"Tipo de archivo no permitido. Tipos permitidos: {list(cls.ALLOWED_IMAGE_TYPES.keys())}"
-
-        if len(file_content) > cls.MAX_FILE_SIZE:
+    def check_image(cls, info: Optional[ImageInfo], size: int) -> Tuple[bool, str]:
+        """Valida tamaño en bytes y tipo/dimensiones detectados en la cabecera"""
+        if size > cls.MAX_FILE_SIZE:
             return False, f"Archivo demasiado grande. Tamaño máximo: {cls.MAX_FILE_SIZE // (1024*1024)}MB"
 
-        if len(file_content) < 100:  
+        if size < cls.MIN_FILE_SIZE:
             return False, "Archivo demasiado pequeño para ser una imagen válida"
 
+        if info is None:
+            return False, f"Tipo de archivo no permitido. Tipos permitidos: {list(cls.ALLOWED_IMAGE_TYPES.keys())}"
+
+        # Sin dimensiones en la cabecera no se puede descartar una bomba de descompresión:
+        # la imagen no llega al pool de Pillow
+        if not info.width or not info.height:
+            return False, "No se pudieron leer las dimensiones de la imagen en su cabecera"
+
+        if max(info.width, info.height) > cls.MAX_DIMENSION:
+            return False, f"Imagen demasiado grande. Máximo {cls.MAX_DIMENSION} px por lado"
+
         return True, "Archivo válido"
 
+    @classmethod
+    async def validate_upload(cls, file) -> Tuple[bool, str, Optional[ImageInfo]]:
+        """Valida un UploadFile leyendo solo su cabecera; devuelve tipo y dimensiones detectados"""
+        # El tamaño se conoce sin leer: un archivo demasiado grande se rechaza antes de tocarlo
+        size = file.size
+        if size is None:
+            size = file.file.seek(0, os.SEEK_END)
+        if size > cls.MAX_FILE_SIZE:
+            return False, f"Archivo demasiado grande. Tamaño máximo: {cls.MAX_FILE_SIZE // (1024*1024)}MB", None
+
+        await file.seek(0)
+        info = sniff_image(await file.read(HEADER_SIZE))
+        await file.seek(0)
+        if info is not None and info.content_type == "image/jpeg" and info.width is None and size > HEADER_SIZE:
+            # SOF más allá de la cabecera (APPn grandes): se recorren los segmentos del archivo
+            info = await run_in_threadpool(sniff_image_file, file.file)
+
+        is_valid, message = cls.check_image(info, size)
+        if not is_valid:
+            return False, message, None
+        return True, message, info
+
+    @classmethod
+    def validate_image(cls, file_content: bytes, content_type: str) -> Tuple[bool, str]:
+        # El tipo se toma de la firma del archivo, no del content_type declarado
+        return cls.check_image(sniff_image_file(io.BytesIO(file_content)), len(file_content))
+
 
 storage_manager = CloudStorageManager()
@@ -0,0 +1,203 @@
+"""Generador de catálogos sintéticos para benchmarks.
+
+Inserta marcas, vehículos e imágenes con los modelos de la aplicación en la base de
+DATABASE_URL, por lotes (INSERT multi-fila, un commit por lote) para que un catálogo
+de un millón de vehículos quepa en memoria. Mismo --seed, mismo catálogo.
+
+    python -m benchmarks.catalog --brands 50 --vehicles 1000000 --images 3 --create-tables
+"""
+import argparse
+import random
+import time
+from typing import Iterator, List
+
+# Palabras para nombres de vehículo: búsquedas por subcadena con resultados realistas
+MODEL_WORDS = [
+    "Urban", "Sport", "Cargo", "City", "Trail", "Street", "Comfort", "Pro", "Max", "Lite",
+    "Flow", "Volt", "Nova", "Rapid", "Terra", "Aero", "Metro", "Vento", "Ruta", "Andes",
+]
+COUNTRIES = ["CO", "MX", "ES", "AR", "CL", "PE", "US", "DE", "CN", "TW"]
+# Reparto de tipos y rango de precio de cada uno
+TYPE_WEIGHTS = {"BIKE": 30, "E_BIKE": 25, "SCOOTER": 15, "E_SCOOTER": 20, "E_MOPED": 10}
+TYPE_PRICES = {
+    "BIKE": (300_000, 4_000_000),
+    "E_BIKE": (2_500_000, 15_000_000),
+    "SCOOTER": (150_000, 1_200_000),
+    "E_SCOOTER": (1_200_000, 6_000_000),
+    "E_MOPED": (4_000_000, 20_000_000),
+}
+IMAGE_BASE_URL = "https://storage.cloud.google.com/bench-files"
+
+
+def brand_rows(count: int, prefix: str, rng: random.Random) -> List[dict]:
+    return [
+        {
+            "name": f"{prefix} Marca {n:04d}",
+            "country": rng.choice(COUNTRIES),
+            "logo_path": f"{IMAGE_BASE_URL}/{prefix.lower()}-logo-{n:04d}.png",
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def vehicle_rows(start: int, count: int, brand_ids: List[int], prefix: str,
+                 rng: random.Random) -> List[dict]:
+    tipos, weights = list(TYPE_WEIGHTS), list(TYPE_WEIGHTS.values())
+    # Reparto tipo Zipf: pocas marcas concentran la mayoría de vehículos
+    brand_weights = [1 / rank for rank in range(1, len(brand_ids) + 1)]
+    rows = []
+    for n in range(start, start + count):
+        tipo = rng.choices(tipos, weights)[0]
+        low, high = TYPE_PRICES[tipo]
+        rows.append({
+            "nombre": f"{rng.choice(MODEL_WORDS)} {rng.choice(MODEL_WORDS)} {n % 1000}",
+            "referencia": f"{prefix}-{n:08d}",
+            # Precios redondeados a miles: muchos empates, como en un catálogo real
+            "precio": float(round(rng.uniform(low, high), -3)),
+            "tipo": tipo,
+            "marca_id": rng.choices(brand_ids, brand_weights)[0],
+        })
+    return rows
+
+
+def image_rows(vehicle_ids: List[int], images: int, rng: random.Random) -> List[dict]:
+    rows = []
+    for vehicle_id in vehicle_ids:
+        for n in range(images):
+            key = f"{rng.getrandbits(128):032x}"
+            rows.append({
+                "vehicle_id": vehicle_id,
+                "url": f"{IMAGE_BASE_URL}/{key}.jpg",
+                "width": 1600,
+                "height": 1200,
+                "thumb_url": f"{IMAGE_BASE_URL}/{key}-thumb.webp",
+                "medium_url": f"{IMAGE_BASE_URL}/{key}-medium.webp",
+                "webp_url": f"{IMAGE_BASE_URL}/{key}.webp",
+            })
+    return rows
+
+
+def batches(total: int, size: int) -> Iterator[tuple]:
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def seed_catalog(*, brands: int, vehicles: int, images: int, batch_size: int = 5000,
+                 seed: int = 42, prefix: str = "SYN", verbose: bool = True) -> dict:
+    """Inserta el catálogo y recalcula catalog_stats; devuelve lo insertado"""
+    from sqlalchemy import insert, text
+    from app.database import SessionLocal
+    from app.models import Brand, Vehicle, VehicleImage
+    from app.repositories.catalog_stats import catalog_stats_crud
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        brand_ids = list(db.scalars(
+            insert(Brand).returning(Brand.id, sort_by_parameter_order=True), brand_rows(brands, prefix, rng)
+        ))
+        db.commit()
+
+        inserted = 0
+        for start, count in batches(vehicles, batch_size):
+            vehicle_ids = list(db.scalars(
+                insert(Vehicle).returning(Vehicle.id, sort_by_parameter_order=True),
+                vehicle_rows(start + 1, count, brand_ids, prefix, rng)
+            ))
+            if images:
+                db.execute(insert(VehicleImage), image_rows(vehicle_ids, images, rng))
+            db.commit()
+            inserted += count
+            if verbose:
+                elapsed = time.perf_counter() - started
+                print(f"\r{inserted}/{vehicles} vehículos ({inserted / elapsed:,.0f}/s)", end="", flush=True)
+        if verbose and vehicles:
+            print()
+
+        # Los INSERT masivos no pasan por los eventos del mapper: se recalculan los totales
+        catalog_stats_crud.rebuild(db)
+        db.commit()
+        if db.get_bind().dialect.name == "postgresql":
+            # Estadísticas del planificador (y reltuples de los totales estimados) al día
+            db.execute(text("ANALYZE brands, vehicles, vehicle_images, catalog_stats"))
+            db.commit()
+
+    return {"brands": brands, "vehicles": vehicles, "images": vehicles * images,
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+def catalog_size() -> dict:
+    """Filas actuales de cada tabla, para los metadatos de los resultados"""
+    from sqlalchemy import func, select
+    from app.database import SessionLocal
+    from app.models import Brand, Vehicle, VehicleImage
+
+    with SessionLocal() as db:
+        return {
+            "brands": db.scalar(select(func.count(Brand.id))),
+            "vehicles": db.scalar(select(func.count(Vehicle.id))),
+            "images": db.scalar(select(func.count(VehicleImage.id))),
+        }
+
+
+def sample_params() -> dict:
+    """Valores reales del catálogo cargado con los que se parametrizan los casos"""
+    from sqlalchemy import func, select
+    from app.database import SessionLocal
+    from app.models import Brand, Vehicle, VehicleType
+
+    with SessionLocal() as db:
+        by_brand = db.execute(
+            select(Brand.id, func.count(Vehicle.id)).outerjoin(Vehicle, Vehicle.marca_id == Brand.id)
+            .group_by(Brand.id).order_by(func.count(Vehicle.id).desc(), Brand.id)
+        ).all()
+        if not by_brand:
+            raise SystemExit("El catálogo está vacío: cárgalo antes con python -m benchmarks.catalog")
+        low, high = db.execute(select(func.min(Vehicle.precio), func.max(Vehicle.precio))).one()
+        low, high = low or 1.0, high or 1.0
+        first, last = db.execute(select(func.min(Vehicle.id), func.max(Vehicle.id))).one()
+        middle = db.scalar(
+            select(Vehicle).where(Vehicle.id >= ((first or 0) + (last or 0)) // 2).order_by(Vehicle.id).limit(1)
+        )
+        return {
+            "vehicle_id": middle.id if middle else None,
+            "vehicle_nombre": middle.nombre if middle else None,
+            "busy_brand_id": by_brand[0][0],
+            # La marca con menos vehículos (pero alguno): respuestas acotadas en with-vehicles y export
+            "small_brand_id": next((id for id, count in reversed(by_brand) if count), by_brand[-1][0]),
+            "tipo": VehicleType.E_BIKE.value,
+            # Ventana del 1 % del rango de precios
+            "precio_min": low,
+            "precio_max": low + (high - low) * 0.01,
+            "search": MODEL_WORDS[0],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--brands", type=int, default=50, help="marcas a crear")
+    parser.add_argument("--vehicles", type=int, default=10_000, help="vehículos a crear")
+    parser.add_argument("--images", type=int, default=3, help="imágenes por vehículo")
+    parser.add_argument("--batch-size", type=int, default=5000, help="vehículos por lote")
+    parser.add_argument("--seed", type=int, default=42, help="semilla del generador")
+    parser.add_argument("--prefix", default="SYN",
+                        help="prefijo de referencias y nombres de marca (uno distinto por carga)")
+    parser.add_argument("--create-tables", action="store_true",
+                        help="crear las tablas que falten (bases sin migraciones)")
+    args = parser.parse_args()
+
+    if args.brands < 1:
+        parser.error("--brands debe ser al menos 1")
+
+    if args.create_tables:
+        from app.database import Base, engine
+        import app.models  # noqa: F401  registra todas las tablas en Base.metadata
+        Base.metadata.create_all(engine)
+
+    print(seed_catalog(brands=args.brands, vehicles=args.vehicles, images=args.images,
+                       batch_size=args.batch_size, seed=args.seed, prefix=args.prefix))
+    print(catalog_size())
+
+
+if __name__ == "__main__":
+    main()
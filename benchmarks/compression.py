@@ -0,0 +1,50 @@
+"""Benchmark de compresión de listados: bytes enviados y CPU por tamaño de página.
+
+Serializa páginas de VehicleListResponse como GET /api/v1/vehicles/ y las comprime
+con los codificadores de app.utils.compression a distintos niveles.
+
+    python -m benchmarks.compression --pages 10 --pages 50 --pages 100
+"""
+import argparse
+import time
+
+from benchmarks.json_responses import make_vehicles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, action="append", help="vehículos por página (repetible)")
+    parser.add_argument("--images", type=int, default=3, help="imágenes por vehículo")
+    parser.add_argument("--number", type=int, default=50, help="repeticiones por medición")
+    args = parser.parse_args()
+
+    from app.schemas.vehicle import VehicleListResponse
+    from app.utils.compression import BrotliEncoder, GzipEncoder, brotli
+
+    encoders = [("gzip", level, GzipEncoder) for level in (1, 6, 9)]
+    if brotli is not None:
+        encoders += [("br", quality, BrotliEncoder) for quality in (1, 4, 11)]
+    else:
+        print("brotli no está instalado: solo se mide gzip")
+
+    print(f"{'vehículos':>9} {'codificación':>13} {'bytes':>9} {'ratio':>7} {'CPU (ms)':>9} {'MB/s':>7}")
+    for size in args.pages or [10, 50, 100]:
+        vehicles = make_vehicles(size, args.images)
+        body = VehicleListResponse(
+            vehicles=vehicles, total=size, page=1, per_page=size
+        ).model_dump_json().encode()
+        print(f"{size:>9} {'identity':>13} {len(body):>9} {1:>7.1f} {0:>9.3f} {'-':>7}")
+
+        for name, level, encoder_class in encoders:
+            start = time.perf_counter()
+            for _ in range(args.number):
+                compressed = encoder_class(level).finish(body)
+            elapsed = (time.perf_counter() - start) / args.number
+            print(
+                f"{size:>9} {f'{name}-{level}':>13} {len(compressed):>9} {len(body) / len(compressed):>7.1f}"
+                f" {elapsed * 1000:>9.3f} {len(body) / elapsed / 1e6:>7.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Latencia y throughput de los endpoints de la API, en proceso con el cliente ASGI.
+
+Mide todas las rutas de la aplicación contra el catálogo ya cargado con
+benchmarks.catalog. Cada caso primero se calienta y luego se mide con --number
+peticiones, de las que --concurrency van en paralelo. Las escrituras solo se miden
+con --writes. Al final se listan las rutas que no tienen caso.
+
+    python -m benchmarks.endpoints --number 200 --concurrency 4 --output endpoints.json
+    python -m benchmarks.endpoints --writes --output endpoints-writes.json
+"""
+import argparse
+import asyncio
+import io
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+API = "/api/v1"
+
+
+class Case(NamedTuple):
+    name: str
+    # Ruta tal como aparece en app.routes ("GET /api/v1/vehicles/{vehicle_id}") para la cobertura
+    route: str
+    # Petición número i -> (método, url, kwargs de httpx)
+    request: Callable[[int], tuple]
+    expect: int = 200
+
+
+def get(url: str, **kwargs) -> Callable[[int], tuple]:
+    return lambda i: ("GET", url, kwargs)
+
+
+def admin_token() -> str:
+    """Token de administrador firmado con SECRET_KEY (solo algoritmos HS*)"""
+    from jose import jwt
+    from app.config import settings
+
+    if not settings.ALGORITHM.upper().startswith("HS"):
+        raise SystemExit(f"Con ALGORITHM {settings.ALGORITHM} pasa un token de administrador con --token")
+    return jwt.encode({"role": "admin", "exp": int(time.time()) + 3600},
+                      settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def make_image() -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480), (200, 80, 40)).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def read_cases(params: dict, *, first_page: dict) -> List[Case]:
+    vehicles, brands = f"{API}/vehicles", f"{API}/brands"
+    vehicle_id, busy, small = params["vehicle_id"], params["busy_brand_id"], params["small_brand_id"]
+    window = {"precio_min": params["precio_min"], "precio_max": params["precio_max"]}
+    return [
+        Case("root", "GET /", get("/")),
+        Case("health", "GET /health", get("/health")),
+        Case("health.pool", "GET /health/pool", get("/health/pool")),
+        Case("health.cache", "GET /health/cache", get("/health/cache")),
+        Case("vehicles.list", f"GET {vehicles}/", get(f"{vehicles}/", params={"limit": 20})),
+        Case("vehicles.list.100", f"GET {vehicles}/", get(f"{vehicles}/", params={"limit": 100})),
+        Case("vehicles.list.no_total", f"GET {vehicles}/",
+             get(f"{vehicles}/", params={"limit": 20, "include_total": False})),
+        Case("vehicles.list.estimate_total", f"GET {vehicles}/",
+             get(f"{vehicles}/", params={"limit": 20, "estimate_total": True})),
+        Case("vehicles.list.offset_1000", f"GET {vehicles}/", get(f"{vehicles}/", params={"limit": 20, "skip": 1000})),
+        Case("vehicles.list.cursor", f"GET {vehicles}/",
+             get(f"{vehicles}/", params={"limit": 20, "cursor": first_page["next_cursor"]})),
+        Case("vehicles.list.revalidate", f"GET {vehicles}/",
+             get(f"{vehicles}/", params={"limit": 20}, headers={"If-None-Match": first_page["etag"]}), expect=304),
+        Case("vehicles.list.marca", f"GET {vehicles}/", get(f"{vehicles}/", params={"limit": 20, "marca_id": busy})),
+        Case("vehicles.list.tipo", f"GET {vehicles}/", get(f"{vehicles}/", params={"limit": 20, "tipo": params["tipo"]})),
+        Case("vehicles.list.precio", f"GET {vehicles}/", get(f"{vehicles}/", params={"limit": 20, **window})),
+        Case("vehicles.list.search", f"GET {vehicles}/",
+             get(f"{vehicles}/", params={"limit": 20, "search": params["search"]})),
+        Case("vehicles.detail", f"GET {vehicles}/{{vehicle_id}}", get(f"{vehicles}/{vehicle_id}")),
+        Case("vehicles.by_marca", f"GET {vehicles}/by-marca/{{marca_id}}",
+             get(f"{vehicles}/by-marca/{busy}", params={"limit": 20})),
+        Case("vehicles.by_tipo", f"GET {vehicles}/by-tipo/{{tipo}}",
+             get(f"{vehicles}/by-tipo/{params['tipo']}", params={"limit": 20})),
+        Case("vehicles.by_precio_range", f"GET {vehicles}/by-precio-range",
+             get(f"{vehicles}/by-precio-range", params={"limit": 20, **window})),
+        Case("vehicles.facets", f"GET {vehicles}/facets", get(f"{vehicles}/facets")),
+        Case("vehicles.facets.marca", f"GET {vehicles}/facets", get(f"{vehicles}/facets", params={"marca_id": busy})),
+        # La exportación completa de un catálogo grande no es un caso por petición: se acota a una marca
+        Case("vehicles.export.jsonl", f"GET {vehicles}/export",
+             get(f"{vehicles}/export", params={"format": "jsonl", "marca_id": small})),
+        Case("vehicles.export.csv", f"GET {vehicles}/export",
+             get(f"{vehicles}/export", params={"format": "csv", "marca_id": small})),
+        Case("vehicles.stats", f"GET {vehicles}/stats", get(f"{vehicles}/stats")),
+        Case("vehicles.stats.count", f"GET {vehicles}/stats/count", get(f"{vehicles}/stats/count")),
+        Case("vehicles.types", f"GET {vehicles}/types/available", get(f"{vehicles}/types/available")),
+        Case("brands.list", f"GET {brands}/", get(f"{brands}/")),
+        Case("brands.search", f"GET {brands}/", get(f"{brands}/", params={"search": "Marca 00"})),
+        Case("brands.detail", f"GET {brands}/{{brand_id}}", get(f"{brands}/{busy}")),
+        Case("brands.with_vehicles", f"GET {brands}/{{brand_id}}/with-vehicles", get(f"{brands}/{small}/with-vehicles")),
+        Case("brands.stats.count", f"GET {brands}/stats/count", get(f"{brands}/stats/count")),
+    ]
+
+
+def write_cases(params: dict, *, headers: dict, tag: str, import_rows: int) -> tuple:
+    """Escrituras: las altas crean filas nuevas con referencias `tag` que las bajas eliminan después"""
+    vehicles, brands = f"{API}/vehicles", f"{API}/brands"
+    image = make_image()
+    created = {"vehicles": [], "brands": []}
+
+    def create_vehicle(i):
+        files = {name: (f"{name}.jpg", image, "image/jpeg") for name in ("file_one", "file_two", "file_three")}
+        data = {"nombre": f"Bench {i}", "referencia": f"{tag}-V{i}", "precio": 1000 + i,
+                "tipo": params["tipo"], "marca_id": params["busy_brand_id"]}
+        return "POST", f"{vehicles}/", {"headers": headers, "files": files, "data": data}
+
+    def import_vehicles(i):
+        body = "nombre,referencia,precio,tipo,marca_id,images\n" + "".join(
+            f"Bench {i}-{n},{tag}-I{i}-{n},{1000 + n},{params['tipo']},{params['busy_brand_id']},"
+            f"https://storage.cloud.google.com/bench-files/{tag}-{i}-{n}.jpg\n"
+            for n in range(import_rows)
+        )
+        return "POST", f"{vehicles}/import", {
+            "headers": {**headers, "Content-Type": "text/csv"}, "content": body.encode()
+        }
+
+    def create_brand(i):
+        files = {"file": ("logo.jpg", image, "image/jpeg")}
+        return "POST", f"{brands}/", {"headers": headers, "files": files,
+                                      "data": {"name": f"{tag} Marca {i}", "country": "CO"}}
+
+    def delete(kind: str, base: str):
+        def request(i):
+            ids = created[kind]
+            return "DELETE", f"{base}/{ids[i % len(ids)] if ids else 0}", {"headers": headers}
+        return request
+
+    cases = [
+        Case("vehicles.update", f"PUT {vehicles}/{{vehicle_id}}",
+             lambda i: ("PUT", f"{vehicles}/{params['vehicle_id']}",
+                        {"headers": headers, "json": {"nombre": params["vehicle_nombre"]}})),
+        Case("brands.update", f"PUT {brands}/{{brand_id}}",
+             lambda i: ("PUT", f"{brands}/{params['busy_brand_id']}", {"headers": headers, "json": {"country": "CO"}})),
+        Case("vehicles.import", f"POST {vehicles}/import", import_vehicles),
+        Case("vehicles.create", f"POST {vehicles}/", create_vehicle, expect=201),
+        Case("brands.create", f"POST {brands}/", create_brand, expect=201),
+        Case("vehicles.delete", f"DELETE {vehicles}/{{vehicle_id}}", delete("vehicles", vehicles), expect=204),
+        Case("brands.delete", f"DELETE {brands}/{{brand_id}}", delete("brands", brands), expect=204),
+        Case("vehicles.stats.rebuild", f"POST {vehicles}/stats/rebuild",
+             lambda i: ("POST", f"{vehicles}/stats/rebuild", {"headers": headers})),
+    ]
+    return cases, created
+
+
+def collect_created(created: dict, tag: str) -> None:
+    """Ids de las filas que crearon las altas, para los casos de borrado"""
+    from app.database import SessionLocal
+    from app.models import Brand, Vehicle
+
+    with SessionLocal() as db:
+        created["vehicles"] = [id for (id,) in db.query(Vehicle.id).filter(Vehicle.referencia.like(f"{tag}-%"))]
+        created["brands"] = [id for (id,) in db.query(Brand.id).filter(Brand.name.like(f"{tag} Marca %"))]
+
+
+async def measure(client, case: Case, *, number: int, concurrency: int, offset: int = 0) -> dict:
+    from benchmarks.results import summarize
+
+    samples: List[float] = []
+    counter = iter(range(offset, offset + number))
+
+    async def worker():
+        for i in counter:
+            method, url, kwargs = case.request(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            samples.append(time.perf_counter() - start)
+            if response.status_code != case.expect:
+                raise RuntimeError(
+                    f"{case.name}: {method} {url} devolvió {response.status_code}, "
+                    f"se esperaba {case.expect}: {response.text[:200]}"
+                )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(samples, elapsed=time.perf_counter() - started, concurrency=concurrency)
+
+
+def app_routes(app) -> List[str]:
+    from fastapi.routing import APIRoute
+
+    return sorted(
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute) and route.include_in_schema
+        for method in route.methods
+    )
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.main import app
+    from benchmarks.catalog import catalog_size, sample_params
+    from benchmarks.results import environment, print_table
+
+    params = sample_params()
+    results: Dict[str, dict] = {}
+    covered = set()
+    headers = {"Accept-Encoding": args.accept_encoding}
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers,
+                                     timeout=None) as client:
+            page = await client.get(f"{API}/vehicles/", params={"limit": 20})
+            first_page = {"next_cursor": page.json()["next_cursor"], "etag": page.headers.get("etag")}
+            cases = read_cases(params, first_page=first_page)
+            created, tag = None, None
+            if args.writes:
+                tag = f"BENCH{int(time.time())}"
+                admin = {"Authorization": f"Bearer {args.token or admin_token()}"}
+                write, created = write_cases(params, headers=admin, tag=tag, import_rows=args.import_rows)
+                cases += write
+
+            for case in cases:
+                if args.only and not any(pattern in case.name for pattern in args.only):
+                    continue
+                if case.name.endswith(".delete"):
+                    collect_created(created, tag)
+                    # Cada borrado necesita su fila: no se mide más de lo que crearon las altas
+                    available = len(created[case.name.split(".")[0]])
+                    number = min(args.number, available - args.warmup)
+                    if number <= 0:
+                        print(f"{case.name}: sin filas creadas que borrar, se omite")
+                        continue
+                    await measure(client, case, number=args.warmup, concurrency=1)
+                    results[case.name] = await measure(
+                        client, case, number=number, concurrency=args.concurrency, offset=args.warmup
+                    )
+                else:
+                    await measure(client, case, number=args.warmup, concurrency=1)
+                    results[case.name] = await measure(
+                        client, case, number=args.number, concurrency=args.concurrency, offset=args.warmup
+                    )
+                covered.add(case.route)
+                print(f"{case.name:<48} p50={results[case.name]['p50_ms']:.3f} ms")
+
+            if created is not None:
+                # Lo que las bajas no alcanzaron a borrar se elimina sin medir: el catálogo queda como estaba
+                collect_created(created, tag)
+                for kind in ("vehicles", "brands"):
+                    for id in created[kind]:
+                        await client.delete(f"{API}/{kind}/{id}", headers=admin)
+    finally:
+        await app.router.shutdown()
+
+    uncovered = [route for route in app_routes(app) if route not in covered]
+    print()
+    print_table(results)
+    if uncovered:
+        print("\nRutas sin medir:" + "".join(f"\n  {route}" for route in uncovered))
+
+    meta = environment(
+        catalog=catalog_size(),
+        params=params,
+        number=args.number,
+        warmup=args.warmup,
+        concurrency=args.concurrency,
+        accept_encoding=args.accept_encoding,
+        writes=args.writes,
+        uncovered=uncovered,
+    )
+    return {"results": results, "meta": meta}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100, help="peticiones medidas por caso")
+    parser.add_argument("--warmup", type=int, default=5, help="peticiones de calentamiento por caso")
+    parser.add_argument("--concurrency", type=int, default=1, help="peticiones simultáneas")
+    parser.add_argument("--accept-encoding", default="identity",
+                        help='Accept-Encoding del cliente ("br, gzip" para medir también la compresión)')
+    parser.add_argument("--writes", action="store_true", help="medir también altas, cambios y bajas")
+    parser.add_argument("--import-rows", type=int, default=100, help="filas por petición de importación")
+    parser.add_argument("--token", help="token de administrador (por defecto se firma con SECRET_KEY)")
+    parser.add_argument("--only", action="append", help="medir solo los casos cuyo nombre contenga esto (repetible)")
+    parser.add_argument("--output", help="archivo JSON de resultados (ver benchmarks.results)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        from benchmarks.results import write_results
+        write_results(args.output, suite="endpoints", results=report["results"], meta=report["meta"])
+
+
+if __name__ == "__main__":
+    main()
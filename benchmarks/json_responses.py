@@ -0,0 +1,104 @@
+"""Benchmark de serialización de listados: camino de FastAPI frente a serializar una vez.
+
+El camino por defecto revalida el valor contra response_model (serialize_response),
+lo pasa por jsonable_encoder y lo codifica con json.dumps (JSONResponse). El camino
+rápido (FAST_JSON_RESPONSES, app.utils.responses) hace TypeAdapter.dump_json en pydantic-core.
+
+    python -m benchmarks.json_responses --vehicles 100 --images 3
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+
+def make_vehicles(count: int, images: int) -> list:
+    from app.schemas.brand import BrandResponse
+    from app.schemas.vehicle import VehicleResponse
+    from app.schemas.vehicle_image import VehicleImageResponse
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    brands = [
+        BrandResponse(id=id, name=f"Marca {id}", country="CO", created_at=now, updated_at=now,
+                      logo_path=f"https://storage.cloud.google.com/roda-files/{id:064x}.png")
+        for id in range(1, 11)
+    ]
+    return [
+        VehicleResponse(
+            id=id,
+            nombre=f"Vehículo {id}",
+            referencia=f"REF-{id:06d}",
+            precio=1000 + id * 12.5,
+            tipo="E_SCOOTER",
+            marca_id=brands[id % len(brands)].id,
+            brand=brands[id % len(brands)],
+            images=[
+                VehicleImageResponse(
+                    id=id * 10 + n, vehicle_id=id, width=1600, height=1200,
+                    url=f"https://storage.cloud.google.com/roda-files/{id * 10 + n:064x}.jpg",
+                    thumb_url=f"https://storage.cloud.google.com/roda-files/{id * 10 + n:064x}-thumb.webp",
+                    medium_url=f"https://storage.cloud.google.com/roda-files/{id * 10 + n:064x}-medium.webp",
+                    webp_url=f"https://storage.cloud.google.com/roda-files/{id * 10 + n:064x}.webp",
+                )
+                for n in range(images)
+            ],
+            created_at=now,
+            updated_at=now + timedelta(minutes=id),
+        )
+        for id in range(1, count + 1)
+    ]
+
+
+async def measure(fn, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        await fn()
+    return (time.perf_counter() - start) / number
+
+
+async def run(args):
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from pydantic import TypeAdapter
+    from app.schemas.vehicle import VehicleListResponse, VehicleResponse
+
+    vehicles = make_vehicles(args.vehicles, args.images)
+    listing = VehicleListResponse(vehicles=vehicles, total=len(vehicles), page=1, per_page=len(vehicles))
+    cases = [
+        ("List[VehicleResponse]", List[VehicleResponse], vehicles),
+        ("VehicleListResponse", VehicleListResponse, listing),
+    ]
+
+    print(f"vehículos={args.vehicles} imágenes={args.images} repeticiones={args.number}")
+    print(f"{'modelo':>22} {'FastAPI (ms)':>13} {'dump_json (ms)':>15} {'aceleración':>12} {'bytes':>8}")
+    for name, model, value in cases:
+        field = create_response_field(name="response", type_=model)
+        adapter = TypeAdapter(model)
+
+        async def default_path():
+            content = await serialize_response(field=field, response_content=value)
+            return JSONResponse(content).body
+
+        async def fast_path():
+            return adapter.dump_json(value)
+
+        slow_body, fast_body = await default_path(), await fast_path()
+        assert adapter.validate_json(slow_body) == adapter.validate_json(fast_body)
+
+        slow = await measure(default_path, args.number)
+        fast = await measure(fast_path, args.number)
+        print(f"{name:>22} {slow * 1000:>13.3f} {fast * 1000:>15.3f} {slow / fast:>11.1f}x {len(fast_body):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=100, help="vehículos por respuesta")
+    parser.add_argument("--images", type=int, default=3, help="imágenes por vehículo")
+    parser.add_argument("--number", type=int, default=200, help="repeticiones por medición")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
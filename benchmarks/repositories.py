@@ -0,0 +1,123 @@
+"""Micro-benchmarks de los repositorios sobre el catálogo cargado.
+
+Mide cada consulta de CRUDVehicle, CRUDBrand y CRUDCatalogStats con una sesión
+síncrona y sin HTTP ni serialización, más la conversión a esquemas de respuesta.
+Sirve para ver si un cambio en una consulta o en un índice ayuda o perjudica.
+
+    python -m benchmarks.repositories --number 200 --output repositories.json
+"""
+import argparse
+import time
+from typing import Callable, Dict, List, Tuple
+
+
+def cases(params: dict) -> List[Tuple[str, Callable]]:
+    from app.repositories.brand import brand_crud
+    from app.repositories.catalog_stats import SCOPE_VEHICLES, catalog_stats_crud
+    from app.repositories.vehicle import VEHICLE_DETAIL_LOAD, VEHICLE_LIST_LOAD, vehicle_crud
+    from app.schemas.vehicle import VehicleFilters
+    from app.services.vehicle_service import vehicle_service
+
+    vehicle_id, busy, small = params["vehicle_id"], params["busy_brand_id"], params["small_brand_id"]
+    window = dict(precio_min=params["precio_min"], precio_max=params["precio_max"])
+    by_marca = VehicleFilters(marca_id=busy)
+    by_tipo = VehicleFilters(tipo=params["tipo"])
+    by_precio = VehicleFilters(**window)
+    by_search = VehicleFilters(search=params["search"])
+    combined = VehicleFilters(marca_id=busy, tipo=params["tipo"])
+
+    def page(db, **kwargs):
+        return vehicle_crud.get_multi_with_filters(db, limit=20, load=VEHICLE_LIST_LOAD, **kwargs)
+
+    def after_first_page(db):
+        # Cursor (nombre, id) de la última fila de la primera página
+        vehicles, _ = page(db, with_total=False)
+        return vehicle_crud.get_multi_with_filters(
+            db, limit=20, after=(vehicles[-1].nombre, vehicles[-1].id), with_total=False, load=VEHICLE_LIST_LOAD
+        )
+
+    def to_responses(db):
+        vehicles, _ = vehicle_crud.get_multi_with_filters(db, limit=100, with_total=False, load=VEHICLE_LIST_LOAD)
+        return vehicle_service.to_responses(db, vehicles)
+
+    # Referencias de una carga con el prefijo por defecto de benchmarks.catalog
+    referencias = [f"SYN-{n:08d}" for n in range(1, 501)]
+    return [
+        ("vehicle.get", lambda db: vehicle_crud.get(db, id=vehicle_id)),
+        ("vehicle.get.detail_load", lambda db: vehicle_crud.get(db, id=vehicle_id, load=VEHICLE_DETAIL_LOAD)),
+        ("vehicle.page.total", lambda db: page(db)),
+        ("vehicle.page.no_total", lambda db: page(db, with_total=False)),
+        ("vehicle.page.offset_1000", lambda db: page(db, skip=1000, with_total=False)),
+        ("vehicle.page.cursor", after_first_page),
+        ("vehicle.page.marca", lambda db: page(db, filters=by_marca)),
+        ("vehicle.page.tipo", lambda db: page(db, filters=by_tipo)),
+        ("vehicle.page.precio", lambda db: page(db, filters=by_precio)),
+        ("vehicle.page.search", lambda db: page(db, filters=by_search)),
+        ("vehicle.page.marca_tipo", lambda db: page(db, filters=combined)),
+        ("vehicle.count", lambda db: vehicle_crud.count_with_filters(db)),
+        ("vehicle.count.marca", lambda db: vehicle_crud.count_with_filters(db, filters=by_marca)),
+        ("vehicle.count.estimate", lambda db: vehicle_crud.estimate_count_with_filters(db, filters=by_marca)),
+        ("vehicle.by_marca", lambda db: vehicle_crud.get_by_marca(db, marca_id=busy, limit=20)),
+        ("vehicle.by_tipo", lambda db: vehicle_crud.get_by_tipo(db, tipo=params["tipo"], limit=20)),
+        ("vehicle.by_precio_range", lambda db: vehicle_crud.get_by_precio_range(db, limit=20, **window)),
+        ("vehicle.search_by_nombre", lambda db: vehicle_crud.search_by_nombre(db, search_term=params["search"], limit=20)),
+        ("vehicle.facets", lambda db: vehicle_crud.get_facets(db)),
+        ("vehicle.facets.marca", lambda db: vehicle_crud.get_facets(db, filters=by_marca)),
+        ("vehicle.version", lambda db: vehicle_crud.get_version(db, id=vehicle_id)),
+        ("vehicle.collection_version", lambda db: vehicle_crud.get_collection_version(db)),
+        ("vehicle.existing_referencias.500", lambda db: vehicle_crud.get_existing_referencias(db, referencias=referencias)),
+        ("vehicle.to_responses.100", to_responses),
+        ("brand.get_all", lambda db: brand_crud.get_all(db)),
+        ("brand.search_by_name", lambda db: brand_crud.search_by_name(db, search_term="Marca 00")),
+        ("brand.with_vehicles", lambda db: brand_crud.get_with_vehicles(db, id=small)),
+        ("catalog_stats.get_all", lambda db: catalog_stats_crud.get_all(db)),
+        ("catalog_stats.get_scope", lambda db: catalog_stats_crud.get_scope(db, scope=SCOPE_VEHICLES)),
+        ("catalog_stats.get_revision", lambda db: catalog_stats_crud.get_revision(db)),
+    ]
+
+
+def measure(fn: Callable, *, number: int, warmup: int) -> dict:
+    from app.database import SessionLocal
+    from benchmarks.results import summarize
+
+    samples = []
+    with SessionLocal() as db:
+        for n in range(warmup + number):
+            start = time.perf_counter()
+            fn(db)
+            elapsed = time.perf_counter() - start
+            # Sin el mapa de identidad de la iteración anterior: cada llamada carga sus filas
+            db.expunge_all()
+            if n >= warmup:
+                samples.append(elapsed)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100, help="llamadas medidas por caso")
+    parser.add_argument("--warmup", type=int, default=5, help="llamadas de calentamiento por caso")
+    parser.add_argument("--only", action="append", help="medir solo los casos cuyo nombre contenga esto (repetible)")
+    parser.add_argument("--output", help="archivo JSON de resultados (ver benchmarks.results)")
+    args = parser.parse_args()
+
+    from benchmarks.catalog import catalog_size, sample_params
+    from benchmarks.results import environment, print_table, write_results
+
+    params = sample_params()
+    results: Dict[str, dict] = {}
+    for name, fn in cases(params):
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        results[name] = measure(fn, number=args.number, warmup=args.warmup)
+        print(f"{name:<48} p50={results[name]['p50_ms']:.3f} ms")
+
+    print()
+    print_table(results)
+    if args.output:
+        meta = environment(catalog=catalog_size(), params=params, number=args.number, warmup=args.warmup)
+        write_results(args.output, suite="repositories", results=results, meta=meta)
+
+
+if __name__ == "__main__":
+    main()
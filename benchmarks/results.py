@@ -0,0 +1,144 @@
+"""Resultados de benchmarks en JSON y comparación entre dos ejecuciones.
+
+Cada archivo lleva el entorno (commit, Python, configuración relevante, tamaño del
+catálogo) y una entrada por caso con latencias en milisegundos y peticiones por segundo.
+
+    python -m benchmarks.results antes.json despues.json --threshold 10
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+FORMAT_VERSION = 1
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por interpolación lineal sobre valores ya ordenados"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(samples: List[float], *, elapsed: Optional[float] = None, concurrency: int = 1) -> dict:
+    """Estadísticas de una serie de latencias en segundos.
+
+    `elapsed` es el tiempo de pared de toda la serie; sin él la tasa se deriva de la
+    media (peticiones en serie).
+    """
+    ordered = sorted(samples)
+    total = elapsed if elapsed is not None else sum(ordered)
+    return {
+        "count": len(ordered),
+        "concurrency": concurrency,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "min_ms": ordered[0] * 1000,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "throughput_rps": len(ordered) / total if total else 0.0,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(**extra) -> dict:
+    from app.config import settings
+    from app.database import engine
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "database": engine.dialect.name,
+        "settings": {
+            name: getattr(settings, name)
+            for name in ("DATABASE_ASYNC", "DB_POOL_SIZE", "DB_MAX_OVERFLOW", "THREADPOOL_TOKENS",
+                         "FAST_JSON_RESPONSES", "RESPONSE_CACHE_ENABLED", "COMPRESSION_ENABLED")
+        },
+        **extra,
+    }
+
+
+def write_results(path: str, *, suite: str, results: Dict[str, dict], meta: dict) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"format": FORMAT_VERSION, "suite": suite, "meta": meta, "results": results},
+                  file, indent=2, ensure_ascii=False, default=str)
+        file.write("\n")
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    if data.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path}: formato de resultados {data.get('format')} no soportado")
+    return data
+
+
+def print_table(results: Dict[str, dict]) -> None:
+    print(f"{'caso':<48} {'n':>6} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'req/s':>9}")
+    for name, result in results.items():
+        print(
+            f"{name:<48} {result['count']:>6} {result['p50_ms']:>10.3f} {result['p95_ms']:>10.3f}"
+            f" {result['p99_ms']:>10.3f} {result['throughput_rps']:>9.1f}"
+        )
+
+
+def compare(base: dict, head: dict, *, metric: str, threshold: float) -> int:
+    """Imprime la variación de `metric` por caso; devuelve cuántos casos empeoran más del umbral"""
+    if base["suite"] != head["suite"]:
+        print(f"aviso: se comparan suites distintas ({base['suite']} / {head['suite']})")
+    for label, data in (("base", base), ("head", head)):
+        meta = data["meta"]
+        print(f"{label}: commit={meta.get('commit')} catálogo={meta.get('catalog')} {meta.get('created_at')}")
+
+    # En latencias subir es peor; en throughput, bajar
+    higher_is_worse = metric.endswith("_ms")
+    regressions = 0
+    print(f"{'caso':<48} {'base':>10} {'head':>10} {'cambio':>9}")
+    for name in sorted(set(base["results"]) | set(head["results"])):
+        old = base["results"].get(name, {}).get(metric)
+        new = head["results"].get(name, {}).get(metric)
+        if old is None or new is None:
+            print(f"{name:<48} {'-' if old is None else f'{old:.3f}':>10} {'-' if new is None else f'{new:.3f}':>10} {'':>9}")
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        worse = change > threshold if higher_is_worse else change < -threshold
+        regressions += worse
+        print(f"{name:<48} {old:>10.3f} {new:>10.3f} {change:>+8.1f}%{'  <-- peor' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base", help="resultados de referencia (JSON)")
+    parser.add_argument("head", help="resultados a comparar (JSON)")
+    parser.add_argument("--metric", default="p50_ms",
+                        help="mean_ms, p50_ms, p95_ms, p99_ms o throughput_rps")
+    parser.add_argument("--threshold", type=float, default=10.0, help="porcentaje que cuenta como regresión")
+    args = parser.parse_args()
+
+    regressions = compare(load_results(args.base), load_results(args.head),
+                          metric=args.metric, threshold=args.threshold)
+    # Código de salida distinto de cero para poder usarlo en CI
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Micro-benchmarks de la detección de tipo y dimensiones por cabecera.
+
+Compara sniff_image sobre los primeros 64 KB con abrir la imagen con Pillow y con
+la validación anterior, que leía el archivo completo.
+
+    python -m benchmarks.sniff_images --size 4000000
+"""
+import argparse
+import io
+import os
+import tempfile
+import timeit
+
+
+def make_samples(size: int) -> dict:
+    from PIL import Image
+
+    image = Image.frombytes("RGB", (1600, 1200), os.urandom(1600 * 1200 * 3))
+    samples = {}
+    for name, fmt, options in [
+        ("jpeg", "JPEG", {"quality": 95}),
+        ("jpeg-progresivo", "JPEG", {"quality": 95, "progressive": True}),
+        ("png", "PNG", {}),
+        ("webp", "WEBP", {"quality": 90}),
+    ]:
+        buffer = io.BytesIO()
+        image.save(buffer, format=fmt, **options)
+        data = buffer.getvalue()
+        # Se rellena hasta `size` para que leer el archivo completo tenga un coste realista
+        samples[name] = data + b"\0" * max(0, size - len(data))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=4 * 1024 * 1024, help="tamaño de cada archivo en bytes")
+    parser.add_argument("--number", type=int, default=2000, help="repeticiones por medición")
+    args = parser.parse_args()
+
+    from PIL import Image
+    from app.utils.image_header import HEADER_SIZE, sniff_image
+
+    # Starlette vuelca a disco los archivos de más de 1 MB: se lee de un temporal real
+    spool = tempfile.TemporaryFile()
+
+    def read_full(data):
+        # Validación anterior: el archivo completo en memoria para medir su longitud
+        spool.seek(0)
+        return len(spool.read())
+
+    def read_header_and_sniff(data):
+        spool.seek(0)
+        return sniff_image(spool.read(HEADER_SIZE))
+
+    def pillow_open(data):
+        with Image.open(io.BytesIO(data)) as image:
+            return image.format, image.size
+
+    print(f"tamaño={args.size}B repeticiones={args.number}")
+    print(f"{'formato':>16} {'sniff (µs)':>11} {'lectura 64KB+sniff':>19} {'Pillow open':>12} {'lectura completa':>17}")
+    for name, data in make_samples(args.size).items():
+        header = data[:HEADER_SIZE]
+        spool.seek(0)
+        spool.truncate()
+        spool.write(data)
+        assert sniff_image(header).width == 1600, name
+        timings = [
+            timeit.timeit(lambda: sniff_image(header), number=args.number),
+            timeit.timeit(lambda: read_header_and_sniff(data), number=args.number),
+            timeit.timeit(lambda: pillow_open(data), number=args.number),
+            timeit.timeit(lambda: read_full(data), number=max(1, args.number // 10)) * 10,
+        ]
+        print(f"{name:>16} " + " ".join(
+            f"{t / args.number * 1e6:>{w}.1f}" for t, w in zip(timings, (11, 19, 12, 17))
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Tiempo de pared de subir N imágenes: en serie (comportamiento anterior) vs concurrente.
+
+Levanta un servidor falso de GCS local (STORAGE_EMULATOR_HOST) con latencia fija por subida.
+
+    python -m benchmarks.upload_images --images 3 --images 12 --latency 0.2
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeStorageHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def _send(self, status: int, body: bytes = b"", headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_object(self):
+        body = json.dumps({"name": "fake", "bucket": "bench", "generation": "1"}).encode()
+        self._send(200, body, {"Content-Type": "application/json"})
+
+    def do_GET(self):
+        # Metadatos de objeto: el servidor no guarda nada, ninguna clave existe
+        time.sleep(self.latency)
+        self._send(404, json.dumps({"error": {"code": 404}}).encode(), {"Content-Type": "application/json"})
+
+    def do_POST(self):
+        # API JSON de GCS: subida multipart (un request) o inicio de una subida reanudable
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        if "uploadType=resumable" in self.path:
+            location = f"http://{self.headers['Host']}/upload/session?upload_id=bench"
+            self._send(200, headers={"Location": location})
+        else:
+            self._send_object()
+
+    def do_PUT(self):
+        # Trozo de subida reanudable: "bytes a-b/*" intermedio, "bytes a-b/total" final
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.latency)
+        content_range = self.headers.get("Content-Range", "")
+        if content_range.endswith("/*"):
+            end = content_range.split()[1].split("-")[1].split("/")[0]
+            self._send(308, headers={"Range": f"bytes=0-{end}"})
+        else:
+            self._send_object()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_storage(latency: float) -> ThreadingHTTPServer:
+    FakeStorageHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeStorageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def configure_env(server: ThreadingHTTPServer):
+    os.environ["STORAGE_EMULATOR_HOST"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["GCP_BUCKET_NAME"] = "bench"
+    os.environ["CLOUD_PROVIDER"] = "gcp"
+    # Valores mínimos para poder cargar la configuración sin .env
+    for name, value in {
+        "DATABASE_URL": "sqlite://", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+        "REFRESH_TOKEN_EXPIRE_DAYS": "1", "GOOGLE_APPLICATION_CREDENTIALS": "",
+        "APP_NAME": "bench", "APP_VERSION": "0", "DEBUG": "false",
+    }.items():
+        os.environ.setdefault(name, value)
+
+
+def make_files(count: int, size: int) -> list:
+    from fastapi import UploadFile
+    from starlette.datastructures import Headers
+
+    # Cabecera JPEG para pasar la detección de tipo; contenido distinto para que no se deduplique
+    return [
+        UploadFile(io.BytesIO(b"\xff\xd8\xff\xe0" + os.urandom(size - 4)), size=size, filename=f"img{i}.jpg",
+                   headers=Headers({"content-type": "image/jpeg"}))
+        for i in range(count)
+    ]
+
+
+async def upload_serial(files: list) -> float:
+    from app.utils.storage import storage_manager
+
+    start = time.perf_counter()
+    for file in files:
+        content = await file.read()
+        # Llamada bloqueante directamente en el event loop, como antes
+        success, message = storage_manager.upload_file(content, file.filename, file.content_type)
+        assert success, message
+    return time.perf_counter() - start
+
+
+async def upload_concurrent(files: list) -> float:
+    from app.services.files import FileService
+
+    start = time.perf_counter()
+    success, message, _ = await FileService.upload_vehicle_images(files)
+    assert success, message
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, action="append", help="número de imágenes (repetible)")
+    parser.add_argument("--latency", type=float, default=0.1, help="latencia por subida en segundos")
+    parser.add_argument("--size", type=int, default=200 * 1024, help="tamaño de cada imagen en bytes")
+    args = parser.parse_args()
+
+    server = start_fake_storage(args.latency)
+    configure_env(server)
+    from app.config.settings import settings
+
+    print(f"latencia={args.latency}s tamaño={args.size}B UPLOAD_CONCURRENCY={settings.UPLOAD_CONCURRENCY}")
+    print(f"{'imágenes':>9} {'serie (s)':>10} {'concurrente (s)':>16} {'aceleración':>12}")
+    for count in args.images or [3, 12]:
+        serial = asyncio.run(upload_serial(make_files(count, args.size)))
+        concurrent = asyncio.run(upload_concurrent(make_files(count, args.size)))
+        print(f"{count:>9} {serial:>10.3f} {concurrent:>16.3f} {serial / concurrent:>11.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
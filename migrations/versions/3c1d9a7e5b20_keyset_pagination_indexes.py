@@ -0,0 +1,28 @@
+"""keyset pagination indexes
+
+Revision ID: 3c1d9a7e5b20
+Revises: 8f3def2ccbe8
+Create Date: 2026-10-17 10:12:41.218306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d9a7e5b20'
+down_revision: Union[str, None] = '8f3def2ccbe8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_vehicles_nombre_id', 'vehicles', ['nombre', 'id'], unique=False)
+    op.create_index('ix_vehicles_precio_id', 'vehicles', ['precio', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_vehicles_precio_id', table_name='vehicles')
+    op.drop_index('ix_vehicles_nombre_id', table_name='vehicles')
@@ -0,0 +1,28 @@
+"""vehicle image dimensions
+
+Revision ID: 9b4d2e6a1c57
+Revises: e5a8c31f7b62
+Create Date: 2026-10-17 15:02:11.583904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4d2e6a1c57'
+down_revision: Union[str, None] = 'e5a8c31f7b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('vehicle_images', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('vehicle_images', sa.Column('height', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('vehicle_images', 'height')
+    op.drop_column('vehicle_images', 'width')
@@ -0,0 +1,35 @@
+"""trigram search indexes
+
+Revision ID: a41f6c2d8e93
+Revises: 3c1d9a7e5b20
+Create Date: 2026-10-17 11:03:27.540118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f6c2d8e93'
+down_revision: Union[str, None] = '3c1d9a7e5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_vehicles_nombre_trgm', 'vehicles', ['nombre'], unique=False,
+        postgresql_using='gin', postgresql_ops={'nombre': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_brands_name_trgm', 'brands', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_brands_name_trgm', table_name='brands')
+    op.drop_index('ix_vehicles_nombre_trgm', table_name='vehicles')
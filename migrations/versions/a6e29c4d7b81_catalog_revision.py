@@ -0,0 +1,26 @@
+"""catalog revision
+
+Revision ID: a6e29c4d7b81
+Revises: f08b2d6e4a13
+Create Date: 2026-10-18 11:07:52.846311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e29c4d7b81'
+down_revision: Union[str, None] = 'f08b2d6e4a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('catalog_stats', sa.Column('revision', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('catalog_stats', 'revision')
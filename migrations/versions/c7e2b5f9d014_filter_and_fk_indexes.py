@@ -0,0 +1,34 @@
+"""filter and fk indexes
+
+Revision ID: c7e2b5f9d014
+Revises: a41f6c2d8e93
+Create Date: 2026-10-17 11:48:05.907612
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2b5f9d014'
+down_revision: Union[str, None] = 'a41f6c2d8e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_vehicles_marca_id_nombre_id', 'vehicles', ['marca_id', 'nombre', 'id'], unique=False)
+    op.create_index('ix_vehicles_tipo_nombre_id', 'vehicles', ['tipo', 'nombre', 'id'], unique=False)
+    op.create_index('ix_vehicles_marca_id_precio', 'vehicles', ['marca_id', 'precio'], unique=False)
+    op.create_index('ix_vehicle_images_vehicle_id', 'vehicle_images', ['vehicle_id'], unique=False)
+    op.create_index('ix_brands_name_lower', 'brands', [sa.text('lower(name)')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_brands_name_lower', table_name='brands')
+    op.drop_index('ix_vehicle_images_vehicle_id', table_name='vehicle_images')
+    op.drop_index('ix_vehicles_marca_id_precio', table_name='vehicles')
+    op.drop_index('ix_vehicles_tipo_nombre_id', table_name='vehicles')
+    op.drop_index('ix_vehicles_marca_id_nombre_id', table_name='vehicles')
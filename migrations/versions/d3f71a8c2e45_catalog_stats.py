@@ -0,0 +1,61 @@
+"""catalog stats
+
+Revision ID: d3f71a8c2e45
+Revises: 9b4d2e6a1c57
+Create Date: 2026-10-17 18:24:37.219405
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f71a8c2e45'
+down_revision: Union[str, None] = '9b4d2e6a1c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'catalog_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('key', sa.String(length=50), server_default='', nullable=False),
+        sa.Column('vehicles', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('precio_sum', sa.Float(), server_default='0', nullable=False),
+        sa.Column('precio_min', sa.Float(), nullable=True),
+        sa.Column('precio_max', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('scope', 'key', name='uq_catalog_stats_scope_key')
+    )
+    op.create_index(op.f('ix_catalog_stats_id'), 'catalog_stats', ['id'], unique=False)
+
+    # Siembra con los datos existentes: catálogo completo, cada tipo (también sin vehículos) y cada marca
+    op.execute("""
+        INSERT INTO catalog_stats (scope, key, vehicles, precio_sum, precio_min, precio_max)
+        SELECT 'vehicles', '', count(*), coalesce(sum(precio), 0), min(precio), max(precio)
+        FROM vehicles
+    """)
+    op.execute("""
+        INSERT INTO catalog_stats (scope, key, vehicles, precio_sum, precio_min, precio_max)
+        SELECT 'tipo', t.tipo, count(v.id), coalesce(sum(v.precio), 0), min(v.precio), max(v.precio)
+        FROM (VALUES ('E_BIKE'), ('E_MOPED'), ('SCOOTER'), ('E_SCOOTER'), ('BIKE')) AS t(tipo)
+        LEFT JOIN vehicles v ON CAST(v.tipo AS VARCHAR) = t.tipo
+        GROUP BY t.tipo
+    """)
+    op.execute("""
+        INSERT INTO catalog_stats (scope, key, vehicles, precio_sum, precio_min, precio_max)
+        SELECT 'marca', CAST(b.id AS VARCHAR), count(v.id), coalesce(sum(v.precio), 0), min(v.precio), max(v.precio)
+        FROM brands b
+        LEFT JOIN vehicles v ON v.marca_id = b.id
+        GROUP BY b.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_catalog_stats_id'), table_name='catalog_stats')
+    op.drop_table('catalog_stats')
@@ -0,0 +1,30 @@
+"""vehicle image variants
+
+Revision ID: e5a8c31f7b62
+Revises: c7e2b5f9d014
+Create Date: 2026-10-17 14:21:37.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8c31f7b62'
+down_revision: Union[str, None] = 'c7e2b5f9d014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('vehicle_images', sa.Column('thumb_url', sa.String(), nullable=True))
+    op.add_column('vehicle_images', sa.Column('medium_url', sa.String(), nullable=True))
+    op.add_column('vehicle_images', sa.Column('webp_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('vehicle_images', 'webp_url')
+    op.drop_column('vehicle_images', 'medium_url')
+    op.drop_column('vehicle_images', 'thumb_url')
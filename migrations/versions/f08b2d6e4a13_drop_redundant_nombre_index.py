@@ -0,0 +1,28 @@
+"""drop redundant nombre index
+
+Revision ID: f08b2d6e4a13
+Revises: d3f71a8c2e45
+Create Date: 2026-10-18 09:41:27.530118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f08b2d6e4a13'
+down_revision: Union[str, None] = 'd3f71a8c2e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ix_vehicles_nombre_id (nombre, id) sirve a las mismas consultas; el índice viene de
+    # index=True en el modelo y puede no existir en bases creadas por las migraciones
+    op.execute('DROP INDEX IF EXISTS ix_vehicles_nombre')
+
+
+def downgrade() -> None:
+    op.create_index('ix_vehicles_nombre', 'vehicles', ['nombre'], unique=False)
@@ -0,0 +1,120 @@
+"""
+Fixtures comunes: base SQLite de DATABASE_URL (la de CI por defecto), catálogo pequeño
+sembrado con los modelos y cliente HTTP sobre la aplicación.
+"""
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+
+# La configuración se lee al importar app: solo se completan las variables que falten
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "testing-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "30")
+os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", "/nonexistent")
+os.environ.setdefault("APP_NAME", "Roda Vehicles Service")
+os.environ.setdefault("APP_VERSION", "test")
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("CLOUD_PROVIDER", "memory")
+
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy import event
+
+from app.config.settings import settings
+from app.database import Base, SessionLocal, async_engine, engine
+from app.main import app
+from app.models import Brand, Vehicle, VehicleImage, VehicleType
+from app.routers.vehicle import facets_cache
+from app.services.brand_service import brand_cache
+from app.utils.http_cache import response_cache
+
+VEHICLES_PER_BRAND = 12
+IMAGES_PER_VEHICLE = 3
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+    if async_engine is not None:
+        # Sin el shutdown de la app (TestClient sin `with`): los hilos de aiosqlite
+        # de las conexiones en el pool impedirían que el proceso termine
+        asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture(autouse=True)
+def clean_database(database):
+    # Tablas vacías y cachés en proceso vacías en cada prueba
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    for cache in (response_cache, facets_cache, brand_cache):
+        cache.invalidate()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def catalog(db) -> dict:
+    """Dos marcas con vehículos de todos los tipos, tres imágenes cada uno"""
+    tipos = list(VehicleType)
+    brands = [Brand(name="Acme", country="CO"), Brand(name="Velo", country="MX")]
+    db.add_all(brands)
+    db.flush()
+    vehicles = []
+    for brand in brands:
+        for n in range(VEHICLES_PER_BRAND):
+            vehicle = Vehicle(
+                nombre=f"{brand.name} {n:02d}", referencia=f"{brand.name[:3].upper()}-{n:03d}",
+                precio=100.0 + 10 * n + brand.id, tipo=tipos[n % len(tipos)], marca_id=brand.id,
+            )
+            vehicle.images = [
+                VehicleImage(url=f"https://storage.test/{vehicle.referencia}-{i}.jpg")
+                for i in range(IMAGES_PER_VEHICLE)
+            ]
+            vehicles.append(vehicle)
+    db.add_all(vehicles)
+    db.commit()
+    return {"brand_ids": [brand.id for brand in brands], "vehicle_ids": [vehicle.id for vehicle in vehicles]}
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def admin_headers() -> dict:
+    token = jwt.encode({"role": "admin", "exp": int(time.time()) + 300}, settings.SECRET_KEY,
+                       algorithm=settings.ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@contextmanager
+def capture_statements(bind=engine):
+    """Sentencias (SQL, parámetros) enviadas por `bind` dentro del bloque"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
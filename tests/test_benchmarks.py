@@ -0,0 +1,95 @@
+"""
+Utilidades de benchmarks: estadísticas, formato de resultados, comparación y generador
+del catálogo sintético (a pequeña escala sobre la base de pruebas).
+"""
+import json
+import random
+
+import pytest
+
+from app.models import Brand, Vehicle, VehicleImage
+from app.repositories.catalog_stats import SCOPE_VEHICLES, catalog_stats_crud
+from benchmarks import catalog as bench_catalog
+from benchmarks import results
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert results.percentile(values, 0.0) == 1.0
+    assert results.percentile(values, 0.5) == 2.5
+    assert results.percentile(values, 1.0) == 4.0
+    assert results.percentile([7.0], 0.99) == 7.0
+
+
+def test_summarize_in_milliseconds():
+    summary = results.summarize([0.003, 0.001, 0.002])
+    assert summary["count"] == 3
+    assert (summary["min_ms"], summary["p50_ms"], summary["max_ms"]) == pytest.approx((1.0, 2.0, 3.0))
+    # Sin tiempo de pared, la tasa sale de peticiones en serie
+    assert summary["throughput_rps"] == pytest.approx(500.0)
+    assert results.summarize([0.002] * 4, elapsed=0.002, concurrency=4)["throughput_rps"] == pytest.approx(2000.0)
+
+
+def test_results_round_trip(tmp_path):
+    path = tmp_path / "run.json"
+    data = {"case": results.summarize([0.001, 0.002])}
+    results.write_results(str(path), suite="endpoints", results=data, meta={"commit": "abc"})
+
+    loaded = results.load_results(str(path))
+    assert loaded["suite"] == "endpoints" and loaded["results"] == data
+
+    path.write_text(json.dumps({"format": 0, "results": {}}))
+    with pytest.raises(ValueError):
+        results.load_results(str(path))
+
+
+def run(p50: float, rps: float) -> dict:
+    return {"suite": "endpoints", "meta": {}, "results": {"case": {"p50_ms": p50, "throughput_rps": rps}}}
+
+
+@pytest.mark.parametrize("metric, base, head, regressions", [
+    ("p50_ms", run(10.0, 100.0), run(10.5, 100.0), 0),
+    ("p50_ms", run(10.0, 100.0), run(12.0, 100.0), 1),
+    ("p50_ms", run(10.0, 100.0), run(5.0, 100.0), 0),
+    ("throughput_rps", run(10.0, 100.0), run(10.0, 80.0), 1),
+    ("throughput_rps", run(10.0, 100.0), run(10.0, 150.0), 0),
+    # Un caso que solo está en una de las ejecuciones se lista pero no cuenta
+    ("p50_ms", run(10.0, 100.0), {"suite": "endpoints", "meta": {}, "results": {}}, 0),
+])
+def test_compare_counts_regressions(metric, base, head, regressions):
+    assert results.compare(base, head, metric=metric, threshold=10.0) == regressions
+
+
+def test_compare_cli_exit_code(tmp_path, monkeypatch):
+    for name, p50 in (("base", 10.0), ("head", 20.0)):
+        results.write_results(str(tmp_path / f"{name}.json"), suite="endpoints",
+                              results=run(p50, 1.0)["results"], meta={})
+    monkeypatch.setattr("sys.argv", ["results", str(tmp_path / "base.json"), str(tmp_path / "head.json")])
+    with pytest.raises(SystemExit) as exit_info:
+        results.main()
+    assert exit_info.value.code == 1
+
+
+def test_generator_is_deterministic():
+    rows = lambda: bench_catalog.vehicle_rows(1, 50, [1, 2, 3], "SYN", random.Random(7))
+    assert rows() == rows()
+    assert {row["tipo"] for row in rows()} <= set(bench_catalog.TYPE_WEIGHTS)
+    assert all(row["referencia"].startswith("SYN-") for row in rows())
+
+
+def test_seed_catalog(db):
+    seeded = bench_catalog.seed_catalog(brands=3, vehicles=40, images=2, batch_size=15, verbose=False)
+
+    assert (seeded["brands"], seeded["vehicles"], seeded["images"]) == (3, 40, 80)
+    assert bench_catalog.catalog_size() == {"brands": 3, "vehicles": 40, "images": 80}
+    assert db.query(VehicleImage).count() == 80
+    # Los INSERT masivos no pasan por los eventos: el generador recalcula los totales
+    assert catalog_stats_crud.get_scope(db, scope=SCOPE_VEHICLES).vehicles == 40
+
+    params = bench_catalog.sample_params()
+    busiest = params["busy_brand_id"]
+    assert db.get(Vehicle, params["vehicle_id"]) is not None
+    assert db.query(Vehicle).filter(Vehicle.marca_id == busiest).count() == max(
+        db.query(Vehicle).filter(Vehicle.marca_id == brand.id).count() for brand in db.query(Brand)
+    )
+    assert params["precio_min"] < params["precio_max"]
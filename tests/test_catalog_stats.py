@@ -0,0 +1,151 @@
+"""
+catalog_stats frente a los agregados reales: tras cada camino de escritura las filas
+guardadas coinciden con las recalculadas sobre vehicles y brands.
+"""
+import pytest
+from sqlalchemy import delete, insert
+
+from app.models import Brand, CatalogStat, Vehicle
+from app.repositories.catalog_stats import SCOPE_VEHICLES, catalog_stats_crud
+from tests.conftest import capture_statements
+
+STAT_FIELDS = ("vehicles", "precio_sum", "precio_min", "precio_max")
+
+
+def stored(db) -> dict:
+    db.expire_all()
+    return {(row.scope, row.key): tuple(getattr(row, field) for field in STAT_FIELDS)
+            for row in catalog_stats_crud.get_all(db)}
+
+
+def computed(db) -> dict:
+    return {(row["scope"], row["key"]): tuple(row[field] for field in STAT_FIELDS)
+            for row in catalog_stats_crud.compute_rows(db)}
+
+
+def assert_consistent(db, *, complete: bool = True):
+    rows = stored(db)
+    expected = computed(db)
+    assert rows == {key: value for key, value in expected.items() if key in rows}
+    if complete:
+        # Todo ámbito con vehículos tiene fila (un tipo sin escrituras puede no tenerla aún)
+        assert {key for key, value in expected.items() if value[0]} <= rows.keys()
+
+
+def revision(db) -> int:
+    db.expire_all()
+    return catalog_stats_crud.get_revision(db).revision
+
+
+def test_seeded_catalog_is_consistent(db, catalog):
+    assert_consistent(db)
+
+
+@pytest.mark.parametrize("change", [
+    {"precio": 1.0},
+    {"precio": 99999.0},
+    {"tipo": "E_MOPED", "precio": 50.0},
+    {"marca_id": "other"},
+])
+def test_vehicle_update(client, db, catalog, admin_headers, change):
+    if change.get("marca_id") == "other":
+        change = {"marca_id": catalog["brand_ids"][1]}
+    vehicle_id = catalog["vehicle_ids"][0]
+
+    assert client.put(f"/api/v1/vehicles/{vehicle_id}", json=change, headers=admin_headers).status_code == 200
+    assert_consistent(db)
+
+
+def test_removing_the_extreme_recomputes_it(client, db, catalog, admin_headers):
+    cheapest = catalog_stats_crud.get_scope(db, scope=SCOPE_VEHICLES).precio_min
+    for vehicle_id in catalog["vehicle_ids"][:2]:
+        assert client.delete(f"/api/v1/vehicles/{vehicle_id}", headers=admin_headers).status_code == 204
+
+    assert_consistent(db)
+    assert catalog_stats_crud.get_scope(db, scope=SCOPE_VEHICLES).precio_min > cheapest
+
+
+def test_import_and_brand_delete(client, db, catalog, admin_headers):
+    brand_id = catalog["brand_ids"][1]
+    body = "nombre,referencia,precio,tipo,marca_id,images\n" + "".join(
+        f"Importado {n},IMP-{n:03d},{500 + n},SCOOTER,{brand_id},https://storage.test/imp-{n}.jpg\n"
+        for n in range(25)
+    )
+    response = client.post("/api/v1/vehicles/import", content=body.encode(),
+                           headers={**admin_headers, "Content-Type": "text/csv"})
+    assert response.json()["created"] == 25
+    assert_consistent(db)
+
+    assert client.delete(f"/api/v1/brands/{brand_id}", headers=admin_headers).status_code == 204
+    assert_consistent(db)
+    assert ("marca", str(brand_id)) not in stored(db)
+
+
+def test_missing_rows_are_created_from_aggregates(client, db, catalog, admin_headers):
+    db.execute(delete(CatalogStat))
+    db.commit()
+    vehicle_id = catalog["vehicle_ids"][3]
+    previous = db.get(Vehicle, vehicle_id).tipo.value
+
+    response = client.put(f"/api/v1/vehicles/{vehicle_id}", json={"precio": 7.0, "tipo": "E_MOPED"},
+                          headers=admin_headers)
+    assert response.status_code == 200
+
+    # Solo los ámbitos tocados: catálogo, tipo nuevo y anterior, y la marca
+    assert sorted(stored(db)) == sorted([
+        (SCOPE_VEHICLES, ""), ("tipo", "E_MOPED"), ("tipo", previous), ("marca", str(catalog["brand_ids"][0])),
+    ])
+    assert_consistent(db, complete=False)
+
+
+def test_updates_are_issued_in_key_order(db, catalog):
+    brand_id = catalog["brand_ids"][1]
+    with capture_statements() as statements:
+        catalog_stats_crud.apply(db.connection(), added=[("BIKE", brand_id, 10.0)],
+                                 removed=[("E_BIKE", catalog["brand_ids"][0], 20.0)])
+    db.rollback()
+
+    keys = [tuple(parameters[-2:]) for sql, parameters in statements if sql.startswith("UPDATE catalog_stats")]
+    assert keys == sorted(keys) and len(keys) == 5
+
+
+def test_every_write_bumps_the_revision(client, db, catalog, admin_headers):
+    vehicle_id, brand_id = catalog["vehicle_ids"][0], catalog["brand_ids"][0]
+    writes = [
+        lambda: client.put(f"/api/v1/vehicles/{vehicle_id}", json={"nombre": "Renombrado"}, headers=admin_headers),
+        lambda: client.put(f"/api/v1/brands/{brand_id}", json={"country": "AR"}, headers=admin_headers),
+        lambda: client.delete(f"/api/v1/vehicles/{vehicle_id}", headers=admin_headers),
+        lambda: client.post("/api/v1/vehicles/stats/rebuild", headers=admin_headers),
+    ]
+    for write in writes:
+        before = revision(db)
+        assert write().status_code < 300
+        assert revision(db) > before
+
+
+def test_stats_endpoint_and_rebuild(client, db, catalog, admin_headers):
+    # Deriva a propósito: el recálculo la corrige
+    db.query(CatalogStat).filter(CatalogStat.scope == SCOPE_VEHICLES).update({"vehicles": 0})
+    db.commit()
+    assert client.post("/api/v1/vehicles/stats/rebuild").status_code in (401, 403)
+
+    rebuilt = client.post("/api/v1/vehicles/stats/rebuild", headers=admin_headers).json()
+    stats = client.get("/api/v1/vehicles/stats").json()
+
+    assert rebuilt == stats
+    assert stats["total_vehicles"] == len(catalog["vehicle_ids"])
+    assert stats["total_brands"] == db.query(Brand).count()
+    assert sum(tipo["total"] for tipo in stats["tipos"]) == stats["total_vehicles"]
+    assert_consistent(db)
+
+
+def test_brand_without_stats_row_is_counted(client, db, catalog):
+    # INSERT de Core: no pasa por los eventos del mapper, la marca queda sin fila
+    brand_id = db.execute(insert(Brand).values(name="Sin Fila", country="PE")).inserted_primary_key[0]
+    db.commit()
+    assert ("marca", str(brand_id)) not in stored(db)
+
+    stats = client.get("/api/v1/vehicles/stats").json()
+
+    assert stats["total_brands"] == db.query(Brand).count() == len(catalog["brand_ids"]) + 1
+    assert stats["total_brands"] == client.get("/api/v1/brands/stats/count").json()["total_brands"]
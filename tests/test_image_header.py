@@ -0,0 +1,82 @@
+"""
+Tipo y dimensiones desde la cabecera, incluidos JPEG con metadatos de más de HEADER_SIZE.
+"""
+import asyncio
+import io
+import struct
+import tempfile
+
+import pytest
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+from app.utils.image_header import HEADER_SIZE, JPEG_MAX_SEGMENTS, sniff_image, sniff_image_file
+from app.utils.storage import FileValidator
+
+
+def segment(marker: int, payload: bytes) -> bytes:
+    return struct.pack(">BBH", 0xFF, marker, len(payload) + 2) + payload
+
+
+def jpeg(size=(320, 240), *segments: bytes) -> bytes:
+    """JPEG real con `segments` (APPn) insertados justo después de SOI"""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, "JPEG")
+    data = buffer.getvalue()
+    return data[:2] + b"".join(segments) + data[2:]
+
+
+# EXIF de cámara con miniatura embebida: el segmento APP1 entero ya supera los 64 KB
+LARGE_EXIF = segment(0xE1, b"Exif\x00\x00" + bytes(65533 - 6))
+ICC = segment(0xE2, b"ICC_PROFILE\x00\x01\x01" + bytes(30000))
+
+
+def upload(data: bytes) -> UploadFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spool.write(data)
+    spool.seek(0)
+    return UploadFile(spool, size=len(data), filename="foto.jpg")
+
+
+def test_small_jpeg_from_header():
+    assert sniff_image(jpeg()[:HEADER_SIZE]) == ("image/jpeg", 320, 240)
+
+
+def test_large_app1_needs_the_file():
+    data = jpeg((640, 480), LARGE_EXIF, ICC)
+    assert len(LARGE_EXIF) > HEADER_SIZE
+
+    # Solo con la cabecera no se llega al SOF...
+    assert sniff_image(data[:HEADER_SIZE]) == ("image/jpeg", None, None)
+    # ...recorriendo los segmentos del archivo, sí
+    file = io.BytesIO(data)
+    assert sniff_image_file(file) == ("image/jpeg", 640, 480)
+    assert file.tell() == 0
+
+
+@pytest.mark.parametrize("in_memory", [True, False])
+def test_validate_upload_large_app1(in_memory):
+    data = jpeg((640, 480), LARGE_EXIF, ICC)
+    file = upload(data)
+    if not in_memory:
+        file.file.rollover()
+
+    is_valid, message, info = asyncio.run(FileValidator.validate_upload(file))
+
+    assert is_valid, message
+    assert (info.width, info.height) == (640, 480)
+    assert file.file.tell() == 0
+    assert FileValidator.validate_image(data, "image/jpeg")[0]
+
+
+def test_segment_walk_is_bounded():
+    comments = [segment(0xFE, b"x" * 10) for _ in range(JPEG_MAX_SEGMENTS)]
+    data = jpeg((64, 64), *comments)
+
+    assert sniff_image_file(io.BytesIO(data)) == ("image/jpeg", None, None)
+    assert not FileValidator.validate_image(data, "image/jpeg")[0]
+
+
+def test_truncated_jpeg():
+    data = jpeg((640, 480), LARGE_EXIF)[:HEADER_SIZE + 100]
+    assert sniff_image_file(io.BytesIO(data)) == ("image/jpeg", None, None)
@@ -0,0 +1,59 @@
+"""
+Registro de variantes (miniaturas, WebP) cuando el vehículo cambia mientras se generan.
+"""
+import asyncio
+import os
+import tempfile
+
+from sqlalchemy import select
+
+from app.models import Vehicle, VehicleImage
+from app.repositories.vehicle_image import vehicle_image_crud
+from app.services.image_variant_service import image_variant_service
+
+
+def image_ids(db, vehicle_id: int) -> list:
+    return list(db.scalars(select(VehicleImage.id).where(VehicleImage.vehicle_id == vehicle_id).order_by(VehicleImage.id)))
+
+
+def urls(image_id: int) -> dict:
+    return {name: f"https://storage.test/{image_id}-{name}.webp" for name in ("thumb_url", "medium_url", "webp_url")}
+
+
+def delete_vehicle(db, vehicle_id: int) -> None:
+    db.delete(db.get(Vehicle, vehicle_id))
+    db.commit()
+
+
+def test_set_variants_skips_deleted_vehicle(db, catalog):
+    deleted, kept = catalog["vehicle_ids"][:2]
+    deleted_images, kept_images = image_ids(db, deleted), image_ids(db, kept)
+    delete_vehicle(db, deleted)
+
+    vehicle_image_crud.set_variants(db, variants={id: urls(id) for id in deleted_images + kept_images})
+
+    db.expire_all()
+    assert db.get(Vehicle, deleted) is None
+    for image_id in kept_images:
+        assert db.get(VehicleImage, image_id).thumb_url == urls(image_id)["thumb_url"]
+
+
+def test_generate_after_vehicle_deleted(db, catalog, monkeypatch):
+    vehicle_id = catalog["vehicle_ids"][0]
+    ids = image_ids(db, vehicle_id)
+    paths = []
+    for _ in ids:
+        with tempfile.NamedTemporaryFile(prefix="variant-", delete=False) as tmp:
+            paths.append(tmp.name)
+
+    async def render_and_store(path):
+        # El vehículo se borra mientras la tarea en segundo plano sube las variantes
+        if db.get(Vehicle, vehicle_id) is not None:
+            delete_vehicle(db, vehicle_id)
+        return urls(0)
+
+    monkeypatch.setattr(image_variant_service, "_render_and_store", render_and_store)
+    asyncio.run(image_variant_service.generate(ids, paths))
+
+    assert not any(os.path.exists(path) for path in paths)
+    assert db.scalars(select(VehicleImage).where(VehicleImage.id.in_(ids))).all() == []
@@ -0,0 +1,134 @@
+"""
+Bus de invalidación entre workers: reparto de avisos a los cachés y bucle de escucha.
+
+El bucle se prueba con una conexión falsa sobre un socketpair, que select() acepta igual
+que la conexión de psycopg2; no hace falta PostgreSQL.
+"""
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from app.services.brand_service import brand_cache
+from app.utils.http_cache import response_cache
+from app.utils.invalidation import ALL_TABLES, InvalidationBus, invalidation_bus
+
+
+def message(table: str, id=None, origin: str = "otro-worker") -> str:
+    return json.dumps({"table": table, "id": id, "origin": origin})
+
+
+@pytest.fixture
+def bus():
+    return InvalidationBus(channel="test", enabled=True, poll_interval=0.05, retry_seconds=0.01)
+
+
+@pytest.fixture
+def calls(bus):
+    received = []
+    bus.subscribe("brands", lambda table, id: received.append(("brands", table, id)))
+    bus.subscribe(ALL_TABLES, lambda table, id: received.append(("*", table, id)))
+    return received
+
+
+def test_dispatch_reaches_table_and_wildcard_handlers(bus, calls):
+    bus.dispatch(message("brands", 7))
+    bus.dispatch(message("vehicles", 3))
+
+    assert calls == [("brands", "brands", 7), ("*", "brands", 7), ("*", "vehicles", 3)]
+    assert bus.received == 2
+
+
+def test_own_and_malformed_messages_are_ignored(bus, calls):
+    bus.dispatch(message("brands", 1, origin=bus.origin))
+    bus.dispatch("no es json")
+    bus.dispatch(json.dumps({"id": 1}))
+
+    assert calls == []
+    assert bus.received == 0
+
+
+def test_failing_handler_does_not_stop_the_others(bus, calls):
+    bus.subscribe("brands", lambda table, id: 1 / 0)
+    bus.subscribe("brands", lambda table, id: calls.append(("after", table, id)))
+
+    bus.dispatch(message("brands", 2))
+
+    assert ("after", "brands", 2) in calls and ("*", "brands", 2) in calls
+
+
+def test_publish_is_a_no_op_outside_postgresql(db):
+    published = invalidation_bus.published
+    invalidation_bus.publish(db, "vehicles", 1)
+    assert invalidation_bus.published == published
+
+
+def test_remote_brand_change_invalidates_local_caches(db, catalog):
+    brand_cache.all(db)
+    reloads, generation = brand_cache.reloads, response_cache.generation
+
+    invalidation_bus.dispatch(message("brands", catalog["brand_ids"][0]))
+
+    brand_cache.all(db)
+    assert brand_cache.reloads == reloads + 1
+    assert response_cache.generation == generation + 1
+
+
+class FakeConnection:
+    """Lo que usa el bucle de una conexión psycopg2: fileno, poll, notifies y close"""
+
+    def __init__(self):
+        self.reader, self.writer = socket.socketpair()
+        self.notifies = []
+        self.closed = False
+
+    def fileno(self) -> int:
+        return self.reader.fileno()
+
+    def poll(self) -> None:
+        self.reader.recv(1024)
+
+    def notify(self, payload: str) -> None:
+        self.notifies.append(type("Notify", (), {"payload": payload})())
+        self.writer.send(b"x")
+
+    def close(self) -> None:
+        self.closed = True
+        self.reader.close()
+        self.writer.close()
+
+
+def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condición no alcanzada"
+        time.sleep(0.01)
+
+
+def test_listener_reconnects_and_dispatches(bus, calls, monkeypatch):
+    connection = FakeConnection()
+    attempts = []
+
+    def connect(engine):
+        attempts.append(engine)
+        if len(attempts) == 1:
+            raise OSError("sin conexión")
+        return connection
+
+    monkeypatch.setattr(bus, "_connect", connect)
+    listener = threading.Thread(target=bus._listen, args=(None,), daemon=True)
+    listener.start()
+    try:
+        wait_for(lambda: bus.listening)
+        assert bus.errors == 1
+        # Al (re)conectar se invalida todo: pudo perderse algún aviso
+        assert ("brands", "brands", None) in calls
+
+        connection.notify(message("vehicles", 5))
+        wait_for(lambda: ("*", "vehicles", 5) in calls)
+    finally:
+        bus._stop.set()
+        listener.join(timeout=1)
+    assert not bus.listening and connection.closed
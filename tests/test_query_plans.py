@@ -0,0 +1,156 @@
+"""
+Regresión de planes: las consultas de los caminos calientes deben resolverse con índices.
+
+Cada caso ejecuta la consulta real del repositorio, captura sus sentencias y las pasa
+por EXPLAIN con los mismos parámetros. Falla si alguna recorre vehicles o vehicle_images
+entera (SCAN sin índice en SQLite, Seq Scan en PostgreSQL con enable_seqscan desactivado,
+que solo lo elige si no hay alternativa) o si un listado por clave ordena en memoria.
+"""
+import json
+import re
+from typing import List
+
+import pytest
+
+from app.repositories.brand import brand_crud
+from app.repositories.catalog_stats import catalog_stats_crud
+from app.repositories.vehicle import VEHICLE_DETAIL_LOAD, VEHICLE_LIST_LOAD, vehicle_crud
+from app.schemas.vehicle import VehicleFilters
+from tests.conftest import capture_statements
+
+# Tablas que no pueden recorrerse enteras en un camino caliente
+LARGE_TABLES = ("vehicles", "vehicle_images")
+SQLITE_FULL_SCAN = re.compile(rf"^SCAN ({'|'.join(LARGE_TABLES)})\b(?!.*\bUSING\b)")
+
+
+def explain(db, statement: str, parameters) -> List[str]:
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        nodes, pending = [], [plan[0]["Plan"]]
+        while pending:
+            node = pending.pop()
+            nodes.append(" ".join(filter(None, (node["Node Type"], node.get("Relation Name"), node.get("Index Name")))))
+            pending.extend(node.get("Plans", []))
+        return nodes
+    return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def full_scans(lines: List[str]) -> List[str]:
+    return [
+        line for line in lines
+        if SQLITE_FULL_SCAN.match(line) or any(line == f"Seq Scan {table}" for table in LARGE_TABLES)
+    ]
+
+
+def uses_index(lines: List[str], index: str) -> bool:
+    # SQLite: "SEARCH brands USING INDEX ix_... (...)"; PostgreSQL: "Index Scan brands ix_..."
+    return any(re.search(rf"\b{index}\b", line) for line in lines)
+
+
+def in_memory_sorts(lines: List[str]) -> List[str]:
+    return [line for line in lines if "TEMP B-TREE FOR ORDER BY" in line or line.startswith("Sort")]
+
+
+def plans_for(db, run) -> List[List[str]]:
+    with capture_statements() as statements:
+        run(db)
+    db.expunge_all()
+    plans = [explain(db, statement, parameters) for statement, parameters in statements]
+    db.rollback()
+    return plans
+
+
+def page(**kwargs):
+    return lambda db: vehicle_crud.get_multi_with_filters(db, limit=20, load=VEHICLE_LIST_LOAD, **kwargs)
+
+
+# Consultas por clave o filtro selectivo: ningún recorrido completo
+INDEXED_CASES = {
+    "vehicle.get.detail": lambda db: vehicle_crud.get(db, id=1, load=VEHICLE_DETAIL_LOAD),
+    "vehicle.version": lambda db: vehicle_crud.get_version(db, id=1),
+    "vehicle.page": page(with_total=False),
+    "vehicle.page.cursor": page(after=("Acme 05", 6), with_total=False),
+    "vehicle.page.marca": page(filters=VehicleFilters(marca_id=1)),
+    "vehicle.page.tipo": page(filters=VehicleFilters(tipo="BIKE")),
+    "vehicle.page.marca_tipo": page(filters=VehicleFilters(marca_id=1, tipo="BIKE")),
+    "vehicle.page.marca.no_total": page(filters=VehicleFilters(marca_id=1), with_total=False),
+    "vehicle.page.tipo.no_total": page(filters=VehicleFilters(tipo="BIKE"), with_total=False),
+    "vehicle.page.precio": page(filters=VehicleFilters(precio_min=100, precio_max=150), with_total=False),
+    "vehicle.by_marca": lambda db: vehicle_crud.get_by_marca(db, marca_id=1, limit=20),
+    "vehicle.by_marca.cursor": lambda db: vehicle_crud.get_by_marca(db, marca_id=1, limit=20, after=("Acme 05", 6)),
+    "vehicle.by_tipo": lambda db: vehicle_crud.get_by_tipo(db, tipo="BIKE", limit=20),
+    "vehicle.by_precio_range": lambda db: vehicle_crud.get_by_precio_range(db, precio_min=100, precio_max=150, limit=20),
+    "vehicle.by_precio_range.cursor": lambda db: vehicle_crud.get_by_precio_range(
+        db, precio_min=100, precio_max=150, limit=20, after=(120.0, 3)),
+    "vehicle.count.marca": lambda db: vehicle_crud.count_with_filters(db, filters=VehicleFilters(marca_id=1)),
+    "vehicle.facets.marca": lambda db: vehicle_crud.get_facets(db, filters=VehicleFilters(marca_id=1)),
+    "vehicle.existing_referencias": lambda db: vehicle_crud.get_existing_referencias(db, referencias=["ACM-001", "X"]),
+    "vehicle.by_referencia": lambda db: vehicle_crud.get_by_referencia(db, referencia="ACM-001"),
+    "brand.by_name": lambda db: brand_crud.get_by_name(db, name="ACME"),
+    "brand.with_vehicles": lambda db: brand_crud.get_with_vehicles(db, id=1),
+    "catalog_stats.revision": lambda db: catalog_stats_crud.get_revision(db),
+}
+
+# Índice que cada consulta debe usar (brands no está en LARGE_TABLES: se comprueba aparte)
+EXPECTED_INDEXES = {
+    "vehicle.by_referencia": "ix_vehicles_referencia",
+    "brand.by_name": "ix_brands_name_lower",
+}
+
+# Búsquedas por subcadena (ILIKE '%término%'): solo PostgreSQL tiene índice para ellas
+# (GIN de pg_trgm); en SQLite ningún índice B-tree sirve y el recorrido es lo esperado
+TRIGRAM_CASES = {
+    "vehicle.search_by_nombre": (
+        lambda db: vehicle_crud.search_by_nombre(db, search_term="Acme", limit=20), "ix_vehicles_nombre_trgm"),
+    "vehicle.page.search": (
+        page(filters=VehicleFilters(search="Acme"), with_total=False), "ix_vehicles_nombre_trgm"),
+    "brand.search_by_name": (
+        lambda db: brand_crud.search_by_name(db, search_term="Acme"), "ix_brands_name_trgm"),
+}
+
+# Listados por clave sin total (el total por ventana sí necesita todas las filas filtradas):
+# el índice ya da el orden de la página
+KEYSET_CASES = [
+    "vehicle.page", "vehicle.page.cursor", "vehicle.page.marca.no_total", "vehicle.page.tipo.no_total",
+    "vehicle.by_marca", "vehicle.by_marca.cursor", "vehicle.by_tipo",
+    "vehicle.by_precio_range", "vehicle.by_precio_range.cursor",
+]
+
+
+@pytest.mark.parametrize("name", list(INDEXED_CASES))
+def test_hot_path_uses_indexes(db, catalog, name):
+    for plan in plans_for(db, INDEXED_CASES[name]):
+        assert not full_scans(plan), f"{name}: {plan}"
+
+
+@pytest.mark.parametrize("name", KEYSET_CASES)
+def test_keyset_pages_are_not_sorted_in_memory(db, catalog, name):
+    for plan in plans_for(db, INDEXED_CASES[name]):
+        assert not in_memory_sorts(plan), f"{name}: {plan}"
+
+
+@pytest.mark.parametrize("name", list(EXPECTED_INDEXES))
+def test_lookup_uses_its_index(db, catalog, name):
+    plans = plans_for(db, INDEXED_CASES[name])
+    assert any(uses_index(plan, EXPECTED_INDEXES[name]) for plan in plans), f"{name}: {plans}"
+
+
+@pytest.mark.parametrize("name", list(TRIGRAM_CASES))
+def test_substring_search_uses_trigram_index(db, catalog, name):
+    if db.get_bind().dialect.name != "postgresql":
+        pytest.skip("ILIKE '%término%' solo tiene índice (pg_trgm) en PostgreSQL")
+    run, index = TRIGRAM_CASES[name]
+    plans = plans_for(db, run)
+    for plan in plans:
+        assert not full_scans(plan), f"{name}: {plan}"
+    assert any(uses_index(plan, index) for plan in plans), f"{name}: {plans}"
+
+
+def test_full_scan_is_detected(db, catalog):
+    # El detector no puede quedarse mudo: una consulta sin índice sí se señala
+    plans = plans_for(db, lambda db: db.connection().exec_driver_sql(
+        "SELECT id, created_at FROM vehicles WHERE created_at IS NULL"))
+    assert any(full_scans(plan) for plan in plans)
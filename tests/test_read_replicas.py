@@ -0,0 +1,103 @@
+"""
+Sesiones de lectura sobre réplicas: elección perezosa, round-robin y paso al primario.
+
+Cada réplica es otro archivo SQLite con una marca propia, así se ve de dónde leyó la sesión.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.database import ReadSession, engine
+from app.models import Brand
+from app.repositories.brand import brand_crud
+from app.utils.db_pool import ReplicaRouter
+
+
+def make_replica(path, name: str, **pool):
+    replica = create_engine(f"sqlite:///{path}", poolclass=QueuePool, **pool)
+    Brand.__table__.metadata.create_all(replica)
+    with replica.begin() as connection:
+        connection.execute(Brand.__table__.insert().values(name=name))
+    return replica
+
+
+@pytest.fixture
+def replicas(tmp_path):
+    engines = [make_replica(tmp_path / f"replica{n}.db", f"replica-{n}") for n in range(2)]
+    yield engines
+    for replica in engines:
+        replica.dispose()
+
+
+@pytest.fixture
+def primary(db):
+    db.add(Brand(name="primary"))
+    db.commit()
+
+
+def read_session(replicas, router):
+    return ReadSession(bind=engine, replicas=replicas, router=router, autoflush=False)
+
+
+def source(session) -> str:
+    return [brand.name for brand in brand_crud.get_all(session)][0]
+
+
+def test_connection_is_checked_out_on_first_query(replicas):
+    router = ReplicaRouter(1, retry_after=30)
+    session = read_session(replicas[:1], router)
+    try:
+        assert replicas[0].pool.checkedout() == 0
+        assert source(session) == "replica-0"
+        assert replicas[0].pool.checkedout() == 1
+    finally:
+        session.close()
+    assert replicas[0].pool.checkedout() == 0
+
+
+def test_round_robin_between_replicas(replicas):
+    router = ReplicaRouter(2, retry_after=30)
+    names = []
+    for _ in range(4):
+        session = read_session(replicas, router)
+        try:
+            names.append(source(session))
+        finally:
+            session.close()
+    assert names == ["replica-0", "replica-1", "replica-0", "replica-1"]
+
+
+def test_unreachable_replica_fails_over_and_is_skipped(tmp_path, replicas, primary):
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReplicaRouter(2, retry_after=30)
+    session = read_session([broken, replicas[1]], router)
+    try:
+        assert source(session) == "replica-1"
+    finally:
+        session.close()
+    assert [state["healthy"] for state in router.status()] == [False, True]
+
+    # Mientras dure retry_after la réplica caída ni se intenta
+    for _ in range(2):
+        session = read_session([broken, replicas[1]], router)
+        try:
+            assert source(session) == "replica-1"
+        finally:
+            session.close()
+
+
+def test_exhausted_replica_pool_fails_over_to_primary(tmp_path, primary):
+    replica = make_replica(tmp_path / "busy.db", "replica-busy", pool_size=1, max_overflow=0, pool_timeout=0.1)
+    router = ReplicaRouter(1, retry_after=30)
+    held = replica.connect()
+    try:
+        session = read_session([replica], router)
+        try:
+            assert source(session) == "primary"
+        finally:
+            session.close()
+        assert router.status() == [{"replica": 0, "healthy": False}]
+    finally:
+        held.close()
+        replica.dispose()
+
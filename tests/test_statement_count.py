@@ -0,0 +1,58 @@
+"""
+Los listados cargan marca e imágenes con un número fijo de sentencias, sea cual sea el
+tamaño de la página (sin N+1 por vehículo).
+"""
+import pytest
+
+from tests.conftest import capture_statements
+
+LIST_URLS = [
+    "/api/v1/vehicles/?limit={limit}",
+    "/api/v1/vehicles/?limit={limit}&include_total=false",
+    "/api/v1/vehicles/?limit={limit}&marca_id={brand_id}&tipo=BIKE",
+    "/api/v1/vehicles/?limit={limit}&search=Acme",
+    "/api/v1/vehicles/by-marca/{brand_id}?limit={limit}",
+    "/api/v1/vehicles/by-tipo/E_BIKE?limit={limit}",
+    "/api/v1/vehicles/by-precio-range?precio_min=100&precio_max=1000&limit={limit}",
+]
+
+
+def statements_for(client, url: str) -> int:
+    with capture_statements() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize("url", LIST_URLS)
+def test_list_statements_do_not_grow_with_page_size(client, catalog, url):
+    brand_id = catalog["brand_ids"][0]
+    # Catálogo de marcas ya en memoria, como en un worker en marcha
+    client.get("/api/v1/brands/")
+
+    small = statements_for(client, url.format(limit=2, brand_id=brand_id))
+    large = statements_for(client, url.format(limit=20, brand_id=brand_id))
+    assert small == large
+    # Versión (ETag), página e imágenes: nunca una por vehículo
+    assert large <= 4
+
+
+def test_detail_statements(client, catalog):
+    client.get("/api/v1/brands/")
+    vehicle_id = catalog["vehicle_ids"][0]
+
+    with capture_statements() as statements:
+        response = client.get(f"/api/v1/vehicles/{vehicle_id}")
+    assert response.status_code == 200
+    assert len(response.json()["images"]) == 3
+    assert len(statements) <= 3
+
+
+def test_brand_with_vehicles_statements(client, catalog):
+    brand_id = catalog["brand_ids"][0]
+
+    with capture_statements() as statements:
+        response = client.get(f"/api/v1/brands/{brand_id}/with-vehicles")
+    assert response.status_code == 200
+    assert len(response.json()["vehicles"]) == 12
+    assert len(statements) <= 3
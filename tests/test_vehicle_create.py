@@ -0,0 +1,112 @@
+"""
+Alta de un vehículo con sus imágenes: una transacción, imágenes en un solo INSERT y nada
+escrito si algo falla.
+"""
+import io
+
+import pytest
+from PIL import Image
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.database import engine
+from app.models import Vehicle, VehicleImage
+from app.repositories.catalog_stats import SCOPE_VEHICLES, catalog_stats_crud
+from app.schemas.vehicle import VehicleCreate
+from app.schemas.vehicle_image import VehicleImageUpload
+from app.services.vehicle_service import vehicle_service
+from tests.conftest import capture_statements
+
+
+def vehicle_data(marca_id: int, referencia: str = "NEW-001") -> VehicleCreate:
+    return VehicleCreate(nombre="Nuevo", referencia=referencia, precio=999.0, tipo="E_BIKE",
+                         marca_id=marca_id, images=[])
+
+
+def uploads(count: int = 3):
+    return [VehicleImageUpload(url=f"https://storage.test/new-{n}.jpg", width=800, height=600)
+            for n in range(count)]
+
+
+def vehicles_count(db) -> int:
+    return db.scalar(select(func.count(Vehicle.id)))
+
+
+@pytest.fixture
+def commits():
+    count = []
+    listener = lambda connection: count.append(connection)
+    event.listen(engine, "commit", listener)
+    yield count
+    event.remove(engine, "commit", listener)
+
+
+def test_vehicle_and_images_in_one_transaction(db, catalog, commits):
+    brand_id = catalog["brand_ids"][0]
+
+    with capture_statements() as statements:
+        response = vehicle_service.create_vehicle_with_images(db, vehicle_data=vehicle_data(brand_id), images=uploads())
+
+    assert len(commits) == 1
+    image_inserts = [sql for sql, _ in statements if sql.startswith("INSERT INTO vehicle_images")]
+    # insertmanyvalues agrupa las filas con RETURNING en PostgreSQL; SQLite las envía una a una
+    assert len(image_inserts) == (1 if engine.dialect.name == "postgresql" else 3)
+    assert response.brand.id == brand_id
+    assert [(image.url, image.width) for image in response.images] == [
+        (f"https://storage.test/new-{n}.jpg", 800) for n in range(3)
+    ]
+    assert all(image.id and image.vehicle_id == response.id for image in response.images)
+
+
+def test_failed_image_insert_leaves_nothing_behind(db, catalog, commits):
+    before = vehicles_count(db)
+    revision = catalog_stats_crud.get_revision(db).revision
+    # Una fila de imagen sin url viola NOT NULL después de insertar el vehículo
+    broken = uploads(2) + [VehicleImageUpload.model_construct(url=None, width=None, height=None)]
+
+    with pytest.raises(IntegrityError):
+        vehicle_service.create_vehicle_with_images(db, vehicle_data=vehicle_data(catalog["brand_ids"][0]),
+                                                   images=broken)
+
+    assert commits == []
+    assert vehicles_count(db) == before
+    assert db.scalar(select(func.count(VehicleImage.id)).where(VehicleImage.url.like("%new-%"))) == 0
+    stats = catalog_stats_crud.get_scope(db, scope=SCOPE_VEHICLES)
+    assert (stats.vehicles, stats.revision) == (before, revision)
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"referencia": "ACM-000"}, "Ya existe un vehículo"),
+    ({"marca_id": 999}, "La marca 999 no existe"),
+    ({"tipo": "TANK"}, "no es válido"),
+])
+def test_rejected_vehicle_is_not_written(db, catalog, change, message):
+    before = vehicles_count(db)
+    data = vehicle_data(catalog["brand_ids"][0]).model_copy(update=change)
+
+    with pytest.raises(ValueError, match=message):
+        vehicle_service.create_vehicle_with_images(db, vehicle_data=data, images=uploads())
+    assert vehicles_count(db) == before
+
+
+def png(color: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_create_endpoint(client, catalog, admin_headers):
+    files = [(field, (f"{field}.png", png(color), "image/png"))
+             for field, color in (("file_one", "red"), ("file_two", "green"), ("file_three", "blue"))]
+    data = {"nombre": "Nuevo", "referencia": "NEW-HTTP", "precio": "1500", "tipo": "BIKE",
+            "marca_id": str(catalog["brand_ids"][1])}
+
+    response = client.post("/api/v1/vehicles/", files=files, data=data, headers=admin_headers)
+
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert body["brand"]["name"] == "Velo"
+    assert [(image["width"], image["height"]) for image in body["images"]] == [(64, 48)] * 3
+    # Las variantes se generan después de responder; las imágenes son las mismas filas
+    stored = client.get(f"/api/v1/vehicles/{body['id']}").json()["images"]
+    assert [(image["id"], image["url"]) for image in stored] == [(image["id"], image["url"]) for image in body["images"]]
@@ -0,0 +1,47 @@
+"""
+Filtros comunes del listado, las facetas y la exportación (get_vehicle_filters).
+"""
+import json
+
+import pytest
+
+from tests.conftest import VEHICLES_PER_BRAND
+
+
+@pytest.mark.parametrize("search", ["", "   "])
+def test_export_empty_search_with_other_filter(client, catalog, search):
+    brand_id = catalog["brand_ids"][0]
+    response = client.get("/api/v1/vehicles/export", params={"marca_id": brand_id, "search": search})
+
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines() if line]
+    assert len(rows) == VEHICLES_PER_BRAND
+    assert {row["marca_id"] for row in rows} == {brand_id}
+
+
+@pytest.mark.parametrize("search", ["", "   "])
+def test_list_empty_search_with_other_filter(client, catalog, search):
+    brand_id = catalog["brand_ids"][0]
+    response = client.get("/api/v1/vehicles/", params={"marca_id": brand_id, "search": search})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == VEHICLES_PER_BRAND
+    assert {vehicle["marca_id"] for vehicle in body["vehicles"]} == {brand_id}
+
+
+def test_list_search_still_filters(client, catalog):
+    response = client.get("/api/v1/vehicles/", params={"marca_id": catalog["brand_ids"][0], "search": " 01"})
+
+    assert response.status_code == 200
+    assert [vehicle["nombre"] for vehicle in response.json()["vehicles"]] == ["Acme 01"]
+
+
+@pytest.mark.parametrize("search", ["", "   "])
+def test_facets_empty_search_with_other_filter(client, catalog, search):
+    brand_id = catalog["brand_ids"][0]
+    response = client.get("/api/v1/vehicles/facets", params={"marca_id": brand_id, "search": search})
+
+    assert response.status_code == 200
+    assert response.json() == client.get("/api/v1/vehicles/facets", params={"marca_id": brand_id}).json()
+    assert sum(facet["count"] for facet in response.json()["tipos"]) == VEHICLES_PER_BRAND